@@ -1,13 +1,15 @@
 import asyncio
 import logging
-import httpx
 import random
 from datetime import datetime
 from typing import Dict, Any
 
+from transport import EventTransport
+
 class SimpleADAgent:
     def __init__(self):
-        self.orchestrator_url = "http://localhost:8006/api/v1/events"
+        self.orchestrator_url = "http://localhost:8006/api/v1/events/batch"
+        self.transport = EventTransport(self.orchestrator_url)
         self.logger = logging.getLogger(__name__)
         self.is_running = False
 
@@ -15,6 +17,7 @@ class SimpleADAgent:
         """Démarre la surveillance de l'agent."""
         self.logger.info("🚀 Démarrage de l'agent AD simplifié...")
         self.is_running = True
+        await self.transport.start()
         
         # Simulation de la surveillance continue
         while self.is_running:
@@ -25,6 +28,7 @@ class SimpleADAgent:
         """Arrête l'agent."""
         self.logger.info("🛑 Arrêt de l'agent AD...")
         self.is_running = False
+        await self.transport.close()
 
     async def simulate_event_detection(self):
         """Simule la détection d'un événement depuis le journal Windows."""
@@ -85,26 +89,8 @@ class SimpleADAgent:
         await self.send_event_to_orchestrator(event_data)
 
     async def send_event_to_orchestrator(self, event_data: Dict[str, Any]):
-        """Envoie l'événement formaté à l'API de l'orchestrateur."""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.orchestrator_url, 
-                    json=event_data,
-                    timeout=10.0
-                )
-                
-                if response.status_code == 202:  # 202 Accepted
-                    self.logger.info(f"✅ Événement {event_data['event_id']} envoyé avec succès à l'orchestrateur.")
-                else:
-                    self.logger.error(f"❌ Erreur lors de l'envoi de l'événement: {response.status_code} {response.text}")
-                    
-        except httpx.ConnectError as e:
-            self.logger.error(f"❌ Impossible de se connecter à l'orchestrateur : {e}")
-        except httpx.TimeoutException as e:
-            self.logger.error(f"⏰ Timeout lors de l'envoi à l'orchestrateur : {e}")
-        except Exception as e:
-            self.logger.error(f"❌ Erreur inattendue lors de l'envoi : {e}")
+        """Place l'événement formaté dans la file d'envoi par lots vers l'orchestrateur."""
+        self.transport.send(event_data)
 
 
 async def main():
@@ -0,0 +1,135 @@
+"""
+Registre des parseurs d'événements Windows par EventID
+
+Les tables ci-dessous décrivent, pour chaque EventID, les champs à extraire
+des StringInserts et la traduction en SecurityEvent. Le registre est compilé
+une seule fois au démarrage de l'agent à partir de `AgentConfig.ad_event_types` :
+le test de pertinence est une appartenance à un frozenset et l'extraction
+passe par un extracteur précompilé, sans chaîne de if/elif.
+"""
+
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from src.core.events import SecurityEvent, EventType, UserContext, DeviceContext, Severity, RiskLevel
+
+
+# EventID -> (nombre minimal d'inserts, {champ: position dans StringInserts})
+EVENT_FIELD_SPECS: Dict[int, Tuple[int, Dict[str, int]]] = {
+    4624: (5, {  # Logon successful
+        'AccountName': 5,
+        'ClientAddress': 18,
+        'LogonType': 8,
+        'ProcessName': 17,
+    }),
+    4625: (5, {  # Logon failed
+        'AccountName': 5,
+        'ClientAddress': 18,
+        'FailureReason': 8,
+    }),
+    4720: (2, {  # Account created
+        'AccountName': 0,
+        'TargetAccount': 2,
+    }),
+    4728: (3, {  # Member added to group
+        'AccountName': 0,
+        'TargetAccount': 2,
+        'Group': 3,
+    }),
+}
+
+
+@dataclass(frozen=True)
+class EventMapping:
+    """Traduction d'un EventID en SecurityEvent Orion."""
+    event_type: EventType
+    severity: Severity
+    risk_level: RiskLevel
+    domain_joined: bool
+    tags: Tuple[str, ...]
+    ip_address: Optional[str] = None  # Adresse fixe ; sinon ClientAddress
+
+
+EVENT_MAPPINGS: Dict[int, EventMapping] = {
+    4624: EventMapping(EventType.AD_LOGON, Severity.INFO, RiskLevel.LOW, True,
+                       ("ad_logon", "successful")),
+    4625: EventMapping(EventType.AD_LOGON, Severity.WARNING, RiskLevel.MEDIUM, False,
+                       ("ad_logon", "failed", "suspicious")),
+    4720: EventMapping(EventType.AD_ACCOUNT_CREATED, Severity.INFO, RiskLevel.MEDIUM, True,
+                       ("ad_account", "created"), ip_address="10.0.0.1"),  # DC typique
+    4728: EventMapping(EventType.AD_GROUP_MODIFIED, Severity.CRITICAL, RiskLevel.HIGH, True,
+                       ("ad_group", "modified", "privilege_escalation"), ip_address="10.0.0.1"),
+}
+
+
+FieldExtractor = Callable[[List[str]], Dict[str, Any]]
+
+
+def compile_field_extractor(min_inserts: int, fields: Dict[str, int]) -> FieldExtractor:
+    """Compile un extracteur de champs pour un EventID."""
+    names = tuple(fields)
+    positions = tuple(fields.values())
+    required = max(positions) + 1
+    getter = itemgetter(*positions)
+
+    def extract(inserts: List[str]) -> Dict[str, Any]:
+        count = len(inserts)
+        if count < min_inserts:
+            return {}
+        if count >= required:
+            # Cas courant : tous les inserts sont présents
+            values = getter(inserts)
+            return dict(zip(names, values if len(names) > 1 else (values,)))
+        return {
+            name: inserts[position] if count > position else 'Unknown'
+            for name, position in zip(names, positions)
+        }
+
+    return extract
+
+
+class EventParserRegistry:
+    """Parseurs et tests de pertinence compilés pour les EventID surveillés."""
+
+    def __init__(self, event_ids: Iterable[Any]):
+        self.relevant_event_ids: FrozenSet[int] = frozenset(int(event_id) for event_id in event_ids)
+        self.extractors: Dict[int, FieldExtractor] = {
+            event_id: compile_field_extractor(*EVENT_FIELD_SPECS[event_id])
+            for event_id in self.relevant_event_ids if event_id in EVENT_FIELD_SPECS
+        }
+        self.mappings: Dict[int, EventMapping] = {
+            event_id: EVENT_MAPPINGS[event_id]
+            for event_id in self.relevant_event_ids if event_id in EVENT_MAPPINGS
+        }
+
+    def extract_fields(self, event_id: int, inserts: Optional[List[str]]) -> Dict[str, Any]:
+        """Extrait les champs spécifiques d'un EventID (dictionnaire vide si inconnu)."""
+        extractor = self.extractors.get(event_id)
+        if extractor is None or not inserts:
+            return {}
+        return extractor(inserts)
+
+    def build_event(self, raw_event: Dict[str, Any], domain: str) -> Optional[SecurityEvent]:
+        """Traduit un événement brut en SecurityEvent, ou None si l'EventID n'est pas traduit."""
+        mapping = self.mappings.get(raw_event.get('EventID'))
+        if mapping is None:
+            return None
+
+        return SecurityEvent(
+            event_type=mapping.event_type,
+            severity=mapping.severity,
+            risk_level=mapping.risk_level,
+            user_context=UserContext(
+                username=raw_event.get('AccountName', 'Unknown'),
+                domain=domain
+            ),
+            device_context=DeviceContext(
+                hostname=raw_event.get('ComputerName', 'Unknown'),
+                ip_address=mapping.ip_address or raw_event.get('ClientAddress', 'Unknown'),
+                domain_joined=mapping.domain_joined
+            ),
+            raw_data=raw_event,
+            source="ad_agent",
+            tags=list(mapping.tags)
+        )
@@ -0,0 +1,281 @@
+"""
+Sources d'événements Windows pour les agents Orion
+
+Chaque source lit uniquement les enregistrements postérieurs au dernier
+numéro d'enregistrement (RecordNumber) traité, persisté dans un fichier de
+point de reprise : l'agent ne réémet ni ne saute d'événements entre deux
+redémarrages. La position lue avance à chaque lecture ; le point de reprise
+n'avance qu'à la position confirmée par l'appelant (`commit`), une fois les
+événements remis à l'orchestrateur.
+
+- WindowsEventLogSource : journal Windows via pywin32 (lecture par blocs)
+- ReplayEventSource : rejoue un export EVTX (JSON, NDJSON ou XML), ce qui
+  permet de développer et mesurer le pipeline sous Linux sans pywin32
+"""
+
+import json
+import logging
+import os
+from bisect import bisect_right
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import win32evtlog
+except ImportError:  # Hors Windows : seule la source de rejeu est disponible
+    win32evtlog = None
+
+
+@dataclass
+class EventRecord:
+    """Enregistrement brut exposant les attributs d'un PyEventLogRecord."""
+    EventID: int
+    RecordNumber: int
+    TimeGenerated: datetime
+    SourceName: str = ""
+    ComputerName: str = ""
+    EventType: int = 0
+    EventCategory: int = 0
+    StringInserts: List[str] = field(default_factory=list)
+    Sid: Optional[str] = None
+
+
+class EventCheckpoint:
+    """Point de reprise persistant : dernier RecordNumber traité par journal."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.logger = logging.getLogger(__name__)
+        self._positions: Dict[str, int] = {}
+        self._load()
+
+    def get(self, log_name: str) -> Optional[int]:
+        return self._positions.get(log_name)
+
+    def set(self, log_name: str, record_number: int) -> None:
+        self._positions[log_name] = record_number
+
+    def save(self) -> None:
+        """Écrit le point de reprise de façon atomique."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._positions, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._positions = {name: int(value) for name, value in json.load(f).items()}
+        except (ValueError, OSError) as e:
+            self.logger.warning(f"⚠️  Point de reprise illisible ({self.path}), lecture depuis le début : {e}")
+            self._positions = {}
+
+
+class EventLogSource(ABC):
+    """Interface commune des sources d'événements incrémentales."""
+
+    def __init__(self, log_name: str, checkpoint: EventCheckpoint, chunk_size: int = 1000):
+        self.log_name = log_name
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(__name__)
+        self._pending_position: Optional[int] = None
+
+    @property
+    def position(self) -> Optional[int]:
+        """Position du dernier enregistrement lu (None si rien n'a encore été lu)."""
+        return self._pending_position or self.checkpoint.get(self.log_name)
+
+    @abstractmethod
+    def read(self) -> List[Any]:
+        """Lit au plus `chunk_size` nouveaux enregistrements."""
+
+    def commit(self, position: Optional[int] = None) -> None:
+        """
+        Persiste le point de reprise : la position du dernier enregistrement lu,
+        ou `position` si elle est inférieure (enregistrements lus mais pas encore remis).
+        """
+        if self._pending_position is None:
+            return
+        if position is not None:
+            position = min(position, self._pending_position)
+        else:
+            position = self._pending_position
+        if position != self.checkpoint.get(self.log_name):
+            self.checkpoint.set(self.log_name, position)
+            self.checkpoint.save()
+
+    def close(self) -> None:
+        pass
+
+
+class WindowsEventLogSource(EventLogSource):
+    """Lecture incrémentale d'un journal Windows par numéro d'enregistrement."""
+
+    def __init__(self, log_name: str, checkpoint: EventCheckpoint, chunk_size: int = 1000,
+                 server: Optional[str] = None):
+        super().__init__(log_name, checkpoint, chunk_size)
+        if win32evtlog is None:
+            raise RuntimeError("pywin32 est requis pour lire les journaux Windows")
+        self.handle = win32evtlog.OpenEventLog(server, log_name)
+
+    def read(self) -> List[Any]:
+        oldest = win32evtlog.GetOldestEventLogRecord(self.handle)
+        newest = oldest + win32evtlog.GetNumberOfEventLogRecords(self.handle) - 1
+        last = self.position
+
+        if last is None:
+            # Premier démarrage : seuls les nouveaux événements sont lus
+            self._pending_position = newest
+            return []
+        if last < oldest - 1 or last > newest:
+            # Journal effacé ou réinitialisé depuis le dernier passage
+            self.logger.warning(f"⚠️  Journal {self.log_name} réinitialisé, reprise à l'enregistrement {oldest}")
+            last = oldest - 1
+        if last >= newest:
+            return []
+
+        flags = win32evtlog.EVENTLOG_SEEK_READ | win32evtlog.EVENTLOG_FORWARDS_READ
+        offset = last + 1
+        records = []
+        while len(records) < self.chunk_size:
+            try:
+                chunk = win32evtlog.ReadEventLog(self.handle, flags, offset)
+            except Exception as e:
+                if "No more data" not in str(e):
+                    self.logger.error(f"Erreur lors de la lecture du journal {self.log_name} : {e}")
+                break
+            if not chunk:
+                break
+            records.extend(chunk)
+            # Les lectures suivantes sont séquentielles depuis la position courante
+            flags = win32evtlog.EVENTLOG_SEQUENTIAL_READ | win32evtlog.EVENTLOG_FORWARDS_READ
+            offset = 0
+
+        if records:
+            self._pending_position = records[-1].RecordNumber
+        return records
+
+    def close(self) -> None:
+        try:
+            win32evtlog.CloseEventLog(self.handle)
+        except Exception:
+            pass
+
+
+class ReplayEventSource(EventLogSource):
+    """Rejeu d'un export EVTX (JSON, NDJSON ou XML) avec le même point de reprise."""
+
+    def __init__(self, path: str, checkpoint: EventCheckpoint, chunk_size: int = 1000,
+                 log_name: str = "Security"):
+        super().__init__(log_name, checkpoint, chunk_size)
+        self.path = Path(path)
+        self.records = sorted(self._load(self.path), key=lambda record: record.RecordNumber)
+        self._numbers = [record.RecordNumber for record in self.records]
+        self.logger.info(f"Rejeu de {len(self.records)} événements depuis {self.path}")
+
+    def read(self) -> List[Any]:
+        last = self.position or 0
+        start = bisect_right(self._numbers, last)
+        records = self.records[start:start + self.chunk_size]
+        if records:
+            self._pending_position = records[-1].RecordNumber
+        return records
+
+    @classmethod
+    def _load(cls, path: Path) -> List[EventRecord]:
+        content = path.read_text(encoding='utf-8-sig').strip()
+        if not content:
+            return []
+        if content.startswith('<'):
+            return cls._load_xml(content)
+        if content.startswith('['):
+            items = json.loads(content)
+        else:
+            items = [json.loads(line) for line in content.splitlines() if line.strip()]
+        return [cls._from_json(item, position) for position, item in enumerate(items, 1)]
+
+    @staticmethod
+    def _from_json(item: Dict[str, Any], position: int) -> EventRecord:
+        """Accepte les noms de champs pywin32, Get-WinEvent et python-evtx."""
+        inserts = item.get('StringInserts')
+        if inserts is None:
+            properties = item.get('Properties') or []
+            inserts = [prop.get('Value') if isinstance(prop, dict) else prop for prop in properties]
+        if isinstance(inserts, dict):
+            inserts = list(inserts.values())
+
+        timestamp = item.get('TimeGenerated') or item.get('TimeCreated')
+        return EventRecord(
+            EventID=int(item.get('EventID', item.get('Id', 0))),
+            RecordNumber=int(item.get('RecordNumber', item.get('RecordId', item.get('EventRecordID', position)))),
+            TimeGenerated=_parse_time(timestamp),
+            SourceName=item.get('SourceName') or item.get('ProviderName', ''),
+            ComputerName=item.get('ComputerName') or item.get('MachineName', ''),
+            EventType=int(item.get('EventType', item.get('Level', 0)) or 0),
+            EventCategory=int(item.get('EventCategory', item.get('Task', 0)) or 0),
+            StringInserts=[str(value) if value is not None else '' for value in inserts],
+            Sid=item.get('Sid') or item.get('UserId'),
+        )
+
+    @staticmethod
+    def _load_xml(content: str) -> List[EventRecord]:
+        # wevtutil produit des éléments <Event> concaténés, sans racine
+        if content.startswith('<?xml'):
+            content = content.split('?>', 1)[1].strip()
+        if not content.startswith('<Events'):
+            content = f"<Events>{content}</Events>"
+        root = ET.fromstring(content)
+
+        # Les exports EVTX utilisent l'espace de noms Microsoft : on l'ignore
+        for element in root.iter():
+            element.tag = element.tag.rsplit('}', 1)[-1]
+
+        records = []
+        for position, event in enumerate(root.iter('Event'), 1):
+            system = event.find('System')
+            provider = system.find('Provider')
+            time_created = system.find('TimeCreated')
+            record_id = system.findtext('EventRecordID')
+            data = event.find('EventData')
+            records.append(EventRecord(
+                EventID=int(system.findtext('EventID', '0')),
+                RecordNumber=int(record_id) if record_id else position,
+                TimeGenerated=_parse_time(time_created.get('SystemTime') if time_created is not None else None),
+                SourceName=provider.get('Name', '') if provider is not None else '',
+                ComputerName=system.findtext('Computer', ''),
+                EventType=int(system.findtext('Level', '0') or 0),
+                EventCategory=int(system.findtext('Task', '0') or 0),
+                StringInserts=[d.text or '' for d in data.findall('Data')] if data is not None else [],
+            ))
+        return records
+
+
+def _parse_time(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    if isinstance(value, str) and value:
+        # Format PowerShell ConvertTo-Json : "/Date(1720000000000)/"
+        if value.startswith('/Date('):
+            return datetime.fromtimestamp(int(value[6:].split(')')[0].split('+')[0].split('-')[0]) / 1000)
+        value = value.replace('Z', '+00:00')
+        # fromisoformat ne gère que 6 chiffres de fraction (EVTX en fournit 7)
+        if '.' in value:
+            head, _, tail = value.partition('.')
+            digits = ''.join(c for c in tail if c.isdigit())
+            value = f"{head}.{digits[:6]}{tail[len(digits):]}"
+        parsed = datetime.fromisoformat(value)
+        # Les journaux Windows sont lus en heure locale naïve
+        return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+    return datetime.now()
@@ -0,0 +1,255 @@
+"""
+Transport HTTP des agents vers l'orchestrateur
+
+Un client httpx unique (pool de connexions persistantes) et une file
+sortante bornée, vidée par lots vers /api/v1/events/batch dès qu'elle
+atteint `batch_size` événements ou toutes les `flush_interval` secondes.
+Les échecs sont réessayés avec un backoff exponentiel et de la gigue.
+
+Un événement peut porter la position de son enregistrement source
+(RecordNumber) : `delivered_through` indique jusqu'où la source peut avancer
+son point de reprise, c'est-à-dire la position en deçà de laquelle tous les
+événements ont été acceptés (ou définitivement refusés) par l'orchestrateur.
+Un événement abandonné faute de place bloque cette position : il sera relu
+au prochain démarrage plutôt que perdu.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+
+class EventTransport:
+    """Envoi par lots, avec mémoire bornée et backoff, des événements d'un agent."""
+
+    def __init__(
+        self,
+        batch_url: str,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 50000,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 10.0,
+        max_connections: int = 4,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.batch_url = batch_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.headers = {"Content-Type": "application/x-ndjson", **(headers or {})}
+        self.logger = logging.getLogger(__name__)
+
+        # File sortante bornée : les plus anciens événements sont abandonnés
+        # quand l'orchestrateur ne suit plus
+        self._buffer: Deque[Tuple[Optional[int], Dict[str, Any]]] = deque(maxlen=max_queue_size)
+        # Positions source des événements en file ou en cours d'envoi
+        self._outstanding: Counter = Counter()
+        # Plus petite position d'un événement abandonné (jamais remis)
+        self._lowest_lost: Optional[int] = None
+        self._wakeup = asyncio.Event()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._backoff = 0.0
+
+        self.metrics = {
+            "events_sent": 0,
+            "events_rejected": 0,
+            "events_dropped": 0,
+            "batches_sent": 0,
+            "batches_failed": 0,
+            "retries": 0,
+        }
+
+    async def start(self) -> None:
+        """Ouvre le client HTTP persistant et démarre la tâche de vidage."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Vide la file restante puis ferme le client HTTP."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+
+        if self._client is not None:
+            await self.flush()
+            await self._client.aclose()
+            self._client = None
+
+    def send(self, event_data: Dict[str, Any], position: Optional[int] = None) -> None:
+        """
+        Place un événement dans la file sortante sans attendre le réseau.
+        `position` est la position de l'enregistrement source, croissante
+        d'un appel à l'autre (voir `delivered_through`).
+        """
+        if len(self._buffer) == self._buffer.maxlen:
+            self._lose([self._buffer.popleft()])
+        self._buffer.append((position, event_data))
+        if position is not None:
+            self._outstanding[position] += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        """Nombre d'événements en attente d'envoi."""
+        return len(self._buffer)
+
+    @property
+    def space(self) -> int:
+        """Nombre d'événements que la file peut encore recevoir sans en abandonner."""
+        return self._buffer.maxlen - len(self._buffer)
+
+    def delivered_through(self, position: int) -> int:
+        """
+        Plus grande position, au plus `position`, telle que tous les événements
+        envoyés avec une position inférieure ou égale ont été remis.
+        """
+        if self._outstanding:
+            position = min(position, min(self._outstanding) - 1)
+        if self._lowest_lost is not None:
+            position = min(position, self._lowest_lost - 1)
+        return position
+
+    async def flush(self) -> None:
+        """Envoie tous les événements en attente."""
+        while self._buffer:
+            if not await self._send_next_batch():
+                break
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            # L'orchestrateur est lent ou indisponible : on espace les envois
+            if self._backoff:
+                await asyncio.sleep(self._backoff)
+
+            while self._buffer:
+                if not await self._send_next_batch():
+                    break
+                if len(self._buffer) < self.batch_size:
+                    break
+
+    async def _send_next_batch(self) -> bool:
+        """Envoie un lot ; en cas d'échec définitif le lot est remis en tête de file."""
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        body = "\n".join(json.dumps(event, default=str) for _, event in batch).encode("utf-8")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._client.post(self.batch_url, content=body)
+
+                if response.status_code == 202:
+                    self._record_success(batch, response)
+                    return True
+
+                if response.status_code < 500 and response.status_code != 429:
+                    # Erreur client : réessayer ne changera rien
+                    self.metrics["events_rejected"] += len(batch)
+                    self.logger.error(
+                        f"❌ Lot de {len(batch)} événements refusé : {response.status_code} {response.text}"
+                    )
+                    self._settle(batch)
+                    return True
+
+                self.logger.warning(f"⚠️  Orchestrateur surchargé ({response.status_code}), nouvel essai...")
+            except httpx.ConnectError as e:
+                self.logger.error(f"❌ Impossible de se connecter à l'orchestrateur : {e}")
+            except httpx.TimeoutException as e:
+                self.logger.error(f"⏰ Timeout lors de l'envoi à l'orchestrateur : {e}")
+            except Exception as e:
+                self.logger.error(f"❌ Erreur inattendue lors de l'envoi : {e}")
+            except asyncio.CancelledError:
+                # Arrêt en cours : le lot n'est pas perdu
+                self._requeue(batch)
+                raise
+
+            if attempt < self.max_retries:
+                self.metrics["retries"] += 1
+                try:
+                    await asyncio.sleep(self._retry_delay(attempt))
+                except asyncio.CancelledError:
+                    self._requeue(batch)
+                    raise
+
+        self.metrics["batches_failed"] += 1
+        self._backoff = min(max(self._backoff * 2, self.backoff_base), self.backoff_max)
+        self._requeue(batch)
+        return False
+
+    def _record_success(self, batch: List[Tuple[Optional[int], Dict[str, Any]]], response: httpx.Response) -> None:
+        self._settle(batch)
+        self._backoff = 0.0
+        self.metrics["batches_sent"] += 1
+
+        rejected = 0
+        try:
+            rejected = int(response.json().get("rejected", 0))
+        except Exception:
+            pass
+        self.metrics["events_sent"] += len(batch) - rejected
+        self.metrics["events_rejected"] += rejected
+
+        if rejected:
+            self.logger.warning(f"⚠️  {rejected} événements sur {len(batch)} rejetés par l'orchestrateur")
+        else:
+            self.logger.info(f"✅ Lot de {len(batch)} événements envoyé avec succès à l'orchestrateur.")
+
+    def _requeue(self, batch: List[Tuple[Optional[int], Dict[str, Any]]]) -> None:
+        """Remet un lot en tête de file dans la limite de la capacité."""
+        space = self.space
+        if len(batch) > space:
+            self._lose(batch[:len(batch) - space])
+            batch = batch[len(batch) - space:]
+        self._buffer.extendleft(reversed(batch))
+
+    def _settle(self, batch: List[Tuple[Optional[int], Dict[str, Any]]]) -> None:
+        """Retire des positions en attente les événements d'un lot traité par l'orchestrateur."""
+        for position, _ in batch:
+            if position is not None:
+                self._outstanding[position] -= 1
+                if not self._outstanding[position]:
+                    del self._outstanding[position]
+
+    def _lose(self, events: List[Tuple[Optional[int], Dict[str, Any]]]) -> None:
+        """Abandonne des événements : le point de reprise ne les dépassera plus."""
+        self.metrics["events_dropped"] += len(events)
+        self._settle(events)
+        positions = [position for position, _ in events if position is not None]
+        if positions:
+            lowest = min(positions)
+            self._lowest_lost = lowest if self._lowest_lost is None else min(self._lowest_lost, lowest)
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Backoff exponentiel avec gigue complète."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
@@ -4,7 +4,8 @@ from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from src.core.config import OrionConfig
 from src.core.orchestrator import Orchestrator
-from src.core.events import SecurityEvent
+from src.core.codec import get_codec
+from src.core.ingestion import BatchFormatError, BatchTooLargeError, decode_event_batch
 import uvicorn
 
 app = FastAPI(title="Orion AD Guardian API", version="0.1.0")
@@ -12,6 +13,8 @@ app = FastAPI(title="Orion AD Guardian API", version="0.1.0")
 # Initialisation globale
 config = OrionConfig.load_from_file('config/local.yaml')
 orchestrator = Orchestrator(config)
+# Enregistrements au format to_dict, versionnés ou non, relus directement dans les slots
+event_codec = get_codec("json")
 
 # Démarrage de l'orchestrateur en tâche de fond
 @app.on_event("startup")
@@ -27,13 +30,45 @@ async def shutdown_event():
 async def ingest_event(request: Request):
     """Endpoint d'ingestion d'événements de sécurité."""
     try:
-        data = await request.json()
-        event = SecurityEvent.from_dict(data)
+        event = event_codec.decode(await request.body())
         await orchestrator.process_event(event)
         return {"status": "accepted", "event_id": event.event_id}
     except Exception as e:
         logging.exception("Erreur lors de l'ingestion de l'événement :")
         return JSONResponse(status_code=400, content={"error": str(e)})
 
+@app.post("/api/v1/events/batch", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_event_batch(request: Request):
+    """Endpoint d'ingestion d'un lot d'événements (NDJSON, msgpack ou tableau JSON)."""
+    try:
+        body = await request.body()
+        items = decode_event_batch(body, request.headers.get("content-type", ""))
+    except BatchTooLargeError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except BatchFormatError as e:
+        return JSONResponse(status_code=415, content={"error": str(e)})
+
+    results = []
+    accepted = 0
+    for index, (item, error) in enumerate(items):
+        if not error:
+            try:
+                event = event_codec.from_record(item)
+                await orchestrator.process_event(event)
+                results.append({"index": index, "status": "accepted", "event_id": event.event_id})
+                accepted += 1
+                continue
+            except Exception as e:
+                error = str(e)
+        results.append({"index": index, "status": "rejected", "error": error})
+
+    logging.info(f"Lot ingéré : {accepted} événements acceptés, {len(items) - accepted} rejetés")
+    return {
+        "status": "accepted",
+        "accepted": accepted,
+        "rejected": len(items) - accepted,
+        "results": results
+    }
+
 if __name__ == "__main__":
     uvicorn.run("src.api.server:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Historique des alertes de l'orchestrateur en tampon circulaire
+
+Capacité fixe, ajout en O(1) sans recopie et identifiants dérivés d'un
+numéro de séquence monotone : un client peut demander « les alertes
+depuis la séquence X » sans trier ni recopier tout l'historique.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class AlertHistory:
+    """Tampon circulaire d'alertes indexé par numéro de séquence."""
+
+    def __init__(self, capacity: int = 100):
+        if capacity <= 0:
+            raise ValueError("La capacité de l'historique doit être positive")
+        self.capacity = capacity
+        self._slots: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._next_seq = 1
+
+    def __len__(self) -> int:
+        return min(self._next_seq - 1, self.capacity)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Itère de la plus ancienne à la plus récente alerte conservée."""
+        for seq in range(self.first_seq, self._next_seq):
+            yield self._slots[seq % self.capacity]
+
+    @property
+    def first_seq(self) -> int:
+        """Séquence de la plus ancienne alerte encore conservée."""
+        return max(1, self._next_seq - self.capacity)
+
+    @property
+    def last_seq(self) -> int:
+        """Séquence de la dernière alerte ajoutée (0 si aucune)."""
+        return self._next_seq - 1
+
+    def append(self, alert: Dict[str, Any]) -> int:
+        """Ajoute une alerte, écrase la plus ancienne si plein, et retourne sa séquence."""
+        seq = self._next_seq
+        alert['seq'] = seq
+        alert['id'] = f"alert_{seq}"
+        self._slots[seq % self.capacity] = alert
+        self._next_seq += 1
+        return seq
+
+    def latest(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Retourne les `limit` alertes les plus récentes, la plus récente en premier."""
+        start = max(self.first_seq, self._next_seq - limit)
+        return [self._slots[seq % self.capacity] for seq in range(self._next_seq - 1, start - 1, -1)]
+
+    def since(self, seq: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Retourne les alertes de séquence strictement supérieure à `seq`, par
+        ordre chronologique. Les alertes déjà écrasées ne sont plus disponibles.
+        """
+        start = max(seq + 1, self.first_seq)
+        stop = self._next_seq if limit is None else min(self._next_seq, start + limit)
+        return [self._slots[s % self.capacity] for s in range(start, stop)]
@@ -0,0 +1,132 @@
+"""
+Agrégats statistiques maintenus incrémentalement pour l'API Orion
+
+Les compteurs sont mis à jour à l'ingestion et à l'expiration de chaque
+alerte ou événement, de sorte que /api/v1/statistics n'a plus à parcourir
+les alertes (ni à les joindre aux événements) à chaque requête.
+"""
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class TopKCounter:
+    """
+    Compteur avec mises à jour en O(1) amorti et lecture du top-K sans tri.
+
+    Les clés sont rangées dans des seaux par valeur de comptage ; la liste
+    triée des comptages distincts reste petite (au plus ~sqrt(2n) valeurs).
+    """
+
+    def __init__(self):
+        self._counts: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, Dict[Hashable, None]] = {}
+        self._levels: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __getitem__(self, key: Hashable) -> int:
+        return self._counts.get(key, 0)
+
+    def add(self, key: Hashable, delta: int = 1) -> None:
+        """Ajoute `delta` (positif ou négatif) au comptage d'une clé."""
+        current = self._counts.get(key, 0)
+        updated = current + delta
+        if current:
+            self._leave(current, key)
+        if updated > 0:
+            self._counts[key] = updated
+            self._enter(updated, key)
+        else:
+            self._counts.pop(key, None)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """Retourne les `n` clés les plus fréquentes, par comptage décroissant."""
+        result = []
+        for level in reversed(self._levels):
+            for key in self._buckets[level]:
+                if n is not None and len(result) >= n:
+                    return result
+                result.append((key, level))
+        return result
+
+    def as_dict(self) -> Dict[Hashable, int]:
+        return dict(self._counts)
+
+    def _enter(self, level: int, key: Hashable) -> None:
+        bucket = self._buckets.get(level)
+        if bucket is None:
+            bucket = self._buckets[level] = {}
+            insort(self._levels, level)
+        bucket[key] = None
+
+    def _leave(self, level: int, key: Hashable) -> None:
+        bucket = self._buckets[level]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[level]
+            del self._levels[bisect_left(self._levels, level)]
+
+
+class AlertStatistics:
+    """Statistiques des alertes et événements mises à jour à chaque ingestion."""
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.total_alerts = 0
+        self.total_events = 0
+        self.alerts_by_severity = TopKCounter()
+        self.alerts_by_type = TopKCounter()
+        self.events_by_type = TopKCounter()
+        self.users = TopKCounter()
+        self.ips = TopKCounter()
+
+        # Type d'événement associé à chaque alerte, pour la décrémentation
+        self._alert_types: Dict[str, str] = {}
+
+    def record_event(self, event: Dict[str, Any]) -> None:
+        """Prend en compte un événement ingéré."""
+        self.total_events += 1
+        self.events_by_type.add(event["event_type"])
+
+    def forget_event(self, event: Dict[str, Any]) -> None:
+        """Retire un événement expiré des agrégats."""
+        self.total_events -= 1
+        self.events_by_type.add(event["event_type"], -1)
+
+    def record_alert(self, alert: Dict[str, Any], event_type: Optional[str]) -> None:
+        """Prend en compte une alerte générée à partir d'un événement de type `event_type`."""
+        self.total_alerts += 1
+        self.alerts_by_severity.add(alert["severity"])
+        self.users.add(alert["user"])
+        self.ips.add(alert["source_ip"])
+        if event_type is not None:
+            self._alert_types[alert["alert_id"]] = event_type
+            self.alerts_by_type.add(event_type)
+
+    def forget_alert(self, alert: Dict[str, Any]) -> None:
+        """Retire une alerte expirée des agrégats."""
+        self.total_alerts -= 1
+        self.alerts_by_severity.add(alert["severity"], -1)
+        self.users.add(alert["user"], -1)
+        self.ips.add(alert["source_ip"], -1)
+        event_type = self._alert_types.pop(alert["alert_id"], None)
+        if event_type is not None:
+            self.alerts_by_type.add(event_type, -1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Instantané des agrégats, indépendant du nombre d'alertes stockées."""
+        return {
+            "total_alerts": self.total_alerts,
+            "alerts_by_severity": self.alerts_by_severity.as_dict(),
+            "alerts_by_type": self.alerts_by_type.as_dict(),
+            "top_users": [
+                {"user": user, "count": count}
+                for user, count in self.users.most_common(self.top_n)
+            ],
+            "top_ips": [
+                {"ip": ip, "count": count}
+                for ip, count in self.ips.most_common(self.top_n)
+            ],
+        }
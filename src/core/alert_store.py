@@ -0,0 +1,307 @@
+"""
+Stockage indexé des alertes et événements pour l'API Orion
+
+Remplace les listes Python parcourues linéairement par un index de hachage
+sur l'identifiant, des index secondaires par champ et une structure triée
+par horodatage pour les requêtes « N plus récents ».
+
+Les éléments sont répartis en partitions temporelles (une par heure ou par
+jour) portant chacune ses propres index : la rétention détache une partition
+échue d'un bloc, sans reconstruire ni décaler les structures des partitions
+conservées.
+"""
+
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Clé de tri : (timestamp, numéro d'insertion) pour départager les égalités
+_SortKey = Tuple[float, int]
+_Entry = Tuple[float, int, str]
+
+
+class _Partition:
+    """Éléments d'une tranche de temps, indexés par identifiant, par champ et par temps."""
+
+    def __init__(self, indexed_fields: Tuple[str, ...]):
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, _SortKey] = {}
+        self._timeline: List[_Entry] = []
+        self._indexes: Dict[str, Dict[Any, List[_Entry]]] = {field_name: {} for field_name in indexed_fields}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, item_id: str, item: Dict[str, Any], key: _SortKey) -> None:
+        entry = key + (item_id,)
+        self.items[item_id] = item
+        self._keys[item_id] = key
+        _insert(self._timeline, entry)
+        for field_name, index in self._indexes.items():
+            _insert(index.setdefault(item.get(field_name), []), entry)
+
+    def update(self, item_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Met à jour un élément en maintenant les index secondaires."""
+        item = self.items[item_id]
+        entry = self._keys[item_id] + (item_id,)
+        for field_name, value in changes.items():
+            index = self._indexes.get(field_name)
+            if index is not None and item.get(field_name) != value:
+                _discard(index, item.get(field_name), entry)
+                _insert(index.setdefault(value, []), entry)
+            item[field_name] = value
+        return item
+
+    def remove(self, item_id: str) -> Dict[str, Any]:
+        """Supprime un élément et ses entrées d'index."""
+        item = self.items.pop(item_id)
+        entry = self._keys.pop(item_id) + (item_id,)
+        del self._timeline[bisect_left(self._timeline, entry)]
+        for field_name, index in self._indexes.items():
+            _discard(index, item.get(field_name), entry)
+        return item
+
+    def remove_oldest(self, number: int) -> List[Dict[str, Any]]:
+        """Supprime les `number` éléments les plus anciens de la partition."""
+        expired = self._timeline[:number]
+        del self._timeline[:number]
+
+        removed = []
+        expired_counts: Dict[Tuple[str, Any], int] = {}
+        for _, _, item_id in expired:
+            self._keys.pop(item_id, None)
+            item = self.items.pop(item_id)
+            removed.append(item)
+            for field_name in self._indexes:
+                key = (field_name, item.get(field_name))
+                expired_counts[key] = expired_counts.get(key, 0) + 1
+
+        # Les listes d'index sont triées par temps : les éléments supprimés en
+        # forment le préfixe, il suffit de le tronquer
+        for (field_name, value), expired_count in expired_counts.items():
+            index = self._indexes[field_name]
+            entries = index[value]
+            del entries[:expired_count]
+            if not entries:
+                del index[value]
+
+        return removed
+
+    def count(self, field_name: str, value: Any) -> int:
+        return len(self._indexes[field_name].get(value, ()))
+
+    def since(self, cutoff: float) -> Iterator[Dict[str, Any]]:
+        position = bisect_left(self._timeline, (cutoff, float("inf")))
+        for _, _, item_id in self._timeline[position:]:
+            yield self.items[item_id]
+
+    def scan(self, filters: Dict[str, Any], newest_first: bool) -> Iterator[Dict[str, Any]]:
+        """Parcourt les éléments correspondant aux filtres (valeurs None déjà écartées)."""
+        candidates = self._timeline
+        remaining = dict(filters)
+        indexed = [name for name in filters if name in self._indexes]
+        if indexed:
+            best = min(indexed, key=lambda name: len(self._indexes[name].get(filters[name], ())))
+            candidates = self._indexes[best].get(filters[best], [])
+            del remaining[best]
+
+        entries = reversed(candidates) if newest_first else iter(candidates)
+        for _, _, item_id in entries:
+            item = self.items[item_id]
+            if all(item.get(name) == value for name, value in remaining.items()):
+                yield item
+
+
+class TimeIndexedStore:
+    """Stockage en mémoire indexé par identifiant, par champ et par temps, partitionné par tranche de temps."""
+
+    id_field: str = "id"
+    indexed_fields: Tuple[str, ...] = ()
+    time_field: str = "timestamp"
+
+    def __init__(self, partition_seconds: float = 86400):
+        if partition_seconds <= 0:
+            raise ValueError("La durée d'une partition doit être positive")
+        self.partition_seconds = partition_seconds
+        self._partitions: Dict[int, _Partition] = {}
+        self._order: List[int] = []  # Clés des partitions, de la plus ancienne à la plus récente
+        self._locations: Dict[str, int] = {}  # Identifiant → clé de sa partition
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._locations
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Itère sur les éléments par ordre chronologique."""
+        for key in list(self._order):
+            yield from self._partitions[key].since(float("-inf"))
+
+    @property
+    def partition_count(self) -> int:
+        return len(self._order)
+
+    def _partition_key(self, timestamp: float) -> int:
+        return int(timestamp // self.partition_seconds)
+
+    def add(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Ajoute un élément.
+
+        Un élément portant le même identifiant est remplacé ; il est alors
+        retourné pour que l'appelant puisse mettre à jour ses agrégats.
+        """
+        item_id = item[self.id_field]
+        replaced = self.remove(item_id) if item_id in self._locations else None
+
+        timestamp = float(item[self.time_field])
+        key = self._partition_key(timestamp)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition(self.indexed_fields)
+            # Cas courant : les partitions sont créées dans l'ordre chronologique
+            if not self._order or self._order[-1] < key:
+                self._order.append(key)
+            else:
+                insort(self._order, key)
+
+        partition.add(item_id, item, (timestamp, next(self._seq)))
+        self._locations[item_id] = key
+        return replaced
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Retourne un élément par son identifiant en O(1)."""
+        key = self._locations.get(item_id)
+        return self._partitions[key].items[item_id] if key is not None else None
+
+    def update(self, item_id: str, **changes: Any) -> Optional[Dict[str, Any]]:
+        """Met à jour un élément en maintenant les index secondaires."""
+        key = self._locations.get(item_id)
+        if key is None:
+            return None
+        return self._partitions[key].update(item_id, changes)
+
+    def remove(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Supprime un élément et ses entrées d'index."""
+        key = self._locations.pop(item_id, None)
+        if key is None:
+            return None
+        partition = self._partitions[key]
+        item = partition.remove(item_id)
+        if not partition:
+            self._detach(key)
+        return item
+
+    def latest(self, limit: int = 50, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Retourne les `limit` éléments les plus récents correspondant aux filtres.
+
+        Le parcours part de la partition la plus récente et, dans chacune, de
+        la liste d'index la plus sélective : O(log n + N) pour un filtre simple.
+        """
+        if limit <= 0:
+            return []
+
+        results = []
+        for item in self._scan(filters, newest_first=True):
+            results.append(item)
+            if len(results) >= limit:
+                break
+        return results
+
+    def query(self, **filters: Any) -> List[Dict[str, Any]]:
+        """Retourne tous les éléments correspondant aux filtres, par ordre chronologique."""
+        return list(self._scan(filters, newest_first=False))
+
+    def since(self, cutoff: float) -> List[Dict[str, Any]]:
+        """Retourne les éléments postérieurs à `cutoff`, par ordre chronologique."""
+        first = bisect_left(self._order, self._partition_key(cutoff))
+        results = []
+        for key in self._order[first:]:
+            results.extend(self._partitions[key].since(cutoff))
+        return results
+
+    def count(self, field_name: str, value: Any) -> int:
+        """Nombre d'éléments ayant une valeur donnée sur un champ indexé."""
+        return sum(partition.count(field_name, value) for partition in self._partitions.values())
+
+    def drop_partitions_before(self, cutoff: float) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Détache une à une les partitions entièrement antérieures ou égales à
+        `cutoff` et produit, pour chacune, ses éléments (pour la mise à jour
+        des agrégats de l'appelant). Seul l'index des identifiants est mis à
+        jour élément par élément. La partition contenant `cutoff` est
+        conservée jusqu'à son échéance complète.
+        """
+        while self._order and (self._order[0] + 1) * self.partition_seconds <= cutoff:
+            yield self._release(self._order[0])
+
+    def trim_to(self, max_items: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Supprime les éléments les plus anciens au-delà de `max_items` : par
+        partitions entières tant que possible, puis en tête de la plus ancienne.
+        """
+        while len(self) > max_items and self._order:
+            oldest_key = self._order[0]
+            oldest = self._partitions[oldest_key]
+            excess = len(self) - max_items
+            if len(oldest) <= excess:
+                yield self._release(oldest_key)
+            else:
+                removed = oldest.remove_oldest(excess)
+                for item in removed:
+                    del self._locations[item[self.id_field]]
+                yield removed
+
+    def _release(self, key: int) -> List[Dict[str, Any]]:
+        partition = self._detach(key)
+        for item_id in partition.items:
+            del self._locations[item_id]
+        return list(partition.items.values())
+
+    def _detach(self, key: int) -> _Partition:
+        del self._order[bisect_left(self._order, key)]
+        return self._partitions.pop(key)
+
+    def _scan(self, filters: Dict[str, Any], newest_first: bool) -> Iterator[Dict[str, Any]]:
+        """Parcourt les éléments correspondant aux filtres (valeurs None ignorées)."""
+        filters = {name: value for name, value in filters.items() if value is not None}
+        keys = reversed(self._order) if newest_first else iter(self._order)
+        for key in list(keys):
+            yield from self._partitions[key].scan(filters, newest_first)
+
+
+def _insert(entries: List[_Entry], entry: _Entry) -> None:
+    # Cas courant : les éléments arrivent dans l'ordre chronologique
+    if not entries or entries[-1] <= entry:
+        entries.append(entry)
+    else:
+        insort(entries, entry)
+
+
+def _discard(index: Dict[Any, List[_Entry]], value: Any, entry: _Entry) -> None:
+    entries = index.get(value)
+    if not entries:
+        return
+    position = bisect_left(entries, entry)
+    if position < len(entries) and entries[position] == entry:
+        del entries[position]
+    if not entries:
+        del index[value]
+
+
+class AlertStore(TimeIndexedStore):
+    """Stockage des alertes indexé par alert_id, sévérité, statut, utilisateur et IP."""
+
+    id_field = "alert_id"
+    indexed_fields = ("severity", "status", "user", "source_ip")
+
+
+class EventStore(TimeIndexedStore):
+    """Stockage des événements AD indexé par event_id et type d'événement."""
+
+    id_field = "event_id"
+    indexed_fields = ("event_type",)
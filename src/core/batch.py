@@ -0,0 +1,278 @@
+"""
+Lot d'événements en colonnes
+
+Un EventBatch range N événements en colonnes NumPy typées, à la manière des
+tableaux Arrow : horodatages en int64, codes de type, de sévérité et de
+niveau de risque en int8, adresses IPv4 en entiers, et colonnes
+encodées par dictionnaire pour les chaînes répétitives (utilisateurs,
+domaines, machines, sources). Les étapes de scoring, de statistiques ou
+d'export travaillent sur les colonnes sans parcourir d'objets Python ; les
+prédicats coûteux ne sont évalués qu'une fois par valeur distincte.
+
+Les contextes et conteneurs (données brutes, tags...) sont conservés par
+référence dans des colonnes objet : `to_events` reconstruit des événements
+identiques à ceux d'origine, qui partagent ces objets sans copie.
+"""
+
+import socket
+from dataclasses import dataclass
+from operator import attrgetter
+from datetime import datetime, timedelta, tzinfo as TzInfo
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .events import EventType, RiskLevel, SecurityEvent, Severity
+
+
+# Codes des colonnes d'énumérations (rang dans l'énumération, propres au processus)
+EVENT_TYPES = tuple(EventType)
+EVENT_TYPE_CODES: Dict[EventType, int] = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+SEVERITIES = tuple(Severity)
+SEVERITY_CODES: Dict[Severity, int] = {severity: code for code, severity in enumerate(SEVERITIES)}
+_RISK_LEVELS = {risk_level.value: risk_level for risk_level in RiskLevel}
+# Mêmes codes indexés par valeur : évite le hachage (en Python) des membres d'énumération
+_EVENT_TYPE_CODES_BY_VALUE = {event_type.value: code for event_type, code in EVENT_TYPE_CODES.items()}
+_SEVERITY_CODES_BY_VALUE = {severity.value: code for severity, code in SEVERITY_CODES.items()}
+
+# Adresse absente ou non IPv4 dans les colonnes d'adresses
+NO_IP = -1
+
+_NS_PER_SECOND = 1_000_000_000
+_SECONDS_PER_HOUR = 3600
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_ONE_SECOND = timedelta(seconds=1)
+
+# Champs conservés par référence pour la reconstruction des événements
+OBJECT_COLUMNS = (
+    'event_id', 'user_context', 'device_context', 'network_context', 'raw_data', 'enriched_data',
+    'correlation_id', 'parent_event_id', 'tags', 'labels', 'processed_by', 'processing_time',
+)
+# Slot de SecurityEvent de chaque colonne objet (conteneurs lus sans allocation)
+_OBJECT_SLOTS = {
+    **{name: name for name in OBJECT_COLUMNS},
+    'event_id': '_event_id', 'raw_data': '_raw_data', 'enriched_data': '_enriched_data',
+    'tags': '_tags', 'labels': '_labels', 'processed_by': '_processed_by',
+}
+
+Indexer = Union[np.ndarray, Sequence[int], slice]
+
+
+def ipv4_to_int(address: Optional[str]) -> int:
+    """Adresse IPv4 sous forme d'entier, NO_IP si absente ou non IPv4."""
+    if not address:
+        return NO_IP
+    try:
+        # Forme décimale pointée stricte, comme ipaddress.IPv4Address, en une fraction du temps
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, address), 'big')
+    except (OSError, TypeError, ValueError):
+        return NO_IP
+
+
+def int_to_ipv4(value: int) -> Optional[str]:
+    return None if value == NO_IP else socket.inet_ntoa(int(value).to_bytes(4, 'big'))
+
+
+@dataclass
+class DictionaryColumn:
+    """Colonne encodée par dictionnaire : `codes` (int32) indexe `values`, -1 pour une valeur absente."""
+    codes: np.ndarray
+    values: List[Any]
+
+    @classmethod
+    def encode(cls, items: Iterable[Optional[Hashable]]) -> "DictionaryColumn":
+        items = items if isinstance(items, list) else list(items)
+        # Valeurs distinctes dans l'ordre de première apparition, puis un code par ligne
+        positions: Dict[Hashable, int] = dict.fromkeys(items)
+        positions.pop(None, None)
+        values = list(positions)
+        positions.update(zip(values, range(len(values))))
+        positions[None] = -1
+        codes = np.fromiter(map(positions.__getitem__, items), dtype=np.int32, count=len(items))
+        return cls(codes, values)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def decode(self) -> List[Any]:
+        """Valeur de chaque ligne (None si absente)."""
+        values = self.values
+        return [values[code] if code >= 0 else None for code in self.codes.tolist()]
+
+    def map(self, function: Callable[[Any], Any], missing: Any = None, dtype: Any = object) -> np.ndarray:
+        """Applique `function` une fois par valeur distincte et diffuse le résultat à chaque ligne."""
+        mapped = np.empty(len(self.values) + 1, dtype=dtype)
+        mapped[:-1] = [function(value) for value in self.values]
+        mapped[-1] = missing
+        # Le code -1 désigne la dernière case : la valeur des lignes absentes
+        return mapped[self.codes]
+
+    def counts(self) -> Dict[Any, int]:
+        """Nombre de lignes par valeur présente."""
+        counted = np.bincount(self.codes[self.codes >= 0], minlength=len(self.values))
+        return {value: int(count) for value, count in zip(self.values, counted.tolist()) if count}
+
+    def take(self, indexer: Indexer) -> "DictionaryColumn":
+        """Lignes sélectionnées ; le dictionnaire est partagé, non compacté."""
+        return DictionaryColumn(self.codes[indexer], self.values)
+
+
+class EventBatch:
+    """N événements en colonnes typées."""
+
+    def __init__(self, timestamp_ns: np.ndarray, tzinfo: DictionaryColumn, event_type: np.ndarray,
+                 severity: np.ndarray, risk_level: np.ndarray, confidence: np.ndarray,
+                 source: DictionaryColumn, username: DictionaryColumn, domain: DictionaryColumn,
+                 hostname: DictionaryColumn, ip_address: np.ndarray, source_ip: np.ndarray,
+                 destination_ip: np.ndarray, objects: Dict[str, np.ndarray]):
+        self.timestamp_ns = timestamp_ns  # int64, nanosecondes depuis l'epoch (heure murale si naïf)
+        self.tzinfo = tzinfo  # Fuseau de l'horodatage, absent pour un horodatage naïf
+        self.event_type = event_type  # int8, EVENT_TYPE_CODES
+        self.severity = severity  # int8, SEVERITY_CODES
+        self.risk_level = risk_level  # int8, valeur de RiskLevel (1 à 5)
+        self.confidence = confidence  # float64
+        self.source = source
+        # Contexte utilisateur
+        self.username = username
+        self.domain = domain
+        # Contexte appareil
+        self.hostname = hostname
+        self.ip_address = ip_address  # int64, IPv4 ou NO_IP
+        # Contexte réseau
+        self.source_ip = source_ip
+        self.destination_ip = destination_ip
+        self.objects = objects
+
+    def __len__(self) -> int:
+        return len(self.timestamp_ns)
+
+    @classmethod
+    def from_events(cls, events: Sequence[SecurityEvent]) -> "EventBatch":
+        """Lot des événements, dans l'ordre ; les adresses ne sont converties qu'une fois par valeur."""
+        count = len(events)
+
+        def column(path: str, dtype: Any) -> np.ndarray:
+            return np.fromiter(map(attrgetter(path), events), dtype=dtype, count=count)
+
+        objects = {name: column(_OBJECT_SLOTS[name], object) for name in OBJECT_COLUMNS}
+        users = objects['user_context'].tolist()
+        devices = objects['device_context'].tolist()
+        networks = objects['network_context'].tolist()
+
+        return cls(
+            timestamp_ns=column('_timestamp_ns', np.int64),
+            tzinfo=DictionaryColumn.encode(map(attrgetter('_tzinfo'), events)),
+            event_type=np.fromiter(
+                map(_EVENT_TYPE_CODES_BY_VALUE.__getitem__, map(attrgetter('event_type._value_'), events)),
+                dtype=np.int8, count=count
+            ),
+            severity=np.fromiter(
+                map(_SEVERITY_CODES_BY_VALUE.__getitem__, map(attrgetter('severity._value_'), events)),
+                dtype=np.int8, count=count
+            ),
+            risk_level=column('risk_level._value_', np.int8),
+            confidence=column('confidence', np.float64),
+            source=DictionaryColumn.encode(map(attrgetter('source'), events)),
+            username=DictionaryColumn.encode([user.username if user else None for user in users]),
+            domain=DictionaryColumn.encode([user.domain if user else None for user in users]),
+            hostname=DictionaryColumn.encode([device.hostname if device else None for device in devices]),
+            ip_address=_ip_column([device.ip_address if device else None for device in devices]),
+            source_ip=_ip_column([network.source_ip if network else None for network in networks]),
+            destination_ip=_ip_column([network.destination_ip if network else None for network in networks]),
+            objects=objects,
+        )
+
+    def to_events(self) -> List[SecurityEvent]:
+        """Événements du lot ; contextes et conteneurs sont partagés avec le lot."""
+        objects = self.objects
+        return [
+            SecurityEvent._restore(
+                event_id, timestamp_ns, tzinfo, EVENT_TYPES[event_type], SEVERITIES[severity],
+                _RISK_LEVELS[risk_level], confidence, user_context, device_context, network_context,
+                raw_data, enriched_data, source, correlation_id, parent_event_id, tags, labels,
+                processed_by, processing_time,
+            )
+            for (event_id, timestamp_ns, tzinfo, event_type, severity, risk_level, confidence, source,
+                 user_context, device_context, network_context, raw_data, enriched_data, correlation_id,
+                 parent_event_id, tags, labels, processed_by, processing_time) in zip(
+                objects['event_id'], self.timestamp_ns.tolist(), self.tzinfo.decode(),
+                self.event_type.tolist(), self.severity.tolist(), self.risk_level.tolist(),
+                self.confidence.tolist(), self.source.decode(),
+                objects['user_context'], objects['device_context'], objects['network_context'],
+                objects['raw_data'], objects['enriched_data'], objects['correlation_id'],
+                objects['parent_event_id'], objects['tags'], objects['labels'], objects['processed_by'],
+                objects['processing_time'],
+            )
+        ]
+
+    def take(self, indexer: Indexer) -> "EventBatch":
+        """Sous-lot des lignes sélectionnées (indices, masque booléen ou tranche)."""
+        return EventBatch(
+            timestamp_ns=self.timestamp_ns[indexer],
+            tzinfo=self.tzinfo.take(indexer),
+            event_type=self.event_type[indexer],
+            severity=self.severity[indexer],
+            risk_level=self.risk_level[indexer],
+            confidence=self.confidence[indexer],
+            source=self.source.take(indexer),
+            username=self.username.take(indexer),
+            domain=self.domain.take(indexer),
+            hostname=self.hostname.take(indexer),
+            ip_address=self.ip_address[indexer],
+            source_ip=self.source_ip[indexer],
+            destination_ip=self.destination_ip[indexer],
+            objects={name: column[indexer] for name, column in self.objects.items()},
+        )
+
+    def is_type(self, *event_types: EventType) -> np.ndarray:
+        """Masque des événements de l'un des types donnés."""
+        return np.isin(self.event_type, [EVENT_TYPE_CODES[event_type] for event_type in event_types])
+
+    def local_seconds(self) -> np.ndarray:
+        """
+        Secondes écoulées depuis l'epoch en heure locale (int64) : l'heure, la
+        minute et le jour de chaque ligne sont ceux de `SecurityEvent.timestamp`.
+
+        Le décalage UTC n'est calculé qu'une fois par fuseau et par heure UTC
+        distincts ; une heure contenant un changement de décalage est traitée
+        ligne par ligne.
+        """
+        seconds = self.timestamp_ns // _NS_PER_SECOND
+        # Clé (heure UTC, fuseau) ; le code -1 (horodatage naïf, déjà en heure murale) devient 0
+        zones = [None] + list(self.tzinfo.values)
+        zone_codes = self.tzinfo.codes.astype(np.int64) + 1
+        keys, inverse = np.unique(seconds // _SECONDS_PER_HOUR * len(zones) + zone_codes, return_inverse=True)
+
+        offsets = np.empty(len(keys), dtype=np.int64)
+        varying = np.zeros(len(keys), dtype=bool)
+        for index, key in enumerate(keys.tolist()):
+            hour_index, zone_code = divmod(key, len(zones))
+            start = hour_index * _SECONDS_PER_HOUR
+            offsets[index] = _utc_offset(start, zones[zone_code])
+            varying[index] = _utc_offset(start + _SECONDS_PER_HOUR - 1, zones[zone_code]) != offsets[index]
+
+        local = seconds + offsets[inverse]
+        for row in np.flatnonzero(varying[inverse]).tolist():
+            local[row] += _utc_offset(int(seconds[row]), zones[zone_codes[row]]) - offsets[inverse[row]]
+        return local
+
+    def local_hours(self) -> np.ndarray:
+        """Heure locale (0-23) de chaque ligne, celle de `SecurityEvent.timestamp.hour`."""
+        return (self.local_seconds() // _SECONDS_PER_HOUR % 24).astype(np.int8)
+
+    def between(self, start_ns: int, end_ns: int) -> np.ndarray:
+        """Masque des événements horodatés dans [start_ns, end_ns[."""
+        return (self.timestamp_ns >= start_ns) & (self.timestamp_ns < end_ns)
+
+
+def _utc_offset(seconds: int, zone: Optional[TzInfo]) -> int:
+    """Décalage en secondes de l'heure locale à l'instant `seconds` ; nul pour un horodatage naïf."""
+    if zone is None:
+        return 0
+    local = datetime.fromtimestamp(seconds, zone).replace(tzinfo=None)
+    return (local - _NAIVE_EPOCH) // _ONE_SECOND - seconds
+
+
+def _ip_column(addresses: List[Optional[str]]) -> np.ndarray:
+    # Chaque adresse distincte n'est analysée qu'une fois
+    return DictionaryColumn.encode(addresses).map(ipv4_to_int, missing=NO_IP, dtype=np.int64)
@@ -0,0 +1,427 @@
+"""
+Codecs de sérialisation des événements de sécurité
+
+Chaque étape du pipeline (agent → API → file → stockage) sérialise les
+événements ; `to_dict`/`from_dict` restent le format d'échange de référence,
+mais passent par des dictionnaires intermédiaires et reparsent énumérations et
+dates ISO. Les codecs encodent directement depuis les slots de SecurityEvent et
+décodent directement dans ceux-ci :
+
+- json : le format de `to_dict` complété de `schema_version`, `timestamp_ns` et
+  `utc_offset` (relu sans parser la date ISO) ; orjson s'il est installé, sinon
+  le module json. Les enregistrements `to_dict` sans version sont acceptés.
+- msgpack : enregistrement binaire positionnel compact (identifiant sur 16
+  octets, codes numériques pour les énumérations), décodé depuis un tampon
+  sans copie préalable.
+
+Compatibilité ascendante : chaque enregistrement porte sa version de schéma.
+Depuis la version 2, `timestamp_ns` d'un horodatage naïf est en heure murale
+(voir SecurityEvent) ; celui d'un enregistrement v1 est converti à la lecture.
+Les versions ultérieures n'ajoutent des champs qu'en fin d'enregistrement
+(et de contexte) ; un lecteur ignore ceux qu'il ne connaît pas. Les tables de
+codes sont figées : une nouvelle valeur d'énumération est ajoutée en fin de
+table, et une valeur absente des tables est encodée par sa valeur textuelle.
+"""
+
+import json
+from abc import ABC, abstractmethod
+from operator import attrgetter
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .events import (
+    AUTO_TAGS, DeviceContext, EventType, NetworkContext, RiskLevel, SecurityEvent, Severity, UserContext,
+    _new_event_id, _timestamp_ns
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    msgpack = None
+
+
+SCHEMA_VERSION = 2
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Tables de codes du schéma binaire v1 : l'ordre est figé, ajout en fin uniquement
+WIRE_EVENT_TYPES: Tuple[str, ...] = (
+    "ad_logon", "ad_logoff", "ad_account_created", "ad_account_modified", "ad_account_deleted",
+    "ad_group_modified", "ad_privilege_escalation", "ad_password_change", "ad_gpo_modified",
+    "network_connection", "network_dns_query", "network_suspicious_traffic",
+    "kerberos_tgt_request", "kerberos_tgs_request", "kerberos_auth_failure",
+    "decoy_interaction", "honeypot_access",
+    "process_creation", "file_access", "registry_modification",
+)
+WIRE_SEVERITIES: Tuple[str, ...] = ("info", "warning", "error", "critical")
+
+_EVENT_TYPE_TO_CODE = {EventType(value): code for code, value in enumerate(WIRE_EVENT_TYPES)}
+_CODE_TO_EVENT_TYPE = tuple(EventType(value) for value in WIRE_EVENT_TYPES)
+_SEVERITY_TO_CODE = {Severity(value): code for code, value in enumerate(WIRE_SEVERITIES)}
+_CODE_TO_SEVERITY = tuple(Severity(value) for value in WIRE_SEVERITIES)
+
+# Champs des contextes dans l'ordre de l'enregistrement binaire, et champs datetime
+_CONTEXT_TYPES = (UserContext, DeviceContext, NetworkContext)
+_CONTEXT_FIELDS = {context: tuple(f.name for f in fields(context)) for context in _CONTEXT_TYPES}
+_CONTEXT_GETTERS = {context: attrgetter(*names) for context, names in _CONTEXT_FIELDS.items()}
+_CONTEXT_DATETIME_FIELDS = {
+    context: tuple(index for index, f in enumerate(fields(context)) if 'datetime' in str(f.type))
+    for context in _CONTEXT_TYPES
+}
+
+_EVENT_TYPES = {event_type.value: event_type for event_type in EventType}
+_SEVERITIES = {severity.value: severity for severity in Severity}
+_RISK_LEVELS = {risk_level.value: risk_level for risk_level in RiskLevel}
+
+_TIMEZONES: Dict[int, timezone] = {0: timezone.utc}
+
+
+class CodecError(ValueError):
+    """Enregistrement illisible ou d'une version non supportée."""
+
+
+def _utc_offset(event: SecurityEvent) -> Optional[int]:
+    """Décalage UTC de l'horodatage en secondes, None pour un horodatage naïf."""
+    tz = event._tzinfo
+    if tz is None:
+        return None
+    offset = tz.utcoffset(None)
+    if offset is None:  # Fuseau à règles (heure d'été...) : décalage à l'instant de l'événement
+        offset = event.timestamp.utcoffset()
+    return int(offset.total_seconds())
+
+
+def _timezone(offset: Optional[int]) -> Optional[timezone]:
+    if offset is None:
+        return None
+    tz = _TIMEZONES.get(offset)
+    if tz is None:
+        tz = _TIMEZONES[offset] = timezone(timedelta(seconds=offset))
+    return tz
+
+
+def _encode_context(context: Any, as_dict: bool) -> Any:
+    if context is None:
+        return None
+    context_type = type(context)
+    values = _CONTEXT_GETTERS[context_type](context)
+    datetime_fields = [index for index in _CONTEXT_DATETIME_FIELDS[context_type] if values[index] is not None]
+    if datetime_fields:
+        values = list(values)
+        for index in datetime_fields:
+            values[index] = values[index].isoformat()
+    if as_dict:
+        return dict(zip(_CONTEXT_FIELDS[context_type], values))
+    return list(values)
+
+
+def _decode_context(context_type: type, data: Any) -> Any:
+    if not data:
+        return None
+    names = _CONTEXT_FIELDS[context_type]
+    if isinstance(data, dict):
+        try:
+            context = context_type(**data)
+        except TypeError:  # Champs d'une version ultérieure
+            context = context_type(**{name: value for name, value in data.items() if name in names})
+    elif isinstance(data, list):
+        context = context_type(*data[:len(names)])
+    else:
+        raise CodecError(f"Contexte {context_type.__name__} invalide : {data!r}")
+
+    for index in _CONTEXT_DATETIME_FIELDS[context_type]:
+        value = getattr(context, names[index])
+        if type(value) is str:
+            setattr(context, names[index], datetime.fromisoformat(value))
+    return context
+
+
+def _naive_v1_timestamp(timestamp_ns: int) -> int:
+    """Horodatage naïf d'un enregistrement v1 (epoch, heure du système) converti en heure murale."""
+    local = datetime.fromtimestamp(timestamp_ns // 1_000_000_000)
+    return _timestamp_ns(local) + timestamp_ns % 1_000_000_000 // 1000 * 1000
+
+
+def _enum(members: Dict[Any, Any], enum_type: type, value: Any) -> Any:
+    member = members.get(value)
+    return member if member is not None else enum_type(value)
+
+
+class EventCodec(ABC):
+    """Interface des codecs d'événements."""
+
+    name = "base"
+    content_type = "application/octet-stream"
+    batch_content_type = "application/octet-stream"
+
+    @abstractmethod
+    def encode(self, event: SecurityEvent) -> bytes:
+        """Encode un événement."""
+
+    def from_record(self, record: Any) -> SecurityEvent:
+        """Événement depuis un enregistrement désérialisé ; lève CodecError s'il est invalide."""
+        try:
+            return self._from_record(record)
+        except CodecError:
+            raise
+        except (KeyError, IndexError, TypeError, ValueError, OverflowError) as e:
+            # Champ manquant, valeur d'énumération inconnue, contexte ou date mal formés
+            raise CodecError(f"Enregistrement invalide : {type(e).__name__}: {e}") from e
+
+    @abstractmethod
+    def _from_record(self, record: Any) -> SecurityEvent:
+        """Construit l'événement ; les erreurs de données sont converties par `from_record`."""
+
+    @abstractmethod
+    def decode(self, data: Buffer) -> SecurityEvent:
+        """Décode un événement ; lève CodecError si l'enregistrement est invalide."""
+
+    @abstractmethod
+    def encode_batch(self, events: Iterable[SecurityEvent]) -> bytes:
+        """Encode un lot d'événements."""
+
+    @abstractmethod
+    def decode_batch(self, data: Buffer) -> List[SecurityEvent]:
+        """Décode un lot d'événements, dans l'ordre."""
+
+
+class JSONCodec(EventCodec):
+    """Format de `to_dict` versionné ; les lots sont en NDJSON."""
+
+    name = "json"
+    content_type = "application/json"
+    batch_content_type = "application/x-ndjson"
+
+    def __init__(self):
+        if orjson is not None:
+            self._dumps: Callable[[Any], bytes] = lambda record: orjson.dumps(
+                record, default=str, option=orjson.OPT_NON_STR_KEYS
+            )
+            self._loads: Callable[[Buffer], Any] = orjson.loads
+        else:
+            encoder = json.JSONEncoder(default=str, ensure_ascii=False, separators=(',', ':'))
+            self._dumps = lambda record: encoder.encode(record).encode('utf-8')
+            self._loads = lambda data: json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+    def to_record(self, event: SecurityEvent) -> Dict[str, Any]:
+        """Dictionnaire au format de `to_dict`, complété des champs du schéma."""
+        return {
+            'event_id': event.event_id,
+            'timestamp': event.timestamp.isoformat(),
+            'event_type': event.event_type.value,
+            'severity': event.severity.value,
+            'risk_level': event.risk_level.value,
+            'confidence': event.confidence,
+            'user_context': _encode_context(event.user_context, True),
+            'device_context': _encode_context(event.device_context, True),
+            'network_context': _encode_context(event.network_context, True),
+            'raw_data': event._raw_data if event._raw_data is not None else {},
+            'enriched_data': event._enriched_data if event._enriched_data is not None else {},
+            'source': event.source,
+            'correlation_id': event.correlation_id,
+            'parent_event_id': event.parent_event_id,
+            'tags': list(event._tags or ()),
+            'labels': event._labels if event._labels is not None else {},
+            'processed_by': event._processed_by if event._processed_by is not None else [],
+            'processing_time': event.processing_time,
+            'schema_version': SCHEMA_VERSION,
+            'timestamp_ns': event._timestamp_ns,
+            'utc_offset': _utc_offset(event),
+        }
+
+    def _from_record(self, record: Dict[str, Any]) -> SecurityEvent:
+        """Événement depuis un enregistrement versionné ou un dictionnaire `to_dict`."""
+        if not isinstance(record, dict):
+            raise CodecError("L'enregistrement doit être un objet JSON")
+        version = record.get('schema_version', 0)
+        if not isinstance(version, int) or version < 0:
+            raise CodecError(f"Version de schéma invalide : {version!r}")
+
+        if version >= 1:
+            timestamp_ns = record['timestamp_ns']
+            if type(timestamp_ns) is not int:
+                raise CodecError(f"timestamp_ns invalide : {timestamp_ns!r}")
+            tz = _timezone(record.get('utc_offset'))
+            if version == 1 and tz is None:
+                timestamp_ns = _naive_v1_timestamp(timestamp_ns)
+        else:
+            # Enregistrement to_dict : horodatage ISO, même arrondi que SecurityEvent
+            if 'timestamp' in record:
+                timestamp = datetime.fromisoformat(record['timestamp'])
+                tz = timestamp.tzinfo
+            else:
+                timestamp, tz = datetime.now(), None
+            timestamp_ns = _timestamp_ns(timestamp)
+
+        event_type = _enum(_EVENT_TYPES, EventType, record.get('event_type', 'ad_logon'))
+        tags = record.get('tags')
+        if version == 0:
+            # Comme from_dict : tags automatiques complétés, sans doublon
+            auto_tags = AUTO_TAGS[event_type]
+            tags = [tag for tag in tags or () if tag not in auto_tags] + list(auto_tags)
+
+        event_id = record.get('event_id')
+        return SecurityEvent._restore(
+            event_id if event_id is not None else _new_event_id(),
+            timestamp_ns,
+            tz,
+            event_type,
+            _enum(_SEVERITIES, Severity, record.get('severity', 'info')),
+            _enum(_RISK_LEVELS, RiskLevel, record.get('risk_level', 2)),
+            record.get('confidence', 1.0),
+            _decode_context(UserContext, record.get('user_context')),
+            _decode_context(DeviceContext, record.get('device_context')),
+            _decode_context(NetworkContext, record.get('network_context')),
+            record.get('raw_data'),
+            record.get('enriched_data'),
+            record.get('source', 'unknown'),
+            record.get('correlation_id'),
+            record.get('parent_event_id'),
+            tags,
+            record.get('labels'),
+            record.get('processed_by'),
+            record.get('processing_time'),
+        )
+
+    def encode(self, event: SecurityEvent) -> bytes:
+        return self._dumps(self.to_record(event))
+
+    def decode(self, data: Buffer) -> SecurityEvent:
+        try:
+            record = self._loads(data)
+        except ValueError as e:
+            raise CodecError(f"JSON invalide : {e}") from e
+        return self.from_record(record)
+
+    def encode_batch(self, events: Iterable[SecurityEvent]) -> bytes:
+        return b"".join(self._dumps(self.to_record(event)) + b"\n" for event in events)
+
+    def decode_batch(self, data: Buffer) -> List[SecurityEvent]:
+        return [self.decode(line) for line in bytes(data).splitlines() if line.strip()]
+
+
+class MsgpackCodec(EventCodec):
+    """
+    Enregistrement binaire positionnel. Schéma v2 (v1 : horodatage naïf
+    depuis l'epoch), un tableau msgpack :
+    [version, event_id (16 octets ou texte), timestamp_ns, utc_offset,
+     event_type (code), severity (code), risk_level, confidence,
+     user_context, device_context, network_context (tableaux de champs ou nil),
+     raw_data, enriched_data, source, correlation_id, parent_event_id,
+     tags, labels, processed_by, processing_time]
+    Un lot est un tableau d'enregistrements.
+    """
+
+    name = "msgpack"
+    content_type = "application/vnd.orion.event+msgpack"
+    batch_content_type = "application/vnd.orion.events+msgpack"
+
+    FIELD_COUNT = 20
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("Le codec 'msgpack' nécessite le paquet msgpack")
+
+    def to_record(self, event: SecurityEvent) -> List[Any]:
+        return [
+            SCHEMA_VERSION,
+            event._event_id,
+            event._timestamp_ns,
+            _utc_offset(event),
+            _EVENT_TYPE_TO_CODE.get(event.event_type, event.event_type.value),
+            _SEVERITY_TO_CODE.get(event.severity, event.severity.value),
+            event.risk_level.value,
+            event.confidence,
+            _encode_context(event.user_context, False),
+            _encode_context(event.device_context, False),
+            _encode_context(event.network_context, False),
+            event._raw_data,
+            event._enriched_data,
+            event.source,
+            event.correlation_id,
+            event.parent_event_id,
+            list(event._tags) if event._tags else None,
+            event._labels,
+            event._processed_by,
+            event.processing_time,
+        ]
+
+    def _from_record(self, record: Any) -> SecurityEvent:
+        if not isinstance(record, list) or not record:
+            raise CodecError("L'enregistrement binaire doit être un tableau")
+        version = record[0]
+        if not isinstance(version, int) or version < 1:
+            raise CodecError(f"Version de schéma invalide : {version!r}")
+        if len(record) < self.FIELD_COUNT:
+            raise CodecError(f"Enregistrement tronqué : {len(record)} champs sur {self.FIELD_COUNT}")
+
+        (_, event_id, timestamp_ns, utc_offset, event_type, severity, risk_level, confidence,
+         user_context, device_context, network_context, raw_data, enriched_data, source,
+         correlation_id, parent_event_id, tags, labels, processed_by, processing_time) = record[:self.FIELD_COUNT]
+        if type(timestamp_ns) is not int:
+            raise CodecError(f"timestamp_ns invalide : {timestamp_ns!r}")
+        try:
+            event_type = _CODE_TO_EVENT_TYPE[event_type] if type(event_type) is int else EventType(event_type)
+            severity = _CODE_TO_SEVERITY[severity] if type(severity) is int else Severity(severity)
+            risk_level = _enum(_RISK_LEVELS, RiskLevel, risk_level)
+        except IndexError as e:
+            raise CodecError("Code d'énumération inconnu (schéma plus récent ?)") from e
+        if version == 1 and utc_offset is None:
+            timestamp_ns = _naive_v1_timestamp(timestamp_ns)
+
+        return SecurityEvent._restore(
+            event_id, timestamp_ns, _timezone(utc_offset), event_type, severity, risk_level,
+            confidence,
+            _decode_context(UserContext, user_context),
+            _decode_context(DeviceContext, device_context),
+            _decode_context(NetworkContext, network_context),
+            raw_data, enriched_data, source, correlation_id, parent_event_id,
+            tags, labels, processed_by, processing_time,
+        )
+
+    def _unpack(self, data: Buffer) -> Any:
+        # unpackb lit directement le tampon (bytes, memoryview...) sans le copier
+        try:
+            return msgpack.unpackb(data, raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise CodecError(f"msgpack invalide : {e}") from e
+
+    def encode(self, event: SecurityEvent) -> bytes:
+        return msgpack.packb(self.to_record(event), use_bin_type=True, default=str)
+
+    def decode(self, data: Buffer) -> SecurityEvent:
+        return self.from_record(self._unpack(data))
+
+    def encode_batch(self, events: Iterable[SecurityEvent]) -> bytes:
+        return msgpack.packb([self.to_record(event) for event in events], use_bin_type=True, default=str)
+
+    def decode_batch(self, data: Buffer) -> List[SecurityEvent]:
+        records = self._unpack(data)
+        if not isinstance(records, list):
+            raise CodecError("Un lot binaire doit être un tableau d'enregistrements")
+        return [self.from_record(record) for record in records]
+
+
+CODECS: Dict[str, Callable[[], EventCodec]] = {
+    JSONCodec.name: JSONCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+_instances: Dict[str, EventCodec] = {}
+
+
+def get_codec(name: str = JSONCodec.name) -> EventCodec:
+    """Codec partagé désigné par son nom ('json' ou 'msgpack')."""
+    codec = _instances.get(name)
+    if codec is None:
+        factory = CODECS.get(name)
+        if factory is None:
+            raise ValueError(f"Codec d'événements inconnu : {name}")
+        codec = _instances[name] = factory()
+    return codec
@@ -27,6 +27,18 @@ class DatabaseConfig:
     redis_db: int = 0
 
 
+@dataclass
+class OrchestratorConfig:
+    """Configuration du pipeline de traitement de l'orchestrateur."""
+    event_workers: int = 4  # Workers en parallèle (ordre conservé par entité)
+    event_queue_size: int = 10000  # Capacité totale des files d'événements
+    queue_overflow_policy: str = "block"  # block, drop_oldest, spill
+    spill_path: str = "./data/event_spill"  # Débordement sur disque (politique spill)
+    micro_batch_size: int = 256  # Événements maximum par micro-lot
+    micro_batch_timeout_ms: int = 20  # Attente maximale pour compléter un micro-lot
+    alert_history_size: int = 100  # Alertes conservées pour l'interface web
+
+
 @dataclass
 class HydraConfig:
     """Configuration du module Hydra (Déception)."""
@@ -40,6 +52,20 @@ class HydraConfig:
     create_group_decoys: bool = True
     create_gpo_decoys: bool = False  # Plus risqué
     
+    # Identité des leurres
+    decoy_domain: str = "corp.local"
+    domain_sid: Optional[str] = None  # SID du domaine, fictif si absent
+    # Plage de RID réservée aux leurres sous le SID réel (sinon SID fictif)
+    decoy_rid_range: Optional[List[int]] = None
+    # Identifiants existants de l'annuaire, jamais attribués à un leurre ; sans eux
+    # (liste ou export), les leurres du registre ne sont pas générés
+    reserved_identifiers: List[str] = field(default_factory=list)
+    reserved_identifiers_path: Optional[str] = None  # Export de l'annuaire, un identifiant par ligne
+    registry_path: Optional[str] = "./data/hydra_decoys.json"  # Sauvegarde des leurres
+    bloom_filter_enabled: bool = False  # Filtre compact exportable vers les agents
+    # Convention de nommage des leurres créés hors du registre (sous-chaînes)
+    decoy_name_patterns: List[str] = field(default_factory=lambda: ['_decoy_'])
+    
     # Configuration de l'empoisonnement
     poison_injection_enabled: bool = True
     poison_injection_rate: float = 0.1  # 10% des interactions
@@ -58,6 +84,20 @@ class CassandraConfig:
     model_path: str = "/opt/orion/models"
     retrain_interval: int = 86400  # 24 heures
     min_training_samples: int = 1000
+    anomaly_nu: float = 0.01  # Part attendue d'événements anormaux
+    anomaly_buffer_size: int = 100000  # Échantillons conservés entre deux entraînements
+    anomaly_versions_kept: int = 5
+    
+    # Inférence LLM locale (Phi-3 chargé depuis model_path)
+    llm_enabled: bool = False
+    llm_batch_size: int = 8
+    llm_batch_timeout_ms: int = 50
+    llm_max_queue_depth: int = 64  # Au-delà, fallback sur les règles
+    llm_latency_budget_ms: int = 2000
+    llm_max_new_tokens: int = 40  # La réponse structurée tient en ~30 tokens
+    llm_cache_size: int = 10000
+    llm_cache_ttl: int = 300  # 5 minutes
+    llm_cache_time_bucket: int = 3600  # Granularité horaire de la clé de cache
     
     # Analyse comportementale
     baseline_learning_period: int = 604800  # 7 jours
@@ -68,6 +108,25 @@ class CassandraConfig:
     short_term_window: int = 300  # 5 minutes
     medium_term_window: int = 3600  # 1 heure
     long_term_window: int = 86400  # 24 heures
+    baseline_buckets: int = 12  # Intervalles par fenêtre glissante
+    baseline_max_entities: int = 100000  # Utilisateurs + machines suivis
+    
+    # Seuils comportementaux
+    brute_force_failures: int = 5  # Échecs sur la fenêtre courte
+    password_spraying_accounts: int = 10  # Comptes en échec depuis une machine (fenêtre courte)
+    lateral_movement_hosts: int = 5  # Machines distinctes sur la fenêtre moyenne
+    off_hours_baseline_ratio: float = 0.05  # Part hors heures habituelle maximale
+    
+    # Comptes et groupes à haut privilège (sous-chaînes, insensibles à la casse)
+    sensitive_account_patterns: List[str] = field(default_factory=lambda: [
+        'admin', 'root', 'service', 'system'
+    ])
+    critical_group_patterns: List[str] = field(default_factory=lambda: [
+        'domain admins', 'enterprise admins', 'schema admins'
+    ])
+    # Fichiers complémentaires, un motif par ligne (export du modèle de tiering AD)
+    sensitive_accounts_file: Optional[str] = None
+    critical_groups_file: Optional[str] = None
     
     # Features à analyser
     analyze_logon_patterns: bool = True
@@ -94,6 +153,26 @@ class AegisConfig:
     # Durées de quarantaine
     default_quarantine_duration: int = 3600  # 1 heure
     max_quarantine_duration: int = 86400  # 24 heures
+    quarantine_tick_interval: float = 1.0  # Résolution de l'expiration (secondes)
+    quarantine_snapshot_path: str = "./data/aegis_quarantines.json"
+    quarantine_snapshot_interval: int = 60  # Sauvegarde de la table (secondes)
+    
+    # File de remédiation (une action déjà exécutée n'est pas rejouée
+    # pendant default_quarantine_duration)
+    remediation_backend: str = "fake_ldap"  # fake_ldap ou ldap
+    remediation_rate_limit: float = 5.0  # Appels annuaire par seconde
+    remediation_burst: int = 20
+    remediation_batch_size: int = 20
+    remediation_batch_timeout_ms: int = 200
+    remediation_max_pending: int = 10000
+    remediation_max_retries: int = 2
+    remediation_jobs_kept: int = 10000  # Tâches terminées consultables
+    
+    # Annuaire Active Directory (backend ldap)
+    ldap_server_url: str = "ldaps://dc.corp.local"
+    ldap_bind_dn: str = ""
+    ldap_bind_password: str = ""
+    ldap_base_dn: str = "DC=corp,DC=local"
     
     # Notifications
     notify_on_quarantine: bool = True
@@ -128,6 +207,9 @@ class AgentConfig:
         "5137",  # Directory service object created
         "5141",  # Directory service object deleted
     ])
+    ad_checkpoint_path: str = "./data/ad_agent_checkpoint.json"  # Dernier enregistrement traité
+    ad_read_chunk_size: int = 1000  # Enregistrements lus par bloc
+    ad_replay_path: Optional[str] = None  # Export EVTX (JSON/XML) à rejouer à la place du journal
     
     # Agent réseau
     network_agent_enabled: bool = True
@@ -213,6 +295,7 @@ class OrionConfig:
     
     # Configuration des modules
     database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    orchestrator: OrchestratorConfig = field(default_factory=OrchestratorConfig)
     hydra: HydraConfig = field(default_factory=HydraConfig)
     cassandra: CassandraConfig = field(default_factory=CassandraConfig)
     aegis: AegisConfig = field(default_factory=AegisConfig)
@@ -245,6 +328,7 @@ class OrionConfig:
         """Crée une configuration à partir d'un dictionnaire."""
         # Extraction des sous-configurations
         database_config = DatabaseConfig(**data.get('database', {}))
+        orchestrator_config = OrchestratorConfig(**data.get('orchestrator', {}))
         hydra_config = HydraConfig(**data.get('hydra', {}))
         cassandra_config = CassandraConfig(**data.get('cassandra', {}))
         aegis_config = AegisConfig(**data.get('aegis', {}))
@@ -258,6 +342,7 @@ class OrionConfig:
             debug=data.get('debug', False),
             version=data.get('version', '0.1.0-alpha'),
             database=database_config,
+            orchestrator=orchestrator_config,
             hydra=hydra_config,
             cassandra=cassandra_config,
             aegis=aegis_config,
@@ -301,6 +386,7 @@ class OrionConfig:
             'debug': self.debug,
             'version': self.version,
             'database': self.database.__dict__,
+            'orchestrator': self.orchestrator.__dict__,
             'hydra': self.hydra.__dict__,
             'cassandra': self.cassandra.__dict__,
             'aegis': self.aegis.__dict__,
@@ -345,9 +431,21 @@ class OrionConfig:
         if self.cassandra.anomaly_threshold < 0 or self.cassandra.anomaly_threshold > 1:
             errors.append("Le seuil d'anomalie doit être entre 0 et 1")
         
+        if self.cassandra.llm_batch_size < 1 or self.cassandra.llm_max_queue_depth < 1:
+            errors.append("La taille de lot et la profondeur de file LLM doivent être positives")
+        
         if self.aegis.quarantine_risk_threshold < 0 or self.aegis.quarantine_risk_threshold > 1:
             errors.append("Le seuil de quarantaine doit être entre 0 et 1")
         
+        if self.aegis.remediation_rate_limit <= 0 or self.aegis.remediation_batch_size < 1:
+            errors.append("Le débit et la taille de lot de remédiation doivent être positifs")
+        
+        if self.aegis.remediation_backend not in ('fake_ldap', 'ldap'):
+            errors.append("Le backend de remédiation doit être fake_ldap ou ldap")
+        
+        if self.orchestrator.queue_overflow_policy not in ('block', 'drop_oldest', 'spill'):
+            errors.append("La politique de débordement doit être block, drop_oldest ou spill")
+        
         return errors
     
     def is_production(self) -> bool:
@@ -0,0 +1,381 @@
+"""
+Journal d'événements segmenté sur disque local
+
+Les événements reçus par l'API sont ajoutés à un journal en écriture seule :
+une suite de fichiers segments de taille bornée, nommés d'après le numéro de
+séquence de leur premier enregistrement. Chaque enregistrement est précédé
+d'un en-tête fixe :
+
+    longueur (uint32) | CRC32 de la charge (uint32) | horodatage en ns (int64)
+
+`append` ne fait qu'écrire dans le tampon du fichier : le fsync est groupé
+et n'est jamais exécuté par l'appelant de `append`. `sync_due` indique qu'il
+est dû (`fsync_batch` enregistrements ou `fsync_interval` secondes depuis
+le dernier) ; `begin_sync()` vide alors les tampons et retourne la partie
+bloquante (fsync, index des segments scellés) à exécuter dans un thread,
+pendant que les ajouts continuent. Au redémarrage, le segment actif est
+relu et tronqué au premier enregistrement incomplet ou corrompu.
+
+Chaque segment porte un index temporel creux : une entrée tous les
+`index_interval` octets, associant la position au plus grand horodatage vu
+avant elle. Les horodatages proviennent des agents et ne sont pas forcément
+croissants ; ce maximum cumulé l'est, ce qui permet de sauter par recherche
+dichotomique tout le début d'un segment antérieur à une plage. Les lectures
+de plage passent par un mmap du segment.
+
+La rétention supprime des segments entiers (ceux dont l'horodatage maximal
+est échu), sans réécrire aucun fichier.
+
+Un seul processus écrit dans un répertoire : l'ouverture prend un verrou
+exclusif (`flock`) sur le fichier `.lock` et échoue immédiatement s'il est
+déjà tenu, par exemple par un autre worker uvicorn.
+"""
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows : pas de verrou entre processus
+    fcntl = None
+
+
+HEADER = struct.Struct('<IIq')
+INDEX_VERSION = 1
+
+_TS_MIN = -2 ** 63
+_TS_MAX = 2 ** 63 - 1
+
+
+class EventLogLockedError(RuntimeError):
+    """Le répertoire du journal est déjà ouvert par un autre processus."""
+
+
+def _to_ns(timestamp: float) -> int:
+    return round(timestamp * 1_000_000_000)
+
+
+@dataclass
+class Segment:
+    """Fichier segment et son index temporel creux."""
+    path: Path
+    base_sequence: int
+    size: int = 0
+    count: int = 0
+    min_ts: int = _TS_MAX
+    max_ts: int = _TS_MIN
+    # (position, plus grand horodatage des enregistrements qui la précèdent)
+    index_positions: List[int] = field(default_factory=list)
+    index_max_ts: List[int] = field(default_factory=list)
+    sealed: bool = False
+    _last_indexed: int = -1
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_suffix('.idx')
+
+    def record(self, position: int, length: int, timestamp_ns: int, index_interval: int) -> None:
+        """Prend en compte un enregistrement écrit à `position`."""
+        if self._last_indexed < 0 or position - self._last_indexed >= index_interval:
+            self.index_positions.append(position)
+            self.index_max_ts.append(self.max_ts)
+            self._last_indexed = position
+        self.size = position + HEADER.size + length
+        self.count += 1
+        self.min_ts = min(self.min_ts, timestamp_ns)
+        self.max_ts = max(self.max_ts, timestamp_ns)
+
+    def start_position(self, start_ns: int) -> int:
+        """Position à partir de laquelle un enregistrement peut être postérieur à `start_ns`."""
+        entry = bisect.bisect_left(self.index_max_ts, start_ns) - 1
+        return self.index_positions[entry] if entry >= 0 else 0
+
+    def overlaps(self, start_ns: int, end_ns: int) -> bool:
+        return self.count > 0 and self.max_ts >= start_ns and self.min_ts < end_ns
+
+    def save_index(self) -> None:
+        """Écrit l'index du segment scellé (remplacement atomique)."""
+        payload = {
+            'version': INDEX_VERSION,
+            'size': self.size,
+            'count': self.count,
+            'min_ts': self.min_ts,
+            'max_ts': self.max_ts,
+            'positions': self.index_positions,
+            'max_ts_before': self.index_max_ts,
+        }
+        temporary = self.index_path.with_name(self.index_path.name + '.tmp')
+        with temporary.open('w', encoding='utf-8') as handle:
+            json.dump(payload, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.index_path)
+
+    def load_index(self) -> bool:
+        """Recharge l'index sauvegardé ; False s'il est absent ou ne correspond plus au fichier."""
+        try:
+            with self.index_path.open(encoding='utf-8') as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return False
+        if payload.get('version') != INDEX_VERSION or payload.get('size') != self.path.stat().st_size:
+            return False
+        self.size = payload['size']
+        self.count = payload['count']
+        self.min_ts = payload['min_ts']
+        self.max_ts = payload['max_ts']
+        self.index_positions = payload['positions']
+        self.index_max_ts = payload['max_ts_before']
+        return True
+
+
+class EventLog:
+    """Journal d'enregistrements horodatés en segments de taille bornée."""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, fsync_batch: int = 1000,
+                 fsync_interval: float = 0.2, index_interval: int = 64 * 1024,
+                 logger: Optional[logging.Logger] = None):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync_batch = max(1, fsync_batch)
+        self.fsync_interval = fsync_interval
+        self.index_interval = max(HEADER.size, index_interval)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.segments: List[Segment] = []
+        self._writer = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # Segments scellés en attente de fsync : (descripteur dupliqué, segment)
+        self._sealing: List[Tuple[int, Segment]] = []
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = self._acquire_lock()
+        try:
+            self._recover()
+        except BaseException:
+            self._lock.close()
+            raise
+
+    def _acquire_lock(self):
+        """Verrou exclusif du répertoire, tenu jusqu'à `close`."""
+        lock = open(self.directory / '.lock', 'a+b')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                lock.close()
+                raise EventLogLockedError(
+                    f"Journal d'événements {self.directory} déjà ouvert par un autre processus"
+                ) from e
+        return lock
+
+    # --- Ouverture et récupération ---
+
+    def _recover(self) -> None:
+        paths = sorted(self.directory.glob('*.log'))
+        for position, path in enumerate(paths):
+            segment = Segment(path, int(path.stem))
+            active = position == len(paths) - 1
+            if active or not segment.load_index():
+                self._rebuild(segment, truncate=active)
+            segment.sealed = not active
+            if segment.sealed and not segment.index_path.exists():
+                segment.save_index()
+            self.segments.append(segment)
+
+        if self.segments:
+            self._writer = open(self.segments[-1].path, 'ab')
+        else:
+            self._roll()
+
+    def _rebuild(self, segment: Segment, truncate: bool) -> None:
+        """Relit un segment pour reconstruire son index ; tronque un segment actif endommagé."""
+        segment.index_positions, segment.index_max_ts = [], []
+        file_size = segment.path.stat().st_size
+        valid_size = 0
+        for position, timestamp_ns, payload in self._read_records(segment.path, file_size, 0):
+            segment.record(position, len(payload), timestamp_ns, self.index_interval)
+            valid_size = segment.size
+        if valid_size < file_size:
+            if truncate:
+                self.logger.warning(
+                    f"Journal d'événements : {file_size - valid_size} octets incomplets tronqués dans {segment.path.name}"
+                )
+                os.truncate(segment.path, valid_size)
+            else:
+                self.logger.error(f"Journal d'événements : segment {segment.path.name} endommagé après {valid_size} octets")
+        segment.size = valid_size
+
+    # --- Écriture ---
+
+    def append(self, payload: bytes, timestamp: float) -> int:
+        """Ajoute un enregistrement et retourne son numéro de séquence."""
+        segment = self.segments[-1]
+        length = len(payload)
+        if segment.count and segment.size + HEADER.size + length > self.segment_bytes:
+            self._roll()
+            segment = self.segments[-1]
+
+        timestamp_ns = _to_ns(timestamp)
+        position = segment.size
+        self._writer.write(HEADER.pack(length, zlib.crc32(payload), timestamp_ns))
+        self._writer.write(payload)
+        segment.record(position, length, timestamp_ns, self.index_interval)
+
+        self._unsynced += 1
+        return segment.base_sequence + segment.count - 1
+
+    @property
+    def sync_due(self) -> bool:
+        """Vrai si `fsync_batch` enregistrements ou `fsync_interval` secondes attendent un fsync."""
+        if not self._unsynced and not self._sealing:
+            return False
+        return self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval
+
+    def begin_sync(self) -> Optional[Callable[[], None]]:
+        """
+        Vide les tampons et retourne la fonction bloquante qui termine la
+        synchronisation (None si rien n'est en attente). Seule cette fonction
+        peut s'exécuter dans un autre thread : elle ne travaille que sur des
+        descripteurs dupliqués, `append` et la bascule de segment peuvent
+        donc continuer pendant ce temps.
+        """
+        self._last_sync = time.monotonic()
+        if not self._unsynced and not self._sealing:
+            return None
+
+        sealing, self._sealing = self._sealing, []
+        active = None
+        if self._writer is not None and self._unsynced:
+            self._writer.flush()
+            active = os.dup(self._writer.fileno())
+        self._unsynced = 0
+
+        def complete() -> None:
+            try:
+                for descriptor, segment in sealing:
+                    os.fsync(descriptor)
+                    if segment.path.exists():  # La rétention a pu le supprimer entre-temps
+                        segment.save_index()
+                if active is not None:
+                    os.fsync(active)
+            finally:
+                for descriptor in [descriptor for descriptor, _ in sealing] + [active]:
+                    if descriptor is not None:
+                        os.close(descriptor)
+
+        return complete
+
+    def sync(self) -> None:
+        """Force l'écriture sur disque des enregistrements en attente (bloquant)."""
+        complete = self.begin_sync()
+        if complete is not None:
+            complete()
+
+    def _roll(self) -> None:
+        """Scelle le segment actif et en ouvre un nouveau ; son fsync et son index suivent au prochain `begin_sync`."""
+        base_sequence = 0
+        if self.segments:
+            current = self.segments[-1]
+            self._writer.flush()
+            self._sealing.append((os.dup(self._writer.fileno()), current))
+            self._writer.close()
+            current.sealed = True
+            base_sequence = current.base_sequence + current.count
+
+        segment = Segment(self.directory / f"{base_sequence:020d}.log", base_sequence)
+        self._writer = open(segment.path, 'ab')
+        self.segments.append(segment)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self.sync()
+            self._writer.close()
+            self._writer = None
+        if self._lock is not None:
+            self._lock.close()  # Libère le verrou
+            self._lock = None
+
+    # --- Lecture ---
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[float, bytes]]:
+        """
+        Enregistrements horodatés dans [start, end[, par ordre d'écriture, sous
+        forme (horodatage en secondes, charge).
+        """
+        start_ns = _to_ns(start) if start is not None else _TS_MIN
+        end_ns = _to_ns(end) if end is not None else _TS_MAX
+        if self._writer is not None:
+            self._writer.flush()  # Le mmap du segment actif voit les écritures non synchronisées
+
+        for segment in list(self.segments):
+            if not segment.overlaps(start_ns, end_ns):
+                continue
+            for _, timestamp_ns, payload in self._read_records(
+                    segment.path, segment.size, segment.start_position(start_ns)):
+                if start_ns <= timestamp_ns < end_ns:
+                    yield timestamp_ns / 1_000_000_000, payload
+
+    @staticmethod
+    def _read_records(path: Path, size: int, position: int) -> Iterator[Tuple[int, int, bytes]]:
+        """(position, horodatage, charge) des enregistrements valides de `path` jusqu'à `size`."""
+        if size <= 0:
+            return
+        with open(path, 'rb') as handle, mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ) as view:
+            while position + HEADER.size <= size:
+                length, checksum, timestamp_ns = HEADER.unpack_from(view, position)
+                start = position + HEADER.size
+                if start + length > size:
+                    return
+                payload = view[start:start + length]
+                if zlib.crc32(payload) != checksum:
+                    return
+                yield position, timestamp_ns, payload
+                position = start + length
+
+    # --- Rétention ---
+
+    def begin_drop(self, cutoff: float) -> Tuple[int, Optional[Callable[[], None]]]:
+        """
+        Retire du journal les segments scellés dont tous les enregistrements
+        sont antérieurs ou égaux à `cutoff`. Retourne le nombre
+        d'enregistrements retirés et la suppression des fichiers, bloquante,
+        à exécuter dans un thread (None si aucun segment n'est échu).
+        """
+        cutoff_ns = _to_ns(cutoff)
+        dropped: List[Segment] = []
+        while len(self.segments) > 1 and self.segments[0].max_ts <= cutoff_ns:
+            dropped.append(self.segments.pop(0))
+        if not dropped:
+            return 0, None
+
+        def complete() -> None:
+            for segment in dropped:
+                segment.path.unlink(missing_ok=True)
+                segment.index_path.unlink(missing_ok=True)
+
+        return sum(segment.count for segment in dropped), complete
+
+    def drop_before(self, cutoff: float) -> int:
+        """Comme `begin_drop`, fichiers supprimés immédiatement (bloquant) ; retourne le nombre retiré."""
+        dropped, complete = self.begin_drop(cutoff)
+        if complete is not None:
+            complete()
+        return dropped
+
+    def __len__(self) -> int:
+        return sum(segment.count for segment in self.segments)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(segment.size for segment in self.segments)
@@ -0,0 +1,254 @@
+"""
+File d'événements partitionnée de l'orchestrateur
+
+Les événements sont répartis entre N files bornées selon une clé d'entité
+(utilisateur, sinon machine) : chaque file est consommée par un seul worker,
+ce qui préserve l'ordre des événements d'une même entité tout en traitant
+les entités différentes en parallèle.
+
+Politiques de débordement quand une file est pleine :
+- block : le producteur attend qu'une place se libère
+- drop_oldest : l'événement le plus ancien de la file est abandonné
+- spill : les événements sont écrits sur disque puis rechargés dans l'ordre
+
+La partition d'une entité est tirée d'un hachage stable (CRC32 de la clé) :
+après un redémarrage, les nouveaux événements d'une entité rejoignent son
+débordement sur disque. Les fichiers de débordement portent le nombre de
+partitions ; ceux écrits avec un autre nombre sont redistribués au
+démarrage, fichier par fichier et dans l'ordre d'écriture.
+"""
+
+import asyncio
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .codec import get_codec
+from .events import SecurityEvent
+
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+
+class SpillFile:
+    """Débordement sur disque d'une partition, relu dans l'ordre d'écriture."""
+
+    def __init__(self, path: Path, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.codec = get_codec("json")
+        self.logger = logger or logging.getLogger(__name__)
+        self.pending = 0
+        self._read_offset = 0
+        self._writer = None
+        self._recover()
+
+    def _recover(self) -> None:
+        """Reprend les événements laissés par une exécution précédente (ligne incomplète tronquée)."""
+        if not self.path.exists():
+            return
+
+        lines = complete = size = 0
+        with open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                lines += chunk.count(b"\n")
+                last = chunk.rfind(b"\n")
+                if last >= 0:
+                    complete = size + last + 1
+                size += len(chunk)
+
+        if complete < size:
+            self.logger.warning(f"Débordement {self.path.name} : {size - complete} octets incomplets tronqués")
+            os.truncate(self.path, complete)
+        self.pending = lines
+        if self.pending:
+            self.logger.info(f"Débordement {self.path.name} : {self.pending} événements repris")
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def append(self, event: SecurityEvent) -> None:
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = open(self.path, 'ab')
+        self._writer.write(self.codec.encode(event) + b"\n")
+        self._writer.flush()
+        self.pending += 1
+
+    async def read(self, limit: int) -> List[SecurityEvent]:
+        """Relit au plus `limit` événements ; le fichier est supprimé une fois vidé."""
+        if not self.pending:
+            return []
+
+        # Seules les lignes déjà comptées (donc entièrement écrites) sont relues :
+        # la lecture peut se faire hors de la boucle pendant que `append` continue
+        events, self._read_offset = await asyncio.to_thread(
+            self._load, self._read_offset, min(limit, self.pending)
+        )
+
+        self.pending -= len(events)
+        if self.pending <= 0:
+            self.close()
+            self.path.unlink(missing_ok=True)
+            self.pending = 0
+            self._read_offset = 0
+        return events
+
+    def _load(self, offset: int, count: int) -> Tuple[List[SecurityEvent], int]:
+        events = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            while len(events) < count:
+                line = f.readline()
+                if not line:
+                    break
+                events.append(self.codec.decode(line))
+            return events, f.tell()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ShardedEventQueue:
+    """Files d'événements bornées, partitionnées par entité."""
+
+    def __init__(self, shards: int = 4, maxsize: int = 10000, overflow_policy: str = "block",
+                 spill_path: str = "./data/event_spill"):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Politique de débordement inconnue : {overflow_policy}")
+
+        self.shards = max(1, shards)
+        self.overflow_policy = overflow_policy
+        self.logger = logging.getLogger(__name__)
+
+        # La capacité totale est répartie entre les partitions
+        shard_size = max(1, maxsize // self.shards)
+        self.queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=shard_size) for _ in range(self.shards)]
+        self.spill_dir = Path(spill_path)
+        self.spills: List[Optional[SpillFile]] = [
+            SpillFile(self.spill_dir / f"shard_{index}-of-{self.shards}.ndjson", self.logger)
+            if overflow_policy == "spill" else None
+            for index in range(self.shards)
+        ]
+        if overflow_policy == "spill":
+            self._redistribute_spills()
+
+        self.metrics: Dict[str, int] = {
+            "events_enqueued": 0,
+            "events_dropped": 0,
+            "events_spilled": 0,
+        }
+
+    def qsize(self) -> int:
+        """Nombre total d'événements en attente (disque compris)."""
+        return sum(queue.qsize() for queue in self.queues) + sum(
+            spill.pending for spill in self.spills if spill is not None
+        )
+
+    def shard_for(self, event: SecurityEvent) -> int:
+        """Partition de l'entité concernée par l'événement."""
+        if event.user_context and event.user_context.username:
+            key = f"user:{event.user_context.username.lower()}"
+        elif event.device_context and event.device_context.hostname:
+            key = f"host:{event.device_context.hostname.lower()}"
+        else:
+            key = event.event_id
+        # hash() est salé par processus : la partition ne survivrait pas à un redémarrage
+        return zlib.crc32(key.encode('utf-8')) % self.shards
+
+    def _redistribute_spills(self, chunk: int = 10000) -> None:
+        """Répartit dans les partitions actuelles les débordements écrits avec un autre nombre de partitions."""
+        current = {spill.path for spill in self.spills}
+        for path in sorted(self.spill_dir.glob("shard_*.ndjson")):
+            if path in current:
+                continue
+            leftover = SpillFile(path, self.logger)
+            offset = moved = 0
+            while moved < leftover.pending:
+                events, offset = leftover._load(offset, min(chunk, leftover.pending - moved))
+                if not events:
+                    break
+                for event in events:
+                    self.spills[self.shard_for(event)].append(event)
+                moved += len(events)
+            path.unlink(missing_ok=True)
+            if moved:
+                self.logger.info(f"Débordement {path.name} : {moved} événements redistribués sur {self.shards} partitions")
+
+    async def put(self, event: SecurityEvent) -> None:
+        """Place un événement dans la partition de son entité selon la politique de débordement."""
+        shard = self.shard_for(event)
+        queue = self.queues[shard]
+        self.metrics["events_enqueued"] += 1
+
+        if self.overflow_policy == "block":
+            await queue.put(event)
+            return
+
+        if self.overflow_policy == "spill":
+            spill = self.spills[shard]
+            # Tant que le disque n'est pas vidé, on y écrit aussi pour garder l'ordre
+            if spill.pending or queue.full():
+                spill.append(event)
+                self.metrics["events_spilled"] += 1
+            else:
+                queue.put_nowait(event)
+            return
+
+        # drop_oldest
+        if queue.full():
+            queue.get_nowait()
+            queue.task_done()
+            self.metrics["events_dropped"] += 1
+            self.logger.warning(f"File d'événements {shard} pleine : événement le plus ancien abandonné")
+        queue.put_nowait(event)
+
+    async def get(self, shard: int) -> SecurityEvent:
+        """Retourne le prochain événement d'une partition (rechargement du disque si besoin)."""
+        queue = self.queues[shard]
+        spill = self.spills[shard]
+        if spill is not None and spill.pending and queue.empty():
+            for event in await spill.read(queue.maxsize):
+                queue.put_nowait(event)
+        return await queue.get()
+
+    async def get_batch(self, shard: int, max_items: int, max_wait: float,
+                        idle_timeout: float = 1.0) -> List[SecurityEvent]:
+        """
+        Constitue un micro-lot : au plus `max_items` événements ou `max_wait`
+        secondes après le premier. Retourne une liste vide après `idle_timeout`
+        secondes sans événement.
+        """
+        try:
+            first = await asyncio.wait_for(self.get(shard), timeout=idle_timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [first]
+        queue = self.queues[shard]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        while len(batch) < max_items:
+            # Vidage sans attente de ce qui est déjà disponible
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.get(shard), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def task_done(self, shard: int, count: int = 1) -> None:
+        for _ in range(count):
+            self.queues[shard].task_done()
+
+    def close(self) -> None:
+        for spill in self.spills:
+            if spill is not None:
+                spill.close()
@@ -1,12 +1,23 @@
 """
 Définition des événements de sécurité Orion
+
+Des millions d'événements peuvent être conservés en mémoire pendant la
+corrélation : SecurityEvent utilise des __slots__, stocke son horodatage en
+nanosecondes depuis l'epoch et son identifiant UUID en 16 octets, et n'alloue
+ses conteneurs (données brutes, tags, labels...) qu'au premier accès.
+
+Un horodatage naïf est conservé tel quel, en heure murale comptée depuis le
+1er janvier 1970 naïf : il ne dépend pas du fuseau du système et une heure
+sautée au passage à l'heure d'été est relue à l'identique.
 """
 
-import uuid
-from datetime import datetime
+import os
+import sys
+import time
+from datetime import datetime, timedelta, tzinfo
 from enum import Enum
-from typing import Dict, Optional, Any
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass, field, fields
 
 
 class EventType(Enum):
@@ -59,7 +70,7 @@ class Severity(Enum):
     CRITICAL = "critical"
 
 
-@dataclass
+@dataclass(slots=True)
 class UserContext:
     """Contexte utilisateur pour un événement."""
     username: str
@@ -72,7 +83,7 @@ class UserContext:
     risk_score: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class DeviceContext:
     """Contexte de l'appareil pour un événement."""
     hostname: str
@@ -84,7 +95,7 @@ class DeviceContext:
     risk_score: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class NetworkContext:
     """Contexte réseau pour un événement."""
     source_ip: str
@@ -96,57 +107,286 @@ class NetworkContext:
     duration: Optional[float] = None
 
 
-@dataclass
+# Tag ajouté automatiquement selon le préfixe du type d'événement, calculé une fois par type
+_AUTO_TAG_PREFIXES = (
+    ('ad_', 'active_directory'),
+    ('network_', 'network'),
+    ('kerberos_', 'kerberos'),
+    ('decoy_', 'deception'),
+)
+AUTO_TAGS: Dict[EventType, Tuple[str, ...]] = {
+    event_type: next(
+        ((sys.intern(tag),) for prefix, tag in _AUTO_TAG_PREFIXES if event_type.value.startswith(prefix)), ()
+    )
+    for event_type in EventType
+}
+
+
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def _timestamp_ns(value: datetime) -> int:
+    """Nanosecondes stockées pour `value` : depuis l'epoch, ou en heure murale s'il est naïf."""
+    if value.tzinfo is None:
+        return (value - _NAIVE_EPOCH) // _ONE_MICROSECOND * 1000
+    # Microsecondes entières : le flottant de timestamp() est exact à ce grain
+    return round(value.timestamp() * 1_000_000) * 1000
+
+
+def _naive_now_ns() -> int:
+    """Équivalent de `_timestamp_ns(datetime.now())`, à la microseconde."""
+    now = time.time_ns() // 1000 * 1000
+    return now + time.localtime(now // 1_000_000_000).tm_gmtoff * 1_000_000_000
+
+
+def _new_event_id() -> bytes:
+    """UUID version 4 aléatoire, sous forme de 16 octets."""
+    raw = bytearray(os.urandom(16))
+    raw[6] = raw[6] & 0x0F | 0x40
+    raw[8] = raw[8] & 0x3F | 0x80
+    return bytes(raw)
+
+
+def _encode_event_id(event_id: str) -> Union[bytes, str]:
+    """16 octets pour un UUID canonique, la chaîne telle quelle pour tout autre identifiant."""
+    if len(event_id) == 36 and event_id[8] == event_id[13] == event_id[18] == event_id[23] == '-':
+        try:
+            raw = bytes.fromhex(event_id.replace('-', ''))
+        except ValueError:
+            return event_id
+        if _format_event_id(raw) == event_id:
+            return raw
+    return event_id
+
+
+def _format_event_id(raw: bytes) -> str:
+    digits = raw.hex()
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+def _context_dict(context: Any) -> Optional[Dict[str, Any]]:
+    if context is None:
+        return None
+    return {context_field.name: getattr(context, context_field.name) for context_field in fields(context)}
+
+
+class _LazyContainer:
+    """Conteneur stocké dans un slot privé, alloué au premier accès (None jusque-là)."""
+
+    __slots__ = ('slot', 'factory')
+
+    def __init__(self, slot: str, factory: type):
+        self.slot = slot
+        self.factory = factory
+
+    def __get__(self, instance: Any, owner: type = None) -> Any:
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        # Un tuple est une valeur partagée (tags automatiques) : copiée avant toute modification
+        if value is None or type(value) is tuple:
+            value = self.factory(value or ())
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        setattr(instance, self.slot, value)
+
+
 class SecurityEvent:
     """Événement de sécurité principal d'Orion."""
-    
-    # Identifiants
-    event_id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    timestamp: datetime = field(default_factory=datetime.now)
-    event_type: EventType = EventType.AD_LOGON
-    
-    # Classification
-    severity: Severity = Severity.INFO
-    risk_level: RiskLevel = RiskLevel.LOW
-    confidence: float = 1.0  # 0.0 à 1.0
-    
-    # Contextes
-    user_context: Optional[UserContext] = None
-    device_context: Optional[DeviceContext] = None
-    network_context: Optional[NetworkContext] = None
-    
-    # Données de l'événement
-    raw_data: Dict[str, Any] = field(default_factory=dict)
-    enriched_data: Dict[str, Any] = field(default_factory=dict)
-    
-    # Métadonnées
-    source: str = "unknown"  # Source de l'événement (agent, module, etc.)
-    correlation_id: Optional[str] = None  # Pour grouper les événements liés
-    parent_event_id: Optional[str] = None  # Événement parent si applicable
-    
-    # Tags et labels
-    tags: list[str] = field(default_factory=list)
-    labels: Dict[str, str] = field(default_factory=dict)
-    
-    # Traitement
-    processed_by: list[str] = field(default_factory=list)  # Modules qui ont traité l'événement
-    processing_time: Optional[float] = None  # Temps de traitement en secondes
-    
-    def __post_init__(self):
-        """Validation et initialisation post-création."""
-        if self.confidence < 0.0 or self.confidence > 1.0:
+
+    __slots__ = (
+        # Identifiants
+        '_event_id', '_timestamp_ns', '_tzinfo', 'event_type',
+        # Classification
+        'severity', 'risk_level', 'confidence',
+        # Contextes
+        'user_context', 'device_context', 'network_context',
+        # Données de l'événement
+        '_raw_data', '_enriched_data',
+        # Métadonnées
+        'source', 'correlation_id', 'parent_event_id',
+        # Tags et labels
+        '_tags', '_labels',
+        # Traitement
+        '_processed_by', 'processing_time',
+    )
+
+    raw_data = _LazyContainer('_raw_data', dict)
+    enriched_data = _LazyContainer('_enriched_data', dict)
+    tags = _LazyContainer('_tags', list)
+    labels = _LazyContainer('_labels', dict)
+    processed_by = _LazyContainer('_processed_by', list)  # Modules qui ont traité l'événement
+
+    def __init__(self,
+                 event_id: Optional[str] = None,
+                 timestamp: Optional[datetime] = None,
+                 event_type: EventType = EventType.AD_LOGON,
+                 severity: Severity = Severity.INFO,
+                 risk_level: RiskLevel = RiskLevel.LOW,
+                 confidence: float = 1.0,  # 0.0 à 1.0
+                 user_context: Optional[UserContext] = None,
+                 device_context: Optional[DeviceContext] = None,
+                 network_context: Optional[NetworkContext] = None,
+                 raw_data: Optional[Dict[str, Any]] = None,
+                 enriched_data: Optional[Dict[str, Any]] = None,
+                 source: str = "unknown",  # Source de l'événement (agent, module, etc.)
+                 correlation_id: Optional[str] = None,  # Pour grouper les événements liés
+                 parent_event_id: Optional[str] = None,  # Événement parent si applicable
+                 tags: Optional[List[str]] = None,
+                 labels: Optional[Dict[str, str]] = None,
+                 processed_by: Optional[List[str]] = None,
+                 processing_time: Optional[float] = None):  # Temps de traitement en secondes
+        if confidence < 0.0 or confidence > 1.0:
             raise ValueError("La confiance doit être entre 0.0 et 1.0")
-        
-        # Ajout de tags automatiques basés sur le type d'événement
-        if self.event_type.value.startswith('ad_'):
-            self.tags.append('active_directory')
-        elif self.event_type.value.startswith('network_'):
-            self.tags.append('network')
-        elif self.event_type.value.startswith('kerberos_'):
-            self.tags.append('kerberos')
-        elif self.event_type.value.startswith('decoy_'):
-            self.tags.append('deception')
-    
+
+        self._event_id = _new_event_id() if event_id is None else _encode_event_id(event_id)
+        if timestamp is None:
+            # Résolution de datetime.now() : la microseconde
+            self._timestamp_ns = _naive_now_ns()
+            self._tzinfo = None
+        else:
+            self.timestamp = timestamp
+        self.event_type = event_type
+        self.severity = severity
+        self.risk_level = risk_level
+        self.confidence = confidence
+        self.user_context = user_context
+        self.device_context = device_context
+        self.network_context = network_context
+        self._raw_data = raw_data
+        self._enriched_data = enriched_data
+        self.source = sys.intern(source) if type(source) is str else source
+        self.correlation_id = correlation_id
+        self.parent_event_id = parent_event_id
+        self._labels = labels
+        self._processed_by = processed_by
+        self.processing_time = processing_time
+
+        # Tags internés, complétés du tag automatique du type d'événement
+        auto_tags = AUTO_TAGS[event_type]
+        if tags:
+            self._tags = [sys.intern(tag) for tag in tags]
+            self._tags.extend(auto_tags)
+        else:
+            self._tags = auto_tags or None
+
+    @property
+    def event_id(self) -> str:
+        event_id = self._event_id
+        return _format_event_id(event_id) if type(event_id) is bytes else event_id
+
+    @event_id.setter
+    def event_id(self, value: str) -> None:
+        self._event_id = _encode_event_id(value)
+
+    @property
+    def event_id_bytes(self) -> Optional[bytes]:
+        """Identifiant sur 16 octets, None s'il ne s'agit pas d'un UUID."""
+        return self._event_id if type(self._event_id) is bytes else None
+
+    @property
+    def timestamp(self) -> datetime:
+        if self._tzinfo is None:
+            return _NAIVE_EPOCH + timedelta(microseconds=self._timestamp_ns // 1000)
+        # Exact à la microseconde : l'erreur du flottant reste sous la demi-microseconde
+        return datetime.fromtimestamp(self._timestamp_ns / 1e9, self._tzinfo)
+
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        self._timestamp_ns = _timestamp_ns(value)
+        self._tzinfo = value.tzinfo
+
+    @property
+    def timestamp_ns(self) -> int:
+        """
+        Horodatage en nanosecondes depuis l'epoch, sans construire de datetime ;
+        en heure murale pour un horodatage naïf.
+        """
+        return self._timestamp_ns
+
+    def has_tag(self, tag: str) -> bool:
+        """Test d'appartenance sans allouer la liste des tags."""
+        return self._tags is not None and tag in self._tags
+
+    def _fields(self) -> Tuple[Any, ...]:
+        return (
+            self._event_id, self._timestamp_ns, self._tzinfo, self.event_type, self.severity,
+            self.risk_level, self.confidence, self.user_context, self.device_context, self.network_context,
+            self._raw_data or {}, self._enriched_data or {}, self.source, self.correlation_id,
+            self.parent_event_id, list(self._tags or ()), self._labels or {}, self._processed_by or [],
+            self.processing_time,
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"SecurityEvent(event_id={self.event_id!r}, timestamp={self.timestamp!r}, "
+            f"event_type={self.event_type}, severity={self.severity}, risk_level={self.risk_level}, "
+            f"source={self.source!r}, tags={list(self._tags or ())!r})"
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    @classmethod
+    def _restore(cls, event_id: Union[bytes, str], timestamp_ns: int, tzinfo: Optional[tzinfo],
+                 event_type: EventType, severity: Severity, risk_level: RiskLevel, confidence: float,
+                 user_context: Optional[UserContext], device_context: Optional[DeviceContext],
+                 network_context: Optional[NetworkContext], raw_data: Optional[Dict[str, Any]],
+                 enriched_data: Optional[Dict[str, Any]], source: str, correlation_id: Optional[str],
+                 parent_event_id: Optional[str], tags: Optional[List[str]], labels: Optional[Dict[str, str]],
+                 processed_by: Optional[List[str]], processing_time: Optional[float]) -> 'SecurityEvent':
+        """
+        Reconstruit un événement à partir de valeurs déjà décodées (codecs) :
+        identifiant sous forme stockée, horodatage en nanosecondes, tags
+        complets. Les conteneurs décodés sont repris sans copie ; vides, ils
+        restent non alloués.
+        """
+        if confidence < 0.0 or confidence > 1.0:
+            raise ValueError("La confiance doit être entre 0.0 et 1.0")
+
+        event = cls.__new__(cls)
+        event._event_id = _encode_event_id(event_id) if type(event_id) is str else event_id
+        event._timestamp_ns = timestamp_ns
+        event._tzinfo = tzinfo
+        event.event_type = event_type
+        event.severity = severity
+        event.risk_level = risk_level
+        event.confidence = confidence
+        event.user_context = user_context
+        event.device_context = device_context
+        event.network_context = network_context
+        event._raw_data = raw_data or None
+        event._enriched_data = enriched_data or None
+        event.source = sys.intern(source) if type(source) is str else source
+        event.correlation_id = correlation_id
+        event.parent_event_id = parent_event_id
+        event._labels = labels or None
+        event._processed_by = processed_by or None
+        event.processing_time = processing_time
+
+        auto_tags = AUTO_TAGS[event_type]
+        if not tags:
+            event._tags = None
+        elif len(tags) == len(auto_tags) and tuple(tags) == auto_tags:
+            event._tags = auto_tags
+        else:
+            event._tags = [sys.intern(tag) for tag in tags]
+        return event
+
     def to_dict(self) -> Dict[str, Any]:
         """Convertit l'événement en dictionnaire pour sérialisation."""
         return {
@@ -156,17 +396,17 @@ class SecurityEvent:
             'severity': self.severity.value,
             'risk_level': self.risk_level.value,
             'confidence': self.confidence,
-            'user_context': self.user_context.__dict__ if self.user_context else None,
-            'device_context': self.device_context.__dict__ if self.device_context else None,
-            'network_context': self.network_context.__dict__ if self.network_context else None,
-            'raw_data': self.raw_data,
-            'enriched_data': self.enriched_data,
+            'user_context': _context_dict(self.user_context),
+            'device_context': _context_dict(self.device_context),
+            'network_context': _context_dict(self.network_context),
+            'raw_data': self._raw_data if self._raw_data is not None else {},
+            'enriched_data': self._enriched_data if self._enriched_data is not None else {},
             'source': self.source,
             'correlation_id': self.correlation_id,
             'parent_event_id': self.parent_event_id,
-            'tags': self.tags,
-            'labels': self.labels,
-            'processed_by': self.processed_by,
+            'tags': list(self._tags or ()),
+            'labels': self._labels if self._labels is not None else {},
+            'processed_by': self._processed_by if self._processed_by is not None else [],
             'processing_time': self.processing_time
         }
     
@@ -179,15 +419,19 @@ class SecurityEvent:
         risk_level = RiskLevel(data.get('risk_level', 2))
         
         # Conversion de la timestamp
-        timestamp = datetime.fromisoformat(data['timestamp']) if 'timestamp' in data else datetime.now()
+        timestamp = datetime.fromisoformat(data['timestamp']) if 'timestamp' in data else None
         
         # Reconstruction des contextes
         user_context = UserContext(**data['user_context']) if data.get('user_context') else None
         device_context = DeviceContext(**data['device_context']) if data.get('device_context') else None
         network_context = NetworkContext(**data['network_context']) if data.get('network_context') else None
         
+        # Les tags automatiques déjà présents ne sont pas ajoutés une seconde fois
+        auto_tags = AUTO_TAGS[event_type]
+        tags = [tag for tag in data.get('tags') or () if tag not in auto_tags]
+        
         return cls(
-            event_id=data.get('event_id', str(uuid.uuid4())),
+            event_id=data.get('event_id'),
             timestamp=timestamp,
             event_type=event_type,
             severity=severity,
@@ -196,14 +440,14 @@ class SecurityEvent:
             user_context=user_context,
             device_context=device_context,
             network_context=network_context,
-            raw_data=data.get('raw_data', {}),
-            enriched_data=data.get('enriched_data', {}),
+            raw_data=data.get('raw_data') or None,
+            enriched_data=data.get('enriched_data') or None,
             source=data.get('source', 'unknown'),
             correlation_id=data.get('correlation_id'),
             parent_event_id=data.get('parent_event_id'),
-            tags=data.get('tags', []),
-            labels=data.get('labels', {}),
-            processed_by=data.get('processed_by', []),
+            tags=tags,
+            labels=data.get('labels') or None,
+            processed_by=data.get('processed_by') or None,
             processing_time=data.get('processing_time')
         )
     
@@ -221,8 +465,8 @@ class SecurityEvent:
     
     def add_tag(self, tag: str) -> None:
         """Ajoute un tag à l'événement."""
-        if tag not in self.tags:
-            self.tags.append(tag)
+        if not self.has_tag(tag):
+            self.tags.append(sys.intern(tag))
     
     def add_label(self, key: str, value: str) -> None:
         """Ajoute un label à l'événement."""
@@ -234,4 +478,4 @@ class SecurityEvent:
     
     def is_critical(self) -> bool:
         """Vérifie si l'événement est critique."""
-        return self.risk_level == RiskLevel.CRITICAL or self.severity == Severity.CRITICAL
\ No newline at end of file
+        return self.risk_level == RiskLevel.CRITICAL or self.severity == Severity.CRITICAL
@@ -0,0 +1,108 @@
+"""
+Décodage des lots d'événements pour l'ingestion par lots
+
+Formats acceptés par /api/v1/events/batch :
+- NDJSON (un objet JSON par ligne)
+- msgpack (un tableau d'objets ou une suite d'objets concaténés)
+- JSON (un tableau d'objets)
+"""
+
+import json
+from typing import Any, List, Tuple
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    msgpack = None
+
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+JSON_CONTENT_TYPES = ("application/json",)
+
+# Taille maximale d'un lot (nombre d'événements)
+DEFAULT_MAX_BATCH_SIZE = 10000
+
+
+class BatchFormatError(ValueError):
+    """Le corps de la requête ne peut pas être décodé dans le format annoncé."""
+
+
+class BatchTooLargeError(ValueError):
+    """Le lot dépasse le nombre maximal d'événements autorisé."""
+
+
+def decode_event_batch(body: bytes, content_type: str,
+                       max_items: int = DEFAULT_MAX_BATCH_SIZE) -> List[Tuple[Any, str]]:
+    """
+    Décode un lot d'événements.
+
+    Retourne une liste de couples (élément, erreur) : l'élément décodé et une
+    chaîne vide, ou None et le message d'erreur pour les lignes illisibles.
+    Les erreurs portant sur tout le corps lèvent BatchFormatError.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+
+    if media_type in NDJSON_CONTENT_TYPES:
+        items = _decode_ndjson(body, max_items)
+    elif media_type in MSGPACK_CONTENT_TYPES:
+        items = _decode_msgpack(body, max_items)
+    elif media_type in JSON_CONTENT_TYPES:
+        items = _decode_json_array(body, max_items)
+    else:
+        raise BatchFormatError(f"Type de contenu non supporté : {content_type}")
+
+    decoded = []
+    for item, error in items:
+        if not error and not isinstance(item, dict):
+            item, error = None, "L'événement doit être un objet"
+        decoded.append((item, error))
+    return decoded
+
+
+def _check_size(count: int, max_items: int) -> None:
+    if count > max_items:
+        raise BatchTooLargeError(f"Lot trop volumineux : {count} événements (maximum {max_items})")
+
+
+def _decode_ndjson(body: bytes, max_items: int) -> List[Tuple[Any, str]]:
+    lines = [line for line in body.splitlines() if line.strip()]
+    _check_size(len(lines), max_items)
+
+    items = []
+    for line in lines:
+        try:
+            items.append((json.loads(line), ""))
+        except ValueError as e:
+            items.append((None, f"JSON invalide : {e}"))
+    return items
+
+
+def _decode_msgpack(body: bytes, max_items: int) -> List[Tuple[Any, str]]:
+    if msgpack is None:
+        raise BatchFormatError("Le format msgpack nécessite le paquet 'msgpack'")
+
+    try:
+        unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+        unpacker.feed(body)
+        objects = list(unpacker)
+    except Exception as e:
+        raise BatchFormatError(f"Corps msgpack invalide : {e}")
+
+    # Un seul tableau racine ou une suite d'objets concaténés
+    if len(objects) == 1 and isinstance(objects[0], list):
+        objects = objects[0]
+    _check_size(len(objects), max_items)
+    return [(item, "") for item in objects]
+
+
+def _decode_json_array(body: bytes, max_items: int) -> List[Tuple[Any, str]]:
+    try:
+        objects = json.loads(body)
+    except ValueError as e:
+        raise BatchFormatError(f"JSON invalide : {e}")
+
+    if not isinstance(objects, list):
+        raise BatchFormatError("Le corps JSON doit être un tableau d'événements")
+    _check_size(len(objects), max_items)
+    return [(item, "") for item in objects]
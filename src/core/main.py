@@ -1,5 +1,6 @@
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, Request, HTTPException, status
 from src.core.config import OrionConfig
 from src.core.orchestrator import Orchestrator
@@ -69,13 +70,23 @@ async def health_check():
     return {"status": "ok"}
 
 @app.get("/api/v1/alerts")
-async def get_alerts(request: Request):
-    """Récupère la liste des dernières alertes de sécurité."""
+async def get_alerts(request: Request, since: Optional[int] = None, limit: int = 50):
+    """
+    Récupère la liste des dernières alertes de sécurité.
+    
+    Sans `since`, retourne les `limit` plus récentes (la plus récente en premier).
+    Avec `since`, retourne dans l'ordre chronologique les alertes de séquence
+    supérieure ; `last_seq` sert de curseur pour l'appel suivant.
+    """
     try:
         orchestrator: Orchestrator = request.app.state.orchestrator
-        # On retourne les 50 dernières alertes, les plus récentes en premier
-        alerts = sorted(orchestrator.alerts, key=lambda x: x.get('timestamp', ''), reverse=True)[:50]
-        return {"alerts": alerts, "count": len(alerts)}
+        if since is None:
+            alerts = orchestrator.alerts.latest(limit)
+            last_seq = orchestrator.alerts.last_seq
+        else:
+            alerts = orchestrator.alerts.since(since, limit)
+            last_seq = alerts[-1]['seq'] if alerts else max(since, orchestrator.alerts.first_seq - 1)
+        return {"alerts": alerts, "count": len(alerts), "last_seq": last_seq}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -3,17 +3,22 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, status, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import List, Dict, Any, Optional
+import asyncio
 import time
 import json
 import uuid
 import csv
 import io
-from collections import defaultdict, Counter
 import os
 from dotenv import load_dotenv
 
+from alert_store import AlertStore, EventStore
+from alert_stats import AlertStatistics
+from event_log import EventLog
+from ingestion import BatchFormatError, BatchTooLargeError, decode_event_batch
+
 # Charger les variables d'environnement
 load_dotenv()
 
@@ -34,7 +39,35 @@ async def lifespan(app: FastAPI):
     app.state.alerts = []
     app.state.read_alerts = set()  # Set des IDs d'alertes marquées comme lues
     
+    # Journal d'événements : relecture des événements encore dans la période de rétention.
+    # Récupération et relecture parcourent les segments sur disque : elles
+    # s'exécutent dans un thread, aucune requête ni tâche n'étant encore active.
+    global event_log, event_log_sync_requested
+    sync_task = None
+    if EVENT_LOG_ENABLED:
+        event_log = await asyncio.to_thread(
+            EventLog,
+            EVENT_LOG_DIR,
+            segment_bytes=EVENT_LOG_SEGMENT_MB * 1024 * 1024,
+            fsync_batch=EVENT_LOG_FSYNC_BATCH,
+            fsync_interval=EVENT_LOG_FSYNC_INTERVAL_MS / 1000.0
+        )
+        replayed = await asyncio.to_thread(replay_event_log, time.time() - ALERT_RETENTION_DAYS * 24 * 3600)
+        logger.info(f"Journal d'événements {EVENT_LOG_DIR} : {replayed} événements restaurés")
+        event_log_sync_requested = asyncio.Event()
+        sync_task = asyncio.create_task(sync_event_log())
+    retention_task = asyncio.create_task(retention_loop())
+    
     yield  # L'API est maintenant prête à recevoir des requêtes
+    
+    retention_task.cancel()
+    await asyncio.gather(retention_task, return_exceptions=True)
+    if sync_task is not None:
+        sync_task.cancel()
+        await asyncio.gather(sync_task, return_exceptions=True)
+    if event_log is not None:
+        await asyncio.to_thread(event_log.close)
+        event_log = None
 
 # --- Initialisation de l'API ---
 app = FastAPI(
@@ -94,15 +127,40 @@ class Statistics(BaseModel):
     top_users: List[Dict]
     top_ips: List[Dict]
 
-# Stockage en mémoire (remplacé par base de données en production)
-events_db = []
-alerts_db = []
+# Partitions temporelles des stockages : la rétention supprime des partitions entières
+RETENTION_PARTITIONS = {"hour": 3600, "day": 86400}
+RETENTION_PARTITION = os.getenv("RETENTION_PARTITION", "day").lower()
+if RETENTION_PARTITION not in RETENTION_PARTITIONS:
+    raise ValueError(f"RETENTION_PARTITION invalide : {RETENTION_PARTITION} (hour ou day)")
+RETENTION_PARTITION_SECONDS = RETENTION_PARTITIONS[RETENTION_PARTITION]
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "60"))
+
+# Stockage en mémoire, reconstruit au démarrage depuis le journal d'événements
+events_db = EventStore(partition_seconds=RETENTION_PARTITION_SECONDS)
+alerts_db = AlertStore(partition_seconds=RETENTION_PARTITION_SECONDS)
 actions_db = []
 
+# Agrégats maintenus à l'ingestion et à l'expiration
+stats_engine = AlertStatistics()
+
 # Configuration de production
 PRODUCTION_MODE = os.getenv("PRODUCTION_MODE", "false").lower() == "true"
 MAX_ALERTS = int(os.getenv("MAX_ALERTS", "1000"))
 ALERT_RETENTION_DAYS = int(os.getenv("ALERT_RETENTION_DAYS", "30"))
+MAX_BATCH_EVENTS = int(os.getenv("MAX_BATCH_EVENTS", "10000"))
+RECENT_ACTIVITY_LIMIT = int(os.getenv("RECENT_ACTIVITY_LIMIT", "100"))
+
+# Journal d'événements sur disque (durabilité sans base de données externe)
+EVENT_LOG_ENABLED = os.getenv("EVENT_LOG_ENABLED", "true").lower() == "true"
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "./data/event_log")
+EVENT_LOG_SEGMENT_MB = int(os.getenv("EVENT_LOG_SEGMENT_MB", "64"))
+EVENT_LOG_FSYNC_BATCH = int(os.getenv("EVENT_LOG_FSYNC_BATCH", "1000"))
+EVENT_LOG_FSYNC_INTERVAL_MS = int(os.getenv("EVENT_LOG_FSYNC_INTERVAL_MS", "200"))
+event_log: Optional[EventLog] = None
+event_log_sync_requested: Optional[asyncio.Event] = None  # Réveille la tâche de fsync avant l'intervalle
+
+# Validation groupée des lots d'événements
+ad_event_list_adapter = TypeAdapter(List[ADEvent])
 
 # Fonction d'authentification
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
@@ -113,20 +171,51 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
         )
     return credentials.credentials
 
-# Fonction de nettoyage automatique
-def cleanup_old_data():
-    """Nettoie les anciennes données selon la politique de rétention"""
+# Rétention : exécutée en tâche de fond, jamais sur le chemin d'ingestion
+async def enforce_retention():
+    """Détache les partitions échues et ramène les alertes sous MAX_ALERTS"""
     cutoff_time = time.time() - (ALERT_RETENTION_DAYS * 24 * 3600)
+    expired_alerts = expired_events = 0
+    
+    # Une partition par itération, en rendant la main à la boucle entre deux
+    for alerts in alerts_db.drop_partitions_before(cutoff_time):
+        for alert in alerts:
+            stats_engine.forget_alert(alert)
+        expired_alerts += len(alerts)
+        await asyncio.sleep(0)
     
-    # Nettoyer les alertes anciennes
-    global alerts_db
-    alerts_db = [alert for alert in alerts_db if alert["timestamp"] > cutoff_time]
+    for events in events_db.drop_partitions_before(cutoff_time):
+        for event in events:
+            stats_engine.forget_event(event)
+        expired_events += len(events)
+        await asyncio.sleep(0)
     
-    # Nettoyer les événements anciens
-    global events_db
-    events_db = [event for event in events_db if event["timestamp"] > cutoff_time]
+    for alerts in alerts_db.trim_to(MAX_ALERTS):
+        for alert in alerts:
+            stats_engine.forget_alert(alert)
+        expired_alerts += len(alerts)
+        await asyncio.sleep(0)
     
-    logger.info(f"Nettoyage effectué: {len(alerts_db)} alertes, {len(events_db)} événements conservés")
+    # Le journal est purgé par segments entiers ; les fichiers sont supprimés dans un thread
+    if event_log is not None:
+        _, remove_segments = event_log.begin_drop(cutoff_time)
+        if remove_segments is not None:
+            await asyncio.to_thread(remove_segments)
+    
+    if expired_alerts or expired_events:
+        logger.info(
+            f"Rétention : {expired_alerts} alertes et {expired_events} événements retirés, "
+            f"{len(alerts_db)} alertes et {len(events_db)} événements conservés"
+        )
+
+async def retention_loop():
+    """Applique périodiquement la politique de rétention"""
+    while True:
+        try:
+            await enforce_retention()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'application de la rétention: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
 
 # Fonction de génération d'alertes améliorée
 def generate_alert(event: ADEvent) -> Optional[Alert]:
@@ -184,6 +273,36 @@ def generate_alert(event: ADEvent) -> Optional[Alert]:
     
     return None
 
+def replay_event_log(cutoff: float) -> int:
+    """Recharge les événements du journal postérieurs à `cutoff` ; retourne leur nombre"""
+    replayed = 0
+    for _, payload in event_log.scan(start=cutoff):
+        try:
+            store_event(ADEvent(**json.loads(payload)), persist=False)
+            replayed += 1
+        except (ValueError, ValidationError) as e:
+            logger.error(f"Enregistrement illisible dans le journal d'événements: {e}")
+    return replayed
+
+async def sync_event_log():
+    """
+    Seule tâche à faire le fsync du journal, toutes les EVENT_LOG_FSYNC_INTERVAL_MS
+    ou dès EVENT_LOG_FSYNC_BATCH événements : le fsync s'exécute dans un thread,
+    jamais dans les handlers d'ingestion
+    """
+    while True:
+        try:
+            await asyncio.wait_for(event_log_sync_requested.wait(), EVENT_LOG_FSYNC_INTERVAL_MS / 1000.0)
+        except asyncio.TimeoutError:
+            pass
+        event_log_sync_requested.clear()
+        try:
+            complete = event_log.begin_sync()
+            if complete is not None:
+                await asyncio.to_thread(complete)
+        except OSError as e:
+            logger.error(f"Erreur de synchronisation du journal d'événements: {e}")
+
 # Endpoints API
 @app.get("/health")
 async def health_check():
@@ -197,24 +316,38 @@ async def health_check():
         "events_count": len(events_db)
     }
 
+def store_event(event: ADEvent, persist: bool = True) -> Optional[Dict]:
+    """Stocke un événement validé et retourne l'alerte générée éventuelle"""
+    event_dict = event.dict()
+    if persist and event_log is not None:
+        event_log.append(json.dumps(event_dict, default=str).encode('utf-8'), event.timestamp)
+        if event_log_sync_requested is not None and event_log.sync_due:
+            event_log_sync_requested.set()
+    replaced = events_db.add(event_dict)
+    if replaced:
+        stats_engine.forget_event(replaced)
+    stats_engine.record_event(event_dict)
+    
+    # Générer une alerte
+    alert = generate_alert(event)
+    if not alert:
+        return None
+    
+    alert_dict = alert.dict()
+    replaced = alerts_db.add(alert_dict)
+    if replaced:
+        stats_engine.forget_alert(replaced)
+    stats_engine.record_alert(alert_dict, event.event_type)
+    return alert_dict
+
 @app.post("/api/v1/events", status_code=202)
 async def receive_event(event: ADEvent, token: str = Depends(verify_token)):
     """Réception d'un événement AD"""
     try:
-        # Nettoyage automatique
-        if len(alerts_db) > MAX_ALERTS:
-            cleanup_old_data()
-        
         # Stocker l'événement
-        event_dict = event.dict()
-        events_db.append(event_dict)
-        
-        # Générer une alerte
-        alert = generate_alert(event)
+        alert = store_event(event)
         if alert:
-            alert_dict = alert.dict()
-            alerts_db.append(alert_dict)
-            logger.info(f"Alerte générée: {alert.alert_id} - {alert.severity}")
+            logger.info(f"Alerte générée: {alert['alert_id']} - {alert['severity']}")
         
         logger.info(f"Événement traité : {event.event_id} - {event.event_type}")
         
@@ -224,6 +357,68 @@ async def receive_event(event: ADEvent, token: str = Depends(verify_token)):
         logger.error(f"Erreur lors du traitement de l'événement: {e}")
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
 
+@app.post("/api/v1/events/batch", status_code=202)
+async def receive_event_batch(request: Request, token: str = Depends(verify_token)):
+    """Réception d'un lot d'événements AD (NDJSON, msgpack ou tableau JSON)"""
+    try:
+        body = await request.body()
+        items = decode_event_batch(body, request.headers.get("content-type", ""), MAX_BATCH_EVENTS)
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BatchFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    
+    try:
+        results: List[Dict[str, Any]] = [None] * len(items)
+        candidates = []
+        for index, (item, error) in enumerate(items):
+            if error:
+                results[index] = {"index": index, "status": "rejected", "error": error}
+            else:
+                candidates.append((index, item))
+        
+        # Validation groupée : un seul passage si tout le lot est valide,
+        # sinon les éléments en erreur sont écartés et le reste revalidé
+        events: List[ADEvent] = []
+        while candidates:
+            try:
+                events = ad_event_list_adapter.validate_python([item for _, item in candidates])
+                break
+            except ValidationError as e:
+                invalid = {}
+                for error in e.errors():
+                    position = error["loc"][0]
+                    invalid.setdefault(position, f"{'.'.join(str(p) for p in error['loc'][1:])}: {error['msg']}")
+                if not invalid:
+                    raise
+                for position, message in invalid.items():
+                    index = candidates[position][0]
+                    results[index] = {"index": index, "status": "rejected", "error": message}
+                candidates = [c for position, c in enumerate(candidates) if position not in invalid]
+        
+        alerts_generated = 0
+        for (index, _), event in zip(candidates, events):
+            if store_event(event):
+                alerts_generated += 1
+            results[index] = {"index": index, "status": "accepted", "event_id": event.event_id}
+        
+        accepted = len(candidates)
+        logger.info(
+            f"Lot traité : {accepted} événements acceptés, {len(items) - accepted} rejetés, "
+            f"{alerts_generated} alertes générées"
+        )
+        
+        return {
+            "status": "accepted",
+            "accepted": accepted,
+            "rejected": len(items) - accepted,
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Erreur lors du traitement du lot d'événements: {e}")
+        raise HTTPException(status_code=500, detail="Erreur interne du serveur")
+
 @app.get("/api/v1/alerts")
 async def get_alerts(
     severity: Optional[str] = None,
@@ -233,19 +428,8 @@ async def get_alerts(
 ):
     """Récupération des alertes avec filtres"""
     try:
-        filtered_alerts = alerts_db.copy()
-        
-        # Filtres
-        if severity:
-            filtered_alerts = [a for a in filtered_alerts if a["severity"] == severity]
-        if status:
-            filtered_alerts = [a for a in filtered_alerts if a["status"] == status]
-        
-        # Tri par timestamp décroissant
-        filtered_alerts.sort(key=lambda x: x["timestamp"], reverse=True)
-        
-        # Limitation
-        filtered_alerts = filtered_alerts[:limit]
+        # Filtres et tri par timestamp décroissant via les index
+        filtered_alerts = alerts_db.latest(limit, severity=severity or None, status=status or None)
         
         return {"alerts": filtered_alerts, "total": len(filtered_alerts)}
         
@@ -257,24 +441,21 @@ async def get_alerts(
 async def mark_alert_read(alert_id: str, token: str = Depends(verify_token)):
     """Marquer une alerte comme lue"""
     try:
-        for alert in alerts_db:
-            if alert["alert_id"] == alert_id:
-                alert["read"] = True
-                alert["status"] = "read"
-                
-                # Enregistrer l'action
-                action = AlertAction(
-                    action="mark_read",
-                    timestamp=time.time(),
-                    user="system",
-                    details={"alert_id": alert_id}
-                )
-                actions_db.append(action.dict())
-                
-                logger.info(f"Alerte {alert_id} marquée comme lue")
-                return {"status": "success", "message": "Alerte marquée comme lue"}
+        alert = alerts_db.update(alert_id, read=True, status="read")
+        if alert is None:
+            raise HTTPException(status_code=404, detail="Alerte non trouvée")
         
-        raise HTTPException(status_code=404, detail="Alerte non trouvée")
+        # Enregistrer l'action
+        action = AlertAction(
+            action="mark_read",
+            timestamp=time.time(),
+            user="system",
+            details={"alert_id": alert_id}
+        )
+        actions_db.append(action.dict())
+        
+        logger.info(f"Alerte {alert_id} marquée comme lue")
+        return {"status": "success", "message": "Alerte marquée comme lue"}
         
     except HTTPException:
         raise
@@ -286,40 +467,37 @@ async def mark_alert_read(alert_id: str, token: str = Depends(verify_token)):
 async def remediate_alert(alert_id: str, token: str = Depends(verify_token)):
     """Déclencher la remédiation pour une alerte"""
     try:
-        for alert in alerts_db:
-            if alert["alert_id"] == alert_id:
-                alert["remediated"] = True
-                alert["status"] = "remediated"
-                
-                # Actions de remédiation simulées
-                remediation_actions = [
-                    "Désactivation du compte utilisateur",
-                    "Déconnexion forcée des sessions",
-                    "Notification à l'administrateur",
-                    "Audit de sécurité déclenché",
-                    "Mise en quarantaine du compte"
-                ]
-                
-                # Enregistrer l'action
-                action = AlertAction(
-                    action="remediate",
-                    timestamp=time.time(),
-                    user="system",
-                    details={
-                        "alert_id": alert_id,
-                        "actions": remediation_actions
-                    }
-                )
-                actions_db.append(action.dict())
-                
-                logger.info(f"Remédiation déclenchée pour l'alerte {alert_id}: {remediation_actions}")
-                return {
-                    "status": "success",
-                    "message": "Remédiation déclenchée",
-                    "actions": remediation_actions
-                }
+        alert = alerts_db.update(alert_id, remediated=True, status="remediated")
+        if alert is None:
+            raise HTTPException(status_code=404, detail="Alerte non trouvée")
+        
+        # Actions de remédiation simulées
+        remediation_actions = [
+            "Désactivation du compte utilisateur",
+            "Déconnexion forcée des sessions",
+            "Notification à l'administrateur",
+            "Audit de sécurité déclenché",
+            "Mise en quarantaine du compte"
+        ]
+        
+        # Enregistrer l'action
+        action = AlertAction(
+            action="remediate",
+            timestamp=time.time(),
+            user="system",
+            details={
+                "alert_id": alert_id,
+                "actions": remediation_actions
+            }
+        )
+        actions_db.append(action.dict())
         
-        raise HTTPException(status_code=404, detail="Alerte non trouvée")
+        logger.info(f"Remédiation déclenchée pour l'alerte {alert_id}: {remediation_actions}")
+        return {
+            "status": "success",
+            "message": "Remédiation déclenchée",
+            "actions": remediation_actions
+        }
         
     except HTTPException:
         raise
@@ -331,39 +509,22 @@ async def remediate_alert(alert_id: str, token: str = Depends(verify_token)):
 async def get_statistics(token: str = Depends(verify_token)):
     """Récupération des statistiques"""
     try:
-        # Statistiques de base
-        total_alerts = len(alerts_db)
+        snapshot = stats_engine.snapshot()
         
-        # Alertes par sévérité
-        severity_counts = Counter(alert["severity"] for alert in alerts_db)
-        
-        # Alertes par type d'événement
-        event_types = Counter()
-        for alert in alerts_db:
-            for event in events_db:
-                if event["event_id"] == alert["event_id"]:
-                    event_types[event["event_type"]] += 1
-                    break
-        
-        # Activité récente (dernières 24h)
+        # Activité récente (dernières 24h), bornée aux RECENT_ACTIVITY_LIMIT plus récentes
         cutoff_time = time.time() - 86400
-        recent_alerts = [a for a in alerts_db if a["timestamp"] > cutoff_time]
-        
-        # Top utilisateurs
-        user_counts = Counter(alert["user"] for alert in alerts_db)
-        top_users = [{"user": user, "count": count} for user, count in user_counts.most_common(10)]
-        
-        # Top IPs
-        ip_counts = Counter(alert["source_ip"] for alert in alerts_db)
-        top_ips = [{"ip": ip, "count": count} for ip, count in ip_counts.most_common(10)]
+        recent_alerts = [
+            alert for alert in reversed(alerts_db.latest(RECENT_ACTIVITY_LIMIT))
+            if alert["timestamp"] > cutoff_time
+        ]
         
         stats = Statistics(
-            total_alerts=total_alerts,
-            alerts_by_severity=dict(severity_counts),
-            alerts_by_type=dict(event_types),
+            total_alerts=snapshot["total_alerts"],
+            alerts_by_severity=snapshot["alerts_by_severity"],
+            alerts_by_type=snapshot["alerts_by_type"],
             recent_activity=recent_alerts,
-            top_users=top_users,
-            top_ips=top_ips
+            top_users=snapshot["top_users"],
+            top_ips=snapshot["top_ips"]
         )
         
         return stats.dict()
@@ -380,10 +541,7 @@ async def export_alerts(
 ):
     """Export des alertes"""
     try:
-        filtered_alerts = alerts_db.copy()
-        
-        if severity:
-            filtered_alerts = [a for a in filtered_alerts if a["severity"] == severity]
+        filtered_alerts = alerts_db.query(severity=severity or None)
         
         if format.lower() == "csv":
             # Export CSV
@@ -422,6 +580,7 @@ async def get_config(token: str = Depends(verify_token)):
         "production_mode": PRODUCTION_MODE,
         "max_alerts": MAX_ALERTS,
         "alert_retention_days": ALERT_RETENTION_DAYS,
+        "retention_partition": RETENTION_PARTITION,
         "allowed_origins": os.getenv("ALLOWED_ORIGINS", "http://localhost:3180").split(","),
         "version": "2.0.0"
     }
@@ -433,6 +592,10 @@ if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8006"))
     workers = int(os.getenv("WORKERS", "1"))
+    if EVENT_LOG_ENABLED and PRODUCTION_MODE and workers > 1:
+        # Un seul processus peut écrire dans le journal d'événements (verrou sur EVENT_LOG_DIR)
+        logger.warning(f"WORKERS={workers} ignoré : le journal d'événements impose un seul worker")
+        workers = 1
     
     logger.info(f"🚀 Démarrage d'Orion AD Guardian v2.0.0")
     logger.info(f"📡 Mode production: {PRODUCTION_MODE}")
@@ -12,6 +12,8 @@ from dataclasses import dataclass
 
 from .events import SecurityEvent, EventType, RiskLevel
 from .config import OrionConfig
+from .event_queue import ShardedEventQueue
+from .alert_history import AlertHistory
 from ..modules.hydra import HydraModule
 from ..modules.cassandra import CassandraModule
 from ..modules.aegis import AegisModule
@@ -43,11 +45,16 @@ class Orchestrator:
         self.module_statuses: Dict[str, ModuleStatus] = {}
         self._start_time = datetime.now()
         
-        # Queue des événements
-        self.event_queue: asyncio.Queue[SecurityEvent] = asyncio.Queue()
+        # Files des événements, partitionnées par entité entre les workers
+        self.event_queue = ShardedEventQueue(
+            shards=config.orchestrator.event_workers,
+            maxsize=config.orchestrator.event_queue_size,
+            overflow_policy=config.orchestrator.queue_overflow_policy,
+            spill_path=config.orchestrator.spill_path
+        )
         
-        # Liste des alertes pour l'interface web
-        self.alerts: List[Dict] = []
+        # Historique des alertes pour l'interface web (tampon circulaire)
+        self.alerts = AlertHistory(config.orchestrator.alert_history_size)
         
         self.logger.info("Orchestrateur Orion initialisé")
     
@@ -64,7 +71,7 @@ class Orchestrator:
             # Démarrage des tâches de fond
             self.is_running = True
             await asyncio.gather(
-                self._event_processor(),
+                *(self._event_processor(worker_id) for worker_id in range(self.event_queue.shards)),
                 self._health_monitor(),
                 self._metrics_collector()
             )
@@ -87,99 +94,123 @@ class Orchestrator:
         await self.cassandra.stop()
         await self.hydra.stop()
         
+        self.event_queue.close()
+        
         self.logger.info("Orchestrateur Orion arrêté")
     
     async def process_event(self, event: SecurityEvent) -> None:
         """Traite un événement de sécurité."""
         await self.event_queue.put(event)
     
-    async def _event_processor(self) -> None:
-        """Processeur principal des événements de sécurité."""
-        self.logger.info("Démarrage du processeur d'événements")
+    async def _event_processor(self, worker_id: int = 0) -> None:
+        """Worker de traitement par micro-lots des événements d'une partition de la file."""
+        self.logger.info(f"Démarrage du processeur d'événements {worker_id}")
+        
+        batch_size = self.config.orchestrator.micro_batch_size
+        batch_timeout = self.config.orchestrator.micro_batch_timeout_ms / 1000.0
         
         while self.is_running:
+            # Micro-lot : N événements ou T millisecondes, vide si aucun événement
+            events = await self.event_queue.get_batch(worker_id, batch_size, batch_timeout)
+            if not events:
+                continue
+            
             try:
-                # Récupération de l'événement avec timeout
-                event = await asyncio.wait_for(
-                    self.event_queue.get(), 
-                    timeout=1.0
-                )
-                
-                self.logger.debug(f"Traitement de l'événement : {event.event_id}")
+                self.logger.debug(f"Traitement d'un lot de {len(events)} événements")
                 
                 # Traitement parallèle par les modules
                 await asyncio.gather(
-                    self._process_with_hydra(event),
-                    self._process_with_cassandra(event),
+                    self._process_batch_with_hydra(events),
+                    self._process_batch_with_cassandra(events),
                     return_exceptions=True
                 )
                 
-            except asyncio.TimeoutError:
-                # Pas d'événement à traiter, on continue
-                continue
             except Exception as e:
                 self.logger.error(f"Erreur lors du traitement d'événement : {e}")
+            finally:
+                self.event_queue.task_done(worker_id, len(events))
     
     def add_alert(self, alert_data: Dict) -> None:
         """Ajoute une alerte à la liste pour l'interface web."""
-        alert_data['timestamp'] = datetime.now().isoformat()
-        alert_data['id'] = f"alert_{len(self.alerts)}_{datetime.now().timestamp()}"
-        self.alerts.append(alert_data)
+        self.add_alerts([alert_data])
+    
+    def add_alerts(self, alerts: List[Dict]) -> None:
+        """Ajoute les alertes d'un lot à la liste pour l'interface web."""
+        if not alerts:
+            return
         
-        # Garder seulement les 100 dernières alertes
-        if len(self.alerts) > 100:
-            self.alerts = self.alerts[-100:]
+        timestamp = datetime.now().isoformat()
+        for alert_data in alerts:
+            alert_data['timestamp'] = timestamp
+            self.alerts.append(alert_data)
     
-    async def _process_with_hydra(self, event: SecurityEvent) -> None:
-        """Traite un événement avec le module Hydra."""
+    async def _process_batch_with_hydra(self, events: List[SecurityEvent]) -> None:
+        """Traite un lot d'événements avec le module Hydra."""
         try:
-            is_decoy = await self.hydra.is_decoy_interaction(event)
-            if is_decoy:
+            decoys = await self.hydra.is_decoy_interaction_batch(events)
+            
+            alerts = []
+            for event, decoy in zip(events, decoys):
+                if decoy is None:
+                    continue
+                # Un leurre peut être touché par son nom d'hôte, son SID ou son SPN, sans contexte utilisateur
+                actor = _event_identity(event) or decoy.name
                 self.logger.critical(
-                    f"ALERTE HYDRA : Interaction avec un leurre détectée ! Événement: {event.event_id}, Utilisateur: {event.user_context.username}"
+                    f"ALERTE HYDRA : Interaction avec un leurre détectée ! Événement: {event.event_id}, "
+                    f"Leurre: {decoy.name} ({decoy.decoy_type}), Entité: {actor}"
                 )
                 
                 # Créer une alerte pour l'interface web
-                self.add_alert({
+                alerts.append({
                     'event_id': event.event_id,
                     'source': 'Hydra',
                     'risk_level': 'CRITICAL',
-                    'justification': f"Interaction détectée avec un leurre par l'utilisateur {event.user_context.username}",
-                    'user': event.user_context.username,
-                    'action_taken': 'quarantine_entity'
+                    'justification': f"Interaction détectée avec le leurre {decoy.name} ({decoy.decoy_type}) par {actor}",
+                    'user': actor,
+                    'decoy': decoy.name,
+                    'decoy_type': decoy.decoy_type,
+                    'action_taken': 'quarantine_entity',
+                    # Aegis rend la main dès la tâche déposée
+                    'remediation_job': await self.aegis.handle_decoy_interaction(event)
                 })
-                
-                await self.aegis.handle_decoy_interaction(event)
+            self.add_alerts(alerts)
         except Exception as e:
             self.logger.error(f"Erreur dans le module Hydra : {e}")
     
-    async def _process_with_cassandra(self, event: SecurityEvent) -> None:
-        """Traite un événement avec le module Cassandra."""
+    async def _process_batch_with_cassandra(self, events: List[SecurityEvent]) -> None:
+        """Traite un lot d'événements avec le module Cassandra."""
         try:
             # Analyse comportementale
-            analysis_result = await self.cassandra.analyze_event(event)
-            risk_score = analysis_result.risk_score if hasattr(analysis_result, 'risk_score') else analysis_result.get('risque', 1)
-            justification = analysis_result.factors.get('justification') if hasattr(analysis_result, 'factors') else analysis_result.get('justification', '')
-
-            # Si le risque est élevé ou critique, déclencher une action
-            if risk_score >= 0.8:  # 0.8 = HIGH, 1.0 = CRITICAL
+            assessments = await self.cassandra.analyze_events(events)
+            
+            alerts = []
+            for event, analysis_result in zip(events, assessments):
+                risk_score = analysis_result.risk_score
+                
+                # Si le risque est élevé ou critique, déclencher une action
+                if risk_score < 0.8:  # 0.8 = HIGH, 1.0 = CRITICAL
+                    continue
+                
+                justification = analysis_result.justification
                 risk_level = 'CRITICAL' if risk_score >= 0.9 else 'HIGH'
                 self.logger.warning(
                     f"Risque élevé détecté : {risk_score} - {justification}"
                 )
                 
                 # Créer une alerte pour l'interface web
-                self.add_alert({
+                alerts.append({
                     'event_id': event.event_id,
                     'source': 'Cassandra',
                     'risk_level': risk_level,
                     'justification': justification,
                     'user': event.user_context.username if event.user_context else 'Unknown',
                     'risk_score': risk_score,
-                    'action_taken': 'handle_high_risk_event'
+                    'action_taken': 'handle_high_risk_event',
+                    'remediation_job': await self.aegis.handle_high_risk_event(
+                        event, {'justification': justification, 'risk_score': risk_score}
+                    )
                 })
-                
-                await self.aegis.handle_high_risk_event(event, {'justification': justification})
+            self.add_alerts(alerts)
         except Exception as e:
             self.logger.error(f"Erreur module Cassandra : {e}")
     
@@ -226,6 +257,7 @@ class Orchestrator:
                     'aegis': await self.aegis.get_metrics(),
                     'orchestrator': {
                         'events_processed': self.event_queue.qsize(),
+                        **self.event_queue.metrics,
                         'uptime': (datetime.now() - self._start_time).total_seconds()
                     }
                 }
@@ -251,4 +283,12 @@ class Orchestrator:
             'modules': self.module_statuses,
             'event_queue_size': self.event_queue.qsize(),
             'uptime': (datetime.now() - getattr(self, '_start_time', datetime.now())).total_seconds()
-        }
\ No newline at end of file
+        }
+
+def _event_identity(event: SecurityEvent) -> Optional[str]:
+    """Entité à l'origine de l'événement : utilisateur, sinon machine."""
+    if event.user_context and event.user_context.username:
+        return event.user_context.username
+    if event.device_context and event.device_context.hostname:
+        return event.device_context.hostname
+    return None
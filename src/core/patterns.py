@@ -0,0 +1,118 @@
+"""
+Recherche multi-motifs partagée par les modules Orion
+
+Les listes de comptes sensibles, de groupes critiques et de noms de leurres
+peuvent compter des milliers d'entrées (export du modèle de tiering AD). Un
+automate d'Aho-Corasick est construit une fois à partir de ces listes : chaque
+valeur est ensuite parcourue une seule fois, en temps linéaire dans sa
+longueur, quel que soit le nombre de motifs.
+"""
+
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PatternMatcher:
+    """Automate d'Aho-Corasick : recherche de sous-chaînes, insensible à la casse par défaut."""
+
+    __slots__ = ('patterns', 'case_sensitive', '_goto', '_fail', '_outputs')
+
+    def __init__(self, patterns: Iterable[str], case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        # Motifs dédoublonnés, dans l'ordre de la configuration ; le motif vide est ignoré
+        self.patterns: Tuple[str, ...] = tuple(dict.fromkeys(
+            pattern if case_sensitive else pattern.lower() for pattern in patterns if pattern
+        ))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        self._build()
+
+    @classmethod
+    def from_sources(cls, patterns: Iterable[str], path: Optional[str] = None,
+                     case_sensitive: bool = False) -> "PatternMatcher":
+        """Automate construit à partir d'une liste et, si fourni, d'un fichier de motifs."""
+        combined = list(patterns)
+        if path:
+            combined.extend(load_pattern_file(path))
+        return cls(combined, case_sensitive=case_sensitive)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def _build(self) -> None:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+
+        # Trie des motifs
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                following = goto[state].get(char)
+                if following is None:
+                    following = len(goto)
+                    goto[state][char] = following
+                    goto.append({})
+                    fail.append(0)
+                    outputs.append(())
+                state = following
+            outputs[state] += (index,)
+
+        # Liens d'échec en largeur : le lien d'un état pointe toujours vers un
+        # état moins profond, dont les sorties sont déjà complètes.
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in goto[state].items():
+                queue.append(following)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[following] = target if target != following else 0
+                outputs[following] += outputs[fail[following]]
+
+    def _scan(self, text: str, first_only: bool) -> List[int]:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        if not self.case_sensitive:
+            text = text.lower()
+
+        found: List[int] = []
+        state = 0
+        for char in text:
+            following = goto[state].get(char)
+            while following is None and state:
+                state = fail[state]
+                following = goto[state].get(char)
+            state = following or 0
+            if outputs[state]:
+                found.extend(outputs[state])
+                if first_only:
+                    break
+        return found
+
+    def search(self, text: Optional[str]) -> bool:
+        """Vrai si au moins un motif apparaît dans `text`."""
+        if not text or not self.patterns:
+            return False
+        return bool(self._scan(text, first_only=True))
+
+    def find_all(self, text: Optional[str]) -> List[str]:
+        """Motifs distincts présents dans `text`, dans l'ordre de la configuration."""
+        if not text or not self.patterns:
+            return []
+        return [self.patterns[index] for index in sorted(set(self._scan(text, first_only=False)))]
+
+
+def load_pattern_file(path: str) -> List[str]:
+    """Lit un motif par ligne ; les lignes vides et les commentaires (#) sont ignorés."""
+    patterns = []
+    with Path(path).open(encoding='utf-8') as handle:
+        for line in handle:
+            pattern = line.strip()
+            if pattern and not pattern.startswith('#'):
+                patterns.append(pattern)
+    return patterns
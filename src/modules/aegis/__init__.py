@@ -0,0 +1,15 @@
+"""
+Module Aegis - Remédiation Automatique
+
+Le module Aegis applique les actions de remédiation (quarantaine de comptes,
+isolation de machines) de façon asynchrone, par lots et à débit limité.
+"""
+
+from .module import AegisModule
+from .jobs import JobStatus, RemediationJob
+
+__all__ = [
+    "AegisModule",
+    "JobStatus",
+    "RemediationJob",
+]
@@ -0,0 +1,156 @@
+"""
+Backends d'exécution des actions de remédiation
+
+Un backend reçoit un lot d'actions et retourne un résultat par action. Le
+backend est choisi par `AegisConfig.remediation_backend` :
+- fake_ldap : annuaire en mémoire, pour les tests et le développement ;
+- ldap : Active Directory via ldap3 (une connexion par lot).
+
+Mettre un compte en quarantaine revient à positionner le drapeau
+ACCOUNTDISABLE de son userAccountControl ; isoler une machine, à désactiver son
+compte ordinateur (sAMAccountName suffixé par '$'). La levée retire le drapeau.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from .remediation import ActionResult, ActionType, RemediationAction
+
+try:
+    import ldap3
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    ldap3 = None
+
+
+# Drapeaux de userAccountControl
+ACCOUNTDISABLE = 0x0002
+NORMAL_ACCOUNT = 0x0200
+WORKSTATION_TRUST_ACCOUNT = 0x1000
+
+HOST_ACTIONS = frozenset({ActionType.ISOLATE_HOST, ActionType.RELEASE_HOST})
+RELEASE_ACTION_TYPES = frozenset({ActionType.ENABLE_ACCOUNT, ActionType.RELEASE_HOST})
+
+
+def account_name(action: RemediationAction) -> str:
+    """sAMAccountName visé par une action."""
+    if action.action in HOST_ACTIONS:
+        return action.entity if action.entity.endswith('$') else f"{action.entity}$"
+    return action.entity
+
+
+class RemediationBackend(ABC):
+    """Interface des backends de remédiation."""
+
+    name = "base"
+
+    @abstractmethod
+    async def execute_batch(self, actions: List[RemediationAction]) -> List[ActionResult]:
+        """Exécute un lot d'actions et retourne un résultat par action, dans l'ordre."""
+
+
+class FakeLDAPBackend(RemediationBackend):
+    """
+    Annuaire simulé en mémoire : les comptes inconnus sont créés à la volée et
+    chaque lot reçu est journalisé pour les vérifications des tests.
+    """
+
+    name = "fake_ldap"
+
+    def __init__(self, latency: float = 0.0, failing_accounts: Optional[set] = None):
+        self.latency = latency
+        self.failing_accounts = failing_accounts or set()
+        self.directory: Dict[str, int] = {}
+        self.batches: List[List[RemediationAction]] = []
+
+    def is_disabled(self, sam_account_name: str) -> bool:
+        return bool(self.directory.get(sam_account_name.lower(), 0) & ACCOUNTDISABLE)
+
+    async def execute_batch(self, actions: List[RemediationAction]) -> List[ActionResult]:
+        self.batches.append(list(actions))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        results = []
+        for action in actions:
+            name = account_name(action)
+            if name in self.failing_accounts:
+                results.append(ActionResult(action, False, "Opération LDAP refusée (simulation)"))
+                continue
+            default_flags = WORKSTATION_TRUST_ACCOUNT if name.endswith('$') else NORMAL_ACCOUNT
+            flags = self.directory.get(name, default_flags)
+            self.directory[name] = _apply(action, flags)
+            results.append(ActionResult(action, True, changed=self.directory[name] != flags))
+        return results
+
+
+class LDAPBackend(RemediationBackend):
+    """Active Directory via ldap3 ; les appels bloquants sont exécutés hors de la boucle."""
+
+    name = "ldap"
+
+    def __init__(self, server_url: str, bind_dn: str, bind_password: str, base_dn: str,
+                 logger: Optional[logging.Logger] = None):
+        if ldap3 is None:
+            raise RuntimeError("Le backend 'ldap' nécessite le paquet ldap3")
+        self.server = ldap3.Server(server_url, get_info=ldap3.NONE)
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.base_dn = base_dn
+        self.logger = logger or logging.getLogger(__name__)
+
+    async def execute_batch(self, actions: List[RemediationAction]) -> List[ActionResult]:
+        return await asyncio.to_thread(self._execute_batch, actions)
+
+    def _execute_batch(self, actions: List[RemediationAction]) -> List[ActionResult]:
+        connection = ldap3.Connection(self.server, self.bind_dn, self.bind_password, auto_bind=True)
+        try:
+            return [self._execute(connection, action) for action in actions]
+        finally:
+            connection.unbind()
+
+    def _execute(self, connection: Any, action: RemediationAction) -> ActionResult:
+        name = ldap3.utils.conv.escape_filter_chars(account_name(action))
+        connection.search(self.base_dn, f"(sAMAccountName={name})", attributes=['userAccountControl'])
+        if not connection.entries:
+            return ActionResult(action, False, "Compte introuvable dans l'annuaire")
+
+        entry = connection.entries[0]
+        flags = int(entry.userAccountControl.value)
+        updated = _apply(action, flags)
+        if updated == flags:
+            return ActionResult(action, True, changed=False)
+
+        connection.modify(entry.entry_dn, {
+            'userAccountControl': [(ldap3.MODIFY_REPLACE, [updated])]
+        })
+        if connection.result.get('result') != 0:
+            return ActionResult(action, False, connection.result.get('description'))
+        return ActionResult(action, True, changed=True)
+
+
+def _apply(action: RemediationAction, flags: int) -> int:
+    """userAccountControl après l'action."""
+    if action.action in RELEASE_ACTION_TYPES:
+        return flags & ~ACCOUNTDISABLE
+    return flags | ACCOUNTDISABLE
+
+
+BACKENDS: Dict[str, Callable[[Any], RemediationBackend]] = {
+    FakeLDAPBackend.name: lambda config: FakeLDAPBackend(),
+    LDAPBackend.name: lambda config: LDAPBackend(
+        server_url=config.ldap_server_url,
+        bind_dn=config.ldap_bind_dn,
+        bind_password=config.ldap_bind_password,
+        base_dn=config.ldap_base_dn
+    ),
+}
+
+
+def create_backend(config: Any) -> RemediationBackend:
+    """Instancie le backend désigné par `config.remediation_backend`."""
+    factory = BACKENDS.get(config.remediation_backend)
+    if factory is None:
+        raise ValueError(f"Backend de remédiation inconnu : {config.remediation_backend}")
+    return factory(config)
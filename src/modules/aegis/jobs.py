@@ -0,0 +1,163 @@
+"""
+Suivi des tâches de remédiation d'Aegis
+
+Chaque demande adressée à Aegis reçoit un identifiant de tâche dès son dépôt :
+le gestionnaire rend la main sans attendre l'annuaire, et l'appelant qui en a
+besoin attend la fin de la tâche séparément. Les tâches terminées restent
+consultables dans la limite de `max_finished` ; la latence de bout en bout
+(dépôt → résultat du backend) alimente un histogramme par type d'action.
+"""
+
+import asyncio
+import bisect
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+from .remediation import ActionType
+
+
+# Bornes supérieures des intervalles de latence, en secondes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """Histogramme de latences à intervalles fixes (au-delà du dernier : débordement)."""
+
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Borne supérieure de l'intervalle contenant le quantile `q` (le maximum s'il déborde)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulated = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulated += bucket_count
+            if cumulated >= rank and bucket_count:
+                return min(LATENCY_BUCKETS[index], self.maximum) if index < len(LATENCY_BUCKETS) else self.maximum
+        return self.maximum
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": float(self.count),
+            "avg": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.maximum,
+        }
+
+
+class JobStatus(Enum):
+    """État d'une tâche de remédiation."""
+    PENDING = "pending"
+    COMPLETED = "completed"  # Action exécutée (ou déjà en vigueur)
+    FAILED = "failed"
+    SKIPPED = "skipped"  # Aucune action nécessaire : seuil non atteint, quarantaine prolongée...
+    DROPPED = "dropped"  # File de remédiation pleine ou arrêt du module
+
+
+@dataclass
+class RemediationJob:
+    """Demande de remédiation et son résultat."""
+    job_id: str
+    action: Optional[ActionType]
+    entity: Optional[str]
+    status: JobStatus = JobStatus.PENDING
+    detail: Optional[str] = None
+    created_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != JobStatus.PENDING
+
+    @property
+    def latency(self) -> Optional[float]:
+        return self.finished_at - self.created_at if self.finished_at is not None else None
+
+
+class JobTracker:
+    """Tâches en cours et tâches terminées récentes, avec attente optionnelle de leur fin."""
+
+    def __init__(self, max_finished: int = 10000):
+        self.max_finished = max(1, max_finished)
+        self._pending: Dict[str, RemediationJob] = {}
+        self._finished: "OrderedDict[str, RemediationJob]" = OrderedDict()
+        self._waiters: Dict[str, List[asyncio.Event]] = {}  # Un événement par appelant de `wait`
+        self.histograms: Dict[ActionType, LatencyHistogram] = {action: LatencyHistogram() for action in ActionType}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def create(self, action: Optional[ActionType], entity: Optional[str]) -> RemediationJob:
+        job = RemediationJob(uuid.uuid4().hex, action, entity, created_at=time.monotonic())
+        self._pending[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[RemediationJob]:
+        return self._pending.get(job_id) or self._finished.get(job_id)
+
+    def finish(self, job_id: str, status: JobStatus, detail: Optional[str] = None) -> None:
+        job = self._pending.pop(job_id, None)
+        if job is None:
+            return
+        job.status = status
+        job.detail = detail
+        job.finished_at = time.monotonic()
+        if job.action is not None and status in (JobStatus.COMPLETED, JobStatus.FAILED):
+            self.histograms[job.action].observe(job.latency)
+
+        self._finished[job_id] = job
+        while len(self._finished) > self.max_finished:
+            self._finished.popitem(last=False)
+
+        for waiter in self._waiters.pop(job_id, ()):
+            waiter.set()
+
+    def finish_all(self, job_ids: Iterable[str], status: JobStatus, detail: Optional[str] = None) -> None:
+        for job_id in job_ids:
+            self.finish(job_id, status, detail)
+
+    def abandon_pending(self, detail: str) -> int:
+        """Clôt les tâches encore en cours (arrêt du module) ; retourne leur nombre."""
+        job_ids = list(self._pending)
+        self.finish_all(job_ids, JobStatus.DROPPED, detail)
+        return len(job_ids)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[RemediationJob]:
+        """
+        Attend la fin d'une tâche et la retourne ; None si la tâche est inconnue
+        (ou déjà oubliée). Lève asyncio.TimeoutError au-delà de `timeout`.
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        waiter = asyncio.Event()
+        self._waiters.setdefault(job_id, []).append(waiter)
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        finally:
+            # Après expiration ou annulation, l'attente ne doit pas survivre à l'appelant
+            waiters = self._waiters.get(job_id)
+            if waiters is not None:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[job_id]
+        return job
@@ -1,35 +1,280 @@
+"""
+Module Aegis - Remédiation Automatique
+
+Les gestionnaires d'alertes déposent une tâche de remédiation et retournent
+aussitôt son identifiant : le traitement des événements n'inclut jamais la
+latence de l'annuaire. L'appelant peut attendre la fin d'une tâche avec
+`wait_for_job`.
+"""
+
+import asyncio
 import logging
-from src.core.events import SecurityEvent
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ...core.events import SecurityEvent
+from .backends import create_backend
+from .jobs import JobStatus, JobTracker, RemediationJob
+from .quarantine import QuarantineTable
+from .remediation import (
+    ActionResult, ActionType, RemediationAction, RemediationQueue, SubmitOutcome, RELEASE_ACTIONS
+)
+
+
+# Action de quarantaine correspondant à chaque action de levée
+QUARANTINE_ACTIONS = {release: quarantine for quarantine, release in RELEASE_ACTIONS.items()}
+
+
+@dataclass
+class HealthStatus:
+    """Statut de santé du module."""
+    name: str
+    status: str
+    last_heartbeat: datetime
+    metrics: Dict[str, float]
+
 
 class AegisModule:
-    def __init__(self, config):
+    """Module de remédiation automatique."""
+
+    def __init__(self, config: Any):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.is_running = False
+        self._expiry_task = None
+
+        # Les actions sont déposées dans la file et exécutées par lots, hors du
+        # traitement des événements ; une entité déjà traitée n'est pas
+        # resoumise pendant la durée de quarantaine par défaut.
+        self.backend = create_backend(config)
+        self.remediation = RemediationQueue(
+            backend=self.backend,
+            dedup_window=config.default_quarantine_duration,
+            rate=config.remediation_rate_limit,
+            burst=config.remediation_burst,
+            batch_size=config.remediation_batch_size,
+            batch_timeout=config.remediation_batch_timeout_ms / 1000.0,
+            max_pending=config.remediation_max_pending,
+            max_retries=config.remediation_max_retries,
+            on_result=self._on_action_result,
+            logger=self.logger
+        )
 
-    async def quarantine_entity(self, event: SecurityEvent, justification: str):
+        # Tâches de remédiation et histogrammes de latence par action
+        self.jobs = JobTracker(max_finished=config.remediation_jobs_kept)
+
+        # Quarantaines appliquées, levées à échéance par la boucle d'expiration
+        self.quarantines = QuarantineTable(
+            max_duration=config.max_quarantine_duration,
+            resolution=config.quarantine_tick_interval
+        )
+
+        self.metrics: Dict[str, float] = {
+            "actions_taken": 0,
+            "quarantines_extended": 0,
+            "quarantines_released": 0,
+            "quarantines_preexisting": 0,
+        }
+
+    def _action_for(self, event: SecurityEvent, justification: str, risk_score: float) -> Optional[RemediationAction]:
+        """Action de quarantaine applicable à l'entité de l'événement, selon les seuils d'AegisConfig."""
+        if event.user_context and event.user_context.username:
+            if not self.config.auto_quarantine_enabled or risk_score < self.config.quarantine_risk_threshold:
+                return None
+            # sAMAccountName : sans préfixe de domaine NetBIOS ni suffixe UPN
+            username = event.user_context.username.rsplit('\\', 1)[-1].split('@', 1)[0]
+            return RemediationAction(ActionType.DISABLE_ACCOUNT, username.lower(), justification, [event.event_id])
+
+        if event.device_context and event.device_context.hostname:
+            if not self.config.auto_network_isolation_enabled or risk_score < self.config.isolation_risk_threshold:
+                return None
+            hostname = event.device_context.hostname.split('.', 1)[0]
+            return RemediationAction(ActionType.ISOLATE_HOST, hostname.lower(), justification, [event.event_id])
+
+        return None
+
+    def _submit(self, action: RemediationAction) -> str:
+        """Dépose une action dans la file et retourne l'identifiant de sa tâche."""
+        job = self.jobs.create(action.action, action.entity)
+        action.job_ids.append(job.job_id)
+
+        outcome = self.remediation.submit(action)
+        if outcome == SubmitOutcome.SUPPRESSED:
+            self.jobs.finish(job.job_id, JobStatus.SKIPPED, "Action déjà appliquée récemment")
+        elif outcome == SubmitOutcome.DROPPED:
+            self.jobs.finish(job.job_id, JobStatus.DROPPED, "File de remédiation pleine")
+        return job.job_id
+
+    async def quarantine_entity(self, event: SecurityEvent, justification: str, risk_score: float = 1.0) -> str:
         """
-        Place une entité (utilisateur, machine) en quarantaine (simulation).
+        Dépose la mise en quarantaine de l'entité (utilisateur, sinon machine)
+        et retourne l'identifiant de la tâche sans attendre son exécution. Une
+        entité déjà en quarantaine voit sa quarantaine prolongée.
         """
-        target_entity = "N/A"
-        if event.user_context:
-            target_entity = f"Utilisateur '{event.user_context.username}'"
-        elif event.device_context:
-            target_entity = f"Machine '{event.device_context.hostname}'"
-
-        self.logger.critical(
-            f"ACTION AEGIS : Mise en quarantaine simulée de l'entité : {target_entity}. "
-            f"Justification : {justification}"
-        )
-        # Ici, on pourrait implémenter la vraie remédiation (désactivation AD, isolation réseau, etc.)
+        action = self._action_for(event, justification, risk_score)
+        if action is None:
+            self.logger.warning(
+                f"AEGIS : quarantaine non appliquée pour l'événement {event.event_id} "
+                f"(action automatique désactivée ou risque {risk_score:.2f} sous le seuil). "
+                f"Justification : {justification}"
+            )
+            job = self.jobs.create(None, None)
+            self.jobs.finish(job.job_id, JobStatus.SKIPPED, "Action automatique désactivée ou seuil non atteint")
+            return job.job_id
 
-    async def handle_decoy_interaction(self, event: SecurityEvent):
-        await self.quarantine_entity(event, "Interaction détectée avec un leurre Hydra.")
+        entry = self.quarantines.get(action.key)
+        if entry is not None and entry.applied:
+            self.quarantines.add(action.action, action.entity, justification, self.config.default_quarantine_duration)
+            self.metrics["quarantines_extended"] += 1
+            job = self.jobs.create(action.action, action.entity)
+            self.jobs.finish(job.job_id, JobStatus.SKIPPED, "Quarantaine en cours prolongée")
+            return job.job_id
 
-    async def handle_high_risk_event(self, event: SecurityEvent, analysis_result: dict):
+        return self._submit(action)
+
+    def _on_action_result(self, result: ActionResult) -> None:
+        """Clôt les tâches de l'action et tient la table des quarantaines à jour."""
+        action = result.action
+        if not result.success:
+            self.jobs.finish_all(action.job_ids, JobStatus.FAILED, result.error)
+            return
+
+        self.metrics["actions_taken"] += 1
+        if action.action in RELEASE_ACTIONS:  # Mise en quarantaine
+            # Un compte déjà désactivé (par un administrateur) ne sera pas réactivé à échéance
+            self.quarantines.add(action.action, action.entity, action.justification,
+                                 self.config.default_quarantine_duration, applied=result.changed)
+            if not result.changed:
+                self.metrics["quarantines_preexisting"] += 1
+                self.jobs.finish_all(action.job_ids, JobStatus.COMPLETED, "Déjà en vigueur : aucune levée programmée")
+                return
+            self.remediation.forget((RELEASE_ACTIONS[action.action], action.entity))
+        else:  # Levée
+            self.metrics["quarantines_released"] += 1
+            self.remediation.forget((QUARANTINE_ACTIONS[action.action], action.entity))
+        self.jobs.finish_all(action.job_ids, JobStatus.COMPLETED)
+
+    async def _expiry_loop(self) -> None:
+        """Lève les quarantaines échues et sauvegarde périodiquement la table."""
+        last_snapshot = time.monotonic()
+        while True:
+            await asyncio.sleep(self.config.quarantine_tick_interval)
+            try:
+                for entry in self.quarantines.expire():
+                    if not entry.applied:
+                        continue
+                    self._submit(RemediationAction(
+                        RELEASE_ACTIONS[entry.action], entry.entity,
+                        f"Fin de quarantaine ({entry.justification})"
+                    ))
+
+                if (self.quarantines.dirty
+                        and time.monotonic() - last_snapshot >= self.config.quarantine_snapshot_interval):
+                    await self._save_quarantines()
+                    last_snapshot = time.monotonic()
+            except Exception as e:
+                self.logger.error(f"Erreur lors de l'expiration des quarantaines : {e}")
+
+    async def _save_quarantines(self) -> None:
+        """
+        Sauvegarde la table hors de la boucle d'événements : la copie est prise
+        sur la boucle, seuls l'écriture et le fsync partent dans un thread.
+        """
+        payload = self.quarantines.snapshot()
+        try:
+            await asyncio.to_thread(QuarantineTable.write_snapshot, self.config.quarantine_snapshot_path, payload)
+        except BaseException:
+            self.quarantines.dirty = True
+            raise
+
+    async def handle_decoy_interaction(self, event: SecurityEvent) -> str:
+        """Gère une interaction avec un leurre ; retourne l'identifiant de la tâche."""
+        self.logger.warning(f"Interaction avec leurre détectée : {event.event_id}")
+        return await self.quarantine_entity(event, "Interaction détectée avec un leurre Hydra.")
+
+    async def handle_high_risk_event(self, event: SecurityEvent, analysis_result: dict) -> str:
+        """Gère un événement à haut risque ; retourne l'identifiant de la tâche."""
         justification = analysis_result.get("justification", "Haut risque détecté par l'IA Cassandra.")
-        await self.quarantine_entity(event, justification)
+        risk_score = analysis_result.get("risk_score", 1.0)
+        return await self.quarantine_entity(event, justification, risk_score)
+
+    async def handle_high_risk(self, event: SecurityEvent, risk_assessment: Any,
+                               justification: Optional[str] = None) -> str:
+        """
+        Variante acceptant directement un RiskAssessment de Cassandra ; la
+        justification par défaut est celle de l'évaluation.
+        """
+        return await self.handle_high_risk_event(event, {
+            "justification": justification or risk_assessment.justification
+            or "Haut risque détecté par l'IA Cassandra.",
+            "risk_score": risk_assessment.risk_score,
+        })
+
+    def get_job(self, job_id: str) -> Optional[RemediationJob]:
+        return self.jobs.get(job_id)
+
+    async def wait_for_job(self, job_id: str, timeout: Optional[float] = None) -> Optional[RemediationJob]:
+        """Attend la fin d'une tâche ; None si elle est inconnue."""
+        return await self.jobs.wait(job_id, timeout)
+
+    async def start(self) -> None:
+        """Démarre le module Aegis."""
+        try:
+            restored = await asyncio.to_thread(self.quarantines.load, self.config.quarantine_snapshot_path)
+            if restored:
+                self.logger.info(f"{restored} quarantaines restaurées depuis {self.config.quarantine_snapshot_path}")
+        except Exception as e:
+            self.logger.error(f"Impossible de restaurer les quarantaines : {e}")
+
+        await self.remediation.start()
+        self._expiry_task = asyncio.create_task(self._expiry_loop())
+        self.logger.info(f"Module Aegis démarré (backend {self.backend.name})")
+        self.is_running = True
+
+    async def stop(self) -> None:
+        """Arrête le module Aegis."""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            await asyncio.gather(self._expiry_task, return_exceptions=True)
+            self._expiry_task = None
+        await self.remediation.stop()
+        self.jobs.abandon_pending("Arrêt d'Aegis avant exécution")
+
+        try:
+            await self._save_quarantines()
+        except Exception as e:
+            self.logger.error(f"Impossible de sauvegarder les quarantaines : {e}")
+        self.logger.info("Module Aegis arrêté")
+        self.is_running = False
+
+    async def get_health_status(self) -> HealthStatus:
+        """Retourne le statut de santé du module."""
+        return HealthStatus(
+            name="aegis",
+            status="running" if self.is_running else "stopped",
+            last_heartbeat=datetime.now(),
+            metrics={
+                "actions_taken": self.metrics["actions_taken"],
+                "quarantines_active": len(self.quarantines)
+            }
+        )
 
-    async def start(self):
-        pass
-    async def stop(self):
-        pass 
\ No newline at end of file
+    async def get_metrics(self) -> Dict[str, float]:
+        """Retourne les métriques du module."""
+        histograms = self.jobs.histograms.values()
+        observed = sum(histogram.count for histogram in histograms)
+        metrics = {
+            "actions_taken": float(self.metrics["actions_taken"]),
+            "quarantines_active": float(len(self.quarantines)),
+            "quarantines_extended": float(self.metrics["quarantines_extended"]),
+            "quarantines_released": float(self.metrics["quarantines_released"]),
+            "jobs_pending": float(len(self.jobs)),
+            "avg_response_time": sum(histogram.total for histogram in histograms) / observed if observed else 0.0,
+            **{f"remediation_{name}": float(value) for name, value in self.remediation.snapshot().items()}
+        }
+        for action, histogram in self.jobs.histograms.items():
+            for name, value in histogram.snapshot().items():
+                metrics[f"latency_{action.value}_{name}"] = value
+        return metrics
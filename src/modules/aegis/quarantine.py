@@ -0,0 +1,242 @@
+"""
+Table des quarantaines actives d'Aegis
+
+Chaque quarantaine appliquée est inscrite avec son échéance dans une roue
+temporelle hiérarchique : l'ajout, la prolongation et la levée sont en O(1) et
+chaque tick ne parcourt que l'intervalle courant, quel que soit le nombre de
+quarantaines actives — aucune tâche d'attente par entité. Les niveaux
+supérieurs couvrent les échéances lointaines et sont redescendus au fil du
+temps.
+
+La table est sauvegardée sur disque (remplacement atomique) pour survivre à un
+redémarrage : les quarantaines échues entre-temps sont levées au premier tick.
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .remediation import ActionType
+
+
+class TimerWheel:
+    """Roue temporelle hiérarchique : `levels` niveaux de 2^slot_bits intervalles."""
+
+    def __init__(self, start_tick: int, levels: int = 4, slot_bits: int = 6):
+        self.current = start_tick
+        self.levels = levels
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        # Par niveau et par intervalle : {clé: tick d'échéance}
+        self._wheels: List[List[Dict[Hashable, int]]] = [
+            [{} for _ in range(1 << slot_bits)] for _ in range(levels)
+        ]
+        self._locations: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._locations
+
+    def schedule(self, key: Hashable, deadline: int) -> None:
+        """(Re)programme `key` ; une échéance passée expire au prochain tick."""
+        self.cancel(key)
+        self._insert(key, max(deadline, self.current + 1))
+
+    def cancel(self, key: Hashable) -> bool:
+        location = self._locations.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        del self._wheels[level][slot][key]
+        return True
+
+    def _insert(self, key: Hashable, deadline: int) -> None:
+        delta = deadline - self.current
+        level = 0
+        while level < self.levels - 1 and delta >> (self.slot_bits * (level + 1)):
+            level += 1
+        # Au-delà de la portée du dernier niveau, l'entrée est redescendue puis
+        # réinsérée à chaque tour de ce niveau jusqu'à son échéance.
+        slot = (deadline >> (self.slot_bits * level)) & self.slot_mask
+        self._wheels[level][slot][key] = deadline
+        self._locations[key] = (level, slot)
+
+    def advance(self, now_tick: int) -> List[Hashable]:
+        """Avance jusqu'à `now_tick` et retourne les clés échues, dans l'ordre des échéances."""
+        expired: List[Hashable] = []
+        while self.current < now_tick:
+            if not self._locations:
+                self.current = now_tick
+                break
+            self.current += 1
+            tick = self.current
+
+            # Redescente des niveaux supérieurs dont un tour commence à ce tick
+            for level in range(self.levels - 1, 0, -1):
+                shift = self.slot_bits * level
+                if tick & ((1 << shift) - 1):
+                    continue
+                slot = (tick >> shift) & self.slot_mask
+                entries = self._wheels[level][slot]
+                if entries:
+                    self._wheels[level][slot] = {}
+                    for key, deadline in entries.items():
+                        del self._locations[key]
+                        self._insert(key, deadline)
+
+            slot = tick & self.slot_mask
+            entries = self._wheels[0][slot]
+            if entries:
+                self._wheels[0][slot] = {}
+                for key, deadline in entries.items():
+                    del self._locations[key]
+                    if deadline <= tick:
+                        expired.append(key)
+                    else:
+                        self._insert(key, deadline)
+        return expired
+
+
+@dataclass
+class QuarantineEntry:
+    """Quarantaine appliquée à une entité."""
+    action: ActionType
+    entity: str
+    justification: str
+    started_at: float
+    expires_at: float
+    # Compte désactivé par Aegis ; sinon (déjà désactivé par un administrateur) rien n'est levé à échéance
+    applied: bool = True
+
+    @property
+    def key(self) -> Tuple[ActionType, str]:
+        return self.action, self.entity
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), 'action': self.action.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuarantineEntry":
+        return cls(**{**data, 'action': ActionType(data['action'])})
+
+
+class QuarantineTable:
+    """Quarantaines actives indexées par (action, entité), échues via la roue temporelle."""
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, max_duration: float, resolution: float = 1.0, now: Optional[float] = None):
+        self.max_duration = max_duration
+        self.resolution = resolution
+        self._entries: Dict[Tuple[ActionType, str], QuarantineEntry] = {}
+        self._wheel = TimerWheel(self._tick(time.time() if now is None else now))
+        self.dirty = False
+
+    def _tick(self, timestamp: float) -> int:
+        # Arrondi supérieur : une quarantaine n'est jamais levée avant son échéance
+        return -int(-timestamp // self.resolution)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Tuple[ActionType, str]) -> bool:
+        return key in self._entries
+
+    def get(self, key: Tuple[ActionType, str]) -> Optional[QuarantineEntry]:
+        return self._entries.get(key)
+
+    def entries(self) -> List[QuarantineEntry]:
+        return list(self._entries.values())
+
+    def add(self, action: ActionType, entity: str, justification: str, duration: float,
+            now: Optional[float] = None, applied: bool = True) -> QuarantineEntry:
+        """
+        Inscrit une quarantaine, ou prolonge celle en cours sans dépasser
+        `max_duration` depuis son début. `applied` indique qu'Aegis a lui-même
+        modifié le compte : seules ces quarantaines sont levées à échéance.
+        """
+        now = time.time() if now is None else now
+        key = (action, entity)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = QuarantineEntry(action, entity, justification, now, now + min(duration, self.max_duration),
+                                    applied)
+            self._entries[key] = entry
+        else:
+            entry.expires_at = max(entry.expires_at, min(now + duration, entry.started_at + self.max_duration))
+            entry.justification = justification
+            entry.applied = entry.applied or applied
+        self._wheel.schedule(key, self._tick(entry.expires_at))
+        self.dirty = True
+        return entry
+
+    def remove(self, key: Tuple[ActionType, str]) -> Optional[QuarantineEntry]:
+        """Retire une quarantaine avant échéance (levée manuelle)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._wheel.cancel(key)
+            self.dirty = True
+        return entry
+
+    def expire(self, now: Optional[float] = None) -> List[QuarantineEntry]:
+        """Retire et retourne les quarantaines échues à `now`."""
+        now = time.time() if now is None else now
+        expired = [self._entries.pop(key) for key in self._wheel.advance(int(now // self.resolution))]
+        if expired:
+            self.dirty = True
+        return expired
+
+    def snapshot(self) -> Dict:
+        """
+        Copie de la table à écrire avec `write_snapshot` ; à prendre depuis la
+        boucle d'événements, qui seule modifie la table.
+        """
+        self.dirty = False
+        return {
+            'version': self.SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'entries': [entry.to_dict() for entry in self._entries.values()],
+        }
+
+    @staticmethod
+    def write_snapshot(path: str, payload: Dict) -> None:
+        """Écrit une copie de la table dans `path` par remplacement atomique (bloquant)."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(target.name + '.tmp')
+        with temporary.open('w', encoding='utf-8') as handle:
+            json.dump(payload, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, target)
+
+    def save(self, path: str) -> None:
+        """Écrit la table dans `path` par remplacement atomique."""
+        payload = self.snapshot()
+        try:
+            self.write_snapshot(path, payload)
+        except Exception:
+            self.dirty = True
+            raise
+
+    def load(self, path: str) -> int:
+        """Recharge une sauvegarde ; retourne le nombre de quarantaines restaurées."""
+        target = Path(path)
+        if not target.exists():
+            return 0
+        with target.open(encoding='utf-8') as handle:
+            payload = json.load(handle)
+        if payload.get('version') != self.SNAPSHOT_VERSION:
+            raise ValueError(f"Version de sauvegarde de quarantaines non supportée : {payload.get('version')}")
+
+        for data in payload.get('entries', []):
+            entry = QuarantineEntry.from_dict(data)
+            self._entries[entry.key] = entry
+            self._wheel.schedule(entry.key, self._tick(entry.expires_at))
+        self.dirty = False
+        return len(payload.get('entries', []))
@@ -0,0 +1,265 @@
+"""
+File des actions de remédiation d'Aegis
+
+Les gestionnaires d'alertes ne contactent plus l'annuaire eux-mêmes : ils
+déposent une action dans la file et reviennent aussitôt. Une rafale d'alertes
+sur un même compte ne produit qu'une action — les doublons en attente sont
+fusionnés, et une action déjà exécutée n'est pas rejouée pendant la fenêtre de
+déduplication. Les actions sont exécutées par lots via le backend configuré,
+avec un débit d'appels sortants borné par un seau à jetons.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ActionType(Enum):
+    """Actions de remédiation exécutables par un backend."""
+    DISABLE_ACCOUNT = "disable_account"
+    ISOLATE_HOST = "isolate_host"
+    # Levée de quarantaine
+    ENABLE_ACCOUNT = "enable_account"
+    RELEASE_HOST = "release_host"
+
+
+class SubmitOutcome(Enum):
+    """Sort d'une action déposée dans la file."""
+    QUEUED = "queued"
+    COALESCED = "coalesced"  # Fusionnée avec l'action identique en attente
+    SUPPRESSED = "suppressed"  # Déjà exécutée dans la fenêtre de déduplication
+    DROPPED = "dropped"  # File pleine
+
+
+# Action de levée correspondant à chaque action de quarantaine
+RELEASE_ACTIONS = {
+    ActionType.DISABLE_ACCOUNT: ActionType.ENABLE_ACCOUNT,
+    ActionType.ISOLATE_HOST: ActionType.RELEASE_HOST,
+}
+
+
+@dataclass
+class RemediationAction:
+    """Action sur une entité ; les événements et tâches des doublons fusionnés y sont cumulés."""
+    action: ActionType
+    entity: str
+    justification: str
+    event_ids: List[str] = field(default_factory=list)
+    job_ids: List[str] = field(default_factory=list)
+    attempts: int = 0
+    submitted_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def key(self) -> Tuple[ActionType, str]:
+        return self.action, self.entity
+
+
+@dataclass
+class ActionResult:
+    """Résultat de l'exécution d'une action par le backend."""
+    action: RemediationAction
+    success: bool
+    error: Optional[str] = None
+    changed: bool = False  # L'annuaire a été modifié (False si l'état visé était déjà en vigueur)
+
+
+class TokenBucket:
+    """Limiteur de débit : `rate` jetons par seconde, au plus `burst` en réserve."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, count: int = 1) -> float:
+        """Attend `count` jetons (au plus `burst`) ; retourne le temps d'attente en secondes."""
+        count = min(count, self.burst)
+        waited = 0.0
+        self._refill()
+        while self._tokens < count:
+            delay = (count - self._tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+            self._refill()
+        self._tokens -= count
+        return waited
+
+
+class RemediationQueue:
+    """File asynchrone d'actions dédupliquées, exécutées par lots à débit limité."""
+
+    def __init__(self, backend, dedup_window: float, rate: float, burst: int,
+                 batch_size: int, batch_timeout: float, max_pending: int, max_retries: int = 2,
+                 on_result: Optional[Callable[[ActionResult], None]] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.backend = backend
+        # Appelé une fois par action terminée (succès, ou échec après les nouvelles tentatives)
+        self.on_result = on_result
+        self.dedup_window = dedup_window
+        self.limiter = TokenBucket(rate, burst)
+        # Un lot ne dépasse jamais la réserve du limiteur
+        self.batch_size = max(1, min(batch_size, self.limiter.burst))
+        self.batch_timeout = batch_timeout
+        self.max_pending = max(1, max_pending)
+        self.max_retries = max_retries
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Actions en attente par (action, entité), dans l'ordre d'arrivée
+        self._pending: Dict[Tuple[ActionType, str], RemediationAction] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        # Dernière exécution réussie par (action, entité), la plus ancienne en tête
+        self._recent: "OrderedDict[Tuple[ActionType, str], float]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+        self.metrics: Dict[str, float] = {
+            "submitted": 0,
+            "coalesced": 0,
+            "suppressed": 0,
+            "dropped": 0,
+            "executed": 0,
+            "failed": 0,
+            "retried": 0,
+            "batches": 0,
+            "rate_limited_seconds": 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, action: RemediationAction) -> SubmitOutcome:
+        """
+        Dépose une action sans attendre son exécution. Une action fusionnée
+        avec l'action en attente sur la même entité lui transmet ses
+        événements et ses tâches.
+        """
+        self.metrics["submitted"] += 1
+        key = action.key
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.event_ids.extend(action.event_ids)
+            pending.job_ids.extend(action.job_ids)
+            self.metrics["coalesced"] += 1
+            return SubmitOutcome.COALESCED
+
+        self._expire_recent()
+        if key in self._recent:
+            self.metrics["suppressed"] += 1
+            return SubmitOutcome.SUPPRESSED
+
+        if len(self._pending) >= self.max_pending:
+            self.metrics["dropped"] += 1
+            self.logger.error(f"File de remédiation pleine : action {action.action.value} sur {action.entity} rejetée")
+            return SubmitOutcome.DROPPED
+
+        self._pending[key] = action
+        self._ready.put_nowait(key)
+        return SubmitOutcome.QUEUED
+
+    def forget(self, key: Tuple[ActionType, str]) -> None:
+        """Autorise de nouveau une action récemment exécutée (après la levée de son effet)."""
+        self._recent.pop(key, None)
+
+    def _expire_recent(self) -> None:
+        horizon = time.monotonic() - self.dedup_window
+        while self._recent:
+            key, executed_at = next(iter(self._recent.items()))
+            if executed_at > horizon:
+                break
+            del self._recent[key]
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Arrête l'exécution après avoir tenté de vider la file pendant `drain_timeout` secondes."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._drained(), drain_timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Arrêt d'Aegis : {len(self._pending)} actions de remédiation non exécutées")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _drained(self) -> None:
+        while self._pending:
+            await asyncio.sleep(0.01)
+
+    async def _next_batch(self) -> List[RemediationAction]:
+        """Attend une action puis complète le lot jusqu'à batch_size ou batch_timeout."""
+        keys = [await self._ready.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_timeout
+        while len(keys) < self.batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                keys.append(await asyncio.wait_for(self._ready.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return [self._pending[key] for key in keys]
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            self.metrics["rate_limited_seconds"] += await self.limiter.acquire(len(batch))
+            self.metrics["batches"] += 1
+
+            try:
+                results = await self.backend.execute_batch(batch)
+            except Exception as e:
+                self.logger.error(f"Erreur du backend de remédiation : {e}")
+                results = [ActionResult(action, False, str(e)) for action in batch]
+
+            for result in results:
+                self._complete(result)
+
+    def _complete(self, result: ActionResult) -> None:
+        action = result.action
+        key = action.key
+        if result.success:
+            del self._pending[key]
+            self._recent[key] = time.monotonic()
+            self._recent.move_to_end(key)
+            self.metrics["executed"] += 1
+            self.logger.critical(
+                f"ACTION AEGIS : {action.action.value} sur {action.entity} "
+                f"({len(action.event_ids)} événements). Justification : {action.justification}"
+            )
+            self._notify(result)
+            return
+
+        action.attempts += 1
+        if action.attempts <= self.max_retries:
+            self.metrics["retried"] += 1
+            self._ready.put_nowait(key)
+            return
+
+        del self._pending[key]
+        self.metrics["failed"] += 1
+        self.logger.error(f"Échec de {action.action.value} sur {action.entity} : {result.error}")
+        self._notify(result)
+
+    def _notify(self, result: ActionResult) -> None:
+        if self.on_result is None:
+            return
+        try:
+            self.on_result(result)
+        except Exception as e:
+            self.logger.error(f"Erreur lors du suivi de l'action {result.action.action.value} : {e}")
+
+    def snapshot(self) -> Dict[str, float]:
+        return {**self.metrics, "pending": len(self._pending)}
@@ -0,0 +1,15 @@
+"""
+Module Cassandra - Analyse Comportementale
+
+Le module Cassandra évalue le risque de chaque événement de sécurité,
+par IA locale (Phi-3) ou par règles en mode de fallback.
+"""
+
+from .module import CassandraModule, RiskAssessment
+from .rules import VectorizedRuleScorer
+
+__all__ = [
+    "CassandraModule",
+    "RiskAssessment",
+    "VectorizedRuleScorer",
+]
@@ -0,0 +1,356 @@
+"""
+Détection d'anomalies statistiques de Cassandra
+
+Les événements sont convertis en vecteurs numériques (contexte de l'événement
+et indicateurs fenêtrés des lignes de base), notés par lots avec le modèle
+courant et accumulés pour l'entraînement. Le modèle apprend en ligne
+(`partial_fit` d'un One-Class SVM sur une approximation de noyau RBF,
+normalisation incrémentale) :
+chaque réentraînement repart de la dernière version, dans un processus
+séparé pour ne jamais interrompre l'ingestion.
+
+Les versions sont enregistrées sous `model_path/anomaly` ; la version
+courante est désignée par un pointeur remplacé atomiquement, puis le modèle
+est échangé en mémoire par simple réaffectation.
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+from sklearn.kernel_approximation import RBFSampler
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.preprocessing import StandardScaler
+
+from ...core.batch import EVENT_TYPE_CODES, DictionaryColumn, EventBatch
+from ...core.events import EventType
+from ...core.patterns import PatternMatcher
+from .baselines import BehaviorProfiles, EVENTS, FAILURES, OFF_HOURS
+from .rules import IP_CLASS_EXTERNAL, ip_classes, non_domain_joined
+
+
+FEATURE_NAMES = (
+    'hour_sin', 'hour_cos', 'weekend',
+    'logon', 'authentication_failure', 'group_modification', 'account_change',
+    'external_ip', 'non_domain_joined', 'sensitive_account',
+    'user_short_events', 'user_short_failures', 'user_medium_hosts', 'user_medium_ips',
+    'user_long_off_hours_ratio', 'host_short_users',
+)
+
+ACCOUNT_CHANGE_TYPES = frozenset({
+    EventType.AD_ACCOUNT_CREATED, EventType.AD_ACCOUNT_MODIFIED, EventType.AD_ACCOUNT_DELETED,
+    EventType.AD_PASSWORD_CHANGE,
+})
+
+# Position sur le cercle horaire de chaque minute de la journée
+_MINUTE_ANGLES = [2 * math.pi * (hour + minute / 60.0) / 24.0 for hour in range(24) for minute in range(60)]
+_MINUTE_SIN = np.array([math.sin(angle) for angle in _MINUTE_ANGLES])
+_MINUTE_COS = np.array([math.cos(angle) for angle in _MINUTE_ANGLES])
+
+
+def extract_features(batch: EventBatch, profiles: BehaviorProfiles,
+                     sensitive_accounts: PatternMatcher) -> np.ndarray:
+    """
+    Matrice (lignes du lot x FEATURE_NAMES) ; les profils doivent déjà inclure
+    les événements. Les indicateurs des lignes de base sont lus une fois par
+    utilisateur et par machine distincts du lot.
+    """
+    features = np.zeros((len(batch), len(FEATURE_NAMES)), dtype=np.float64)
+    if not len(batch):
+        return features
+
+    local = batch.local_seconds()
+    minute_of_day = local // 60 % (24 * 60)
+    features[:, 0] = _MINUTE_SIN[minute_of_day]
+    features[:, 1] = _MINUTE_COS[minute_of_day]
+    # Le 1er janvier 1970 était un jeudi (weekday() == 3)
+    features[:, 2] = (local // 86400 + 3) % 7 >= 5
+
+    logon = batch.event_type == EVENT_TYPE_CODES[EventType.AD_LOGON]
+    failure = batch.event_type == EVENT_TYPE_CODES[EventType.KERBEROS_AUTHENTICATION_FAILURE]
+    # Échecs d'ouverture de session : mêmes critères que baselines.is_authentication_failure
+    tags, raw_data = batch.objects['tags'], batch.objects['raw_data']
+    for row in np.flatnonzero(logon).tolist():
+        failure[row] = (tags[row] is not None and 'failed' in tags[row]) or (raw_data[row] or {}).get('EventID') == 4625
+    features[:, 3] = logon
+    features[:, 4] = failure
+    features[:, 5] = batch.is_type(EventType.AD_GROUP_MODIFIED)
+    features[:, 6] = batch.is_type(*ACCOUNT_CHANGE_TYPES)
+    features[:, 7] = ip_classes(batch) == IP_CLASS_EXTERNAL
+    features[:, 8] = non_domain_joined(batch)
+    features[:, 9] = batch.username.map(
+        lambda username: sensitive_accounts.search(username.lower()), missing=False, dtype=bool
+    )
+
+    def user_features(username: str) -> tuple:
+        user_profile = profiles.profile(f"user:{username.lower()}") if username else None
+        if user_profile is None:
+            return (0.0,) * 5
+        short, medium, long = (user_profile.windows[name] for name in ('short', 'medium', 'long'))
+        long_events = long.count(EVENTS)
+        return (
+            math.log1p(short.count(EVENTS)),
+            math.log1p(short.count(FAILURES)),
+            math.log1p(medium.distinct_count('hosts')),
+            math.log1p(medium.distinct_count('ips')),
+            long.count(OFF_HOURS) / long_events if long_events else 0.0,
+        )
+
+    def host_features(hostname: str) -> tuple:
+        host_profile = profiles.profile(f"host:{hostname.lower()}") if hostname else None
+        return (math.log1p(host_profile.windows['short'].distinct_count('users')) if host_profile else 0.0,)
+
+    features[:, 10:15] = _per_value(batch.username, user_features, 5)
+    features[:, 15:16] = _per_value(batch.hostname, host_features, 1)
+    return features
+
+
+def _per_value(column: DictionaryColumn, function: Callable[[Any], tuple], width: int) -> np.ndarray:
+    """Lignes de `width` valeurs calculées une fois par valeur distincte (zéros pour une valeur absente)."""
+    table = np.zeros((len(column.values) + 1, width), dtype=np.float64)
+    for code, value in enumerate(column.values):
+        table[code] = function(value)
+    # Le code -1 désigne la dernière ligne de la table : celle des valeurs absentes
+    return table[column.codes]
+
+
+class AnomalyModel:
+    """Normalisation, noyau RBF approché et One-Class SVM entraînés en ligne."""
+
+    def __init__(self, nu: float = 0.01, n_components: int = 200, random_state: int = 42):
+        self.scaler = StandardScaler()
+        self.kernel: Optional[RBFSampler] = None
+        self.detector = SGDOneClassSVM(nu=nu, random_state=random_state)
+        self.n_components = n_components
+        self.random_state = random_state
+        # Dispersion des décisions sur le dernier lot d'entraînement, pour calibrer le score
+        self.decision_scale = 1.0
+        self.samples_seen = 0
+
+    def partial_fit(self, features: np.ndarray) -> None:
+        self.scaler.partial_fit(features)
+        scaled = self.scaler.transform(features)
+        if self.kernel is None:
+            # Projection aléatoire : ne dépend que du nombre de features, fixée au premier lot
+            self.kernel = RBFSampler(
+                gamma=1.0 / features.shape[1], n_components=self.n_components, random_state=self.random_state
+            ).fit(scaled)
+        projected = self.kernel.transform(scaled)
+        self.detector.partial_fit(projected)
+        self.decision_scale = float(np.std(self.detector.decision_function(projected))) or 1.0
+        self.samples_seen += len(features)
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """Score d'anomalie entre 0 et 1 (0.5 à la frontière apprise)."""
+        decision = self.detector.decision_function(self.kernel.transform(self.scaler.transform(features)))
+        return 1.0 / (1.0 + np.exp(np.clip(decision / self.decision_scale, -50.0, 50.0)))
+
+
+class ModelRegistry:
+    """Versions successives du modèle d'anomalies dans un répertoire."""
+
+    CURRENT = "CURRENT"
+    VERSION_PATTERN = re.compile(r"^v(\d+)\.joblib$")
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, version: int) -> Path:
+        return self.root / f"v{version:06d}.joblib"
+
+    def current_version(self) -> Optional[int]:
+        try:
+            with open(self.root / self.CURRENT, 'r', encoding='utf-8') as f:
+                return int(json.load(f)['version'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def versions(self) -> List[int]:
+        if not self.root.exists():
+            return []
+        return sorted(
+            int(match.group(1)) for match in map(self.VERSION_PATTERN.match, os.listdir(self.root)) if match
+        )
+
+    def load(self, version: Optional[int] = None) -> Optional[AnomalyModel]:
+        version = self.current_version() if version is None else version
+        if version is None:
+            return None
+        return joblib.load(self._path(version))
+
+    def save(self, model: AnomalyModel) -> int:
+        """Enregistre une nouvelle version et en fait la version courante."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        versions = self.versions()
+        version = (versions[-1] if versions else 0) + 1
+
+        _atomic_write(self._path(version), lambda f: joblib.dump(model, f))
+        _atomic_write(
+            self.root / self.CURRENT,
+            lambda f: f.write(json.dumps({'version': version, 'samples_seen': model.samples_seen}).encode('utf-8'))
+        )
+        return version
+
+    def prune(self, keep: int) -> None:
+        """Supprime les versions les plus anciennes, jamais la version courante."""
+        current = self.current_version()
+        for version in self.versions()[:-keep] if keep > 0 else []:
+            if version != current:
+                self._path(version).unlink(missing_ok=True)
+
+
+def _atomic_write(path: Path, write) -> None:
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def train_model_version(registry_root: str, features: np.ndarray, nu: float, versions_kept: int) -> int:
+    """Poursuit l'entraînement de la version courante sur de nouveaux échantillons (processus d'entraînement)."""
+    registry = ModelRegistry(Path(registry_root))
+    model = registry.load() or AnomalyModel(nu=nu)
+    model.partial_fit(features)
+    version = registry.save(model)
+    registry.prune(versions_kept)
+    return version
+
+
+class AnomalyDetector:
+    """Notation par lots et réentraînement périodique du modèle d'anomalies."""
+
+    def __init__(self, config: Any):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.registry = ModelRegistry(Path(config.model_path) / "anomaly")
+        self.model: Optional[AnomalyModel] = None
+        self.version: Optional[int] = None
+
+        # Échantillons non encore appris (anneau : les plus récents sont conservés)
+        self._buffer = np.zeros((max(1, config.anomaly_buffer_size), len(FEATURE_NAMES)))
+        self._buffer_start = 0
+        self._buffer_count = 0
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._training = False
+
+        self.metrics: Dict[str, float] = {
+            "anomalies_detected": 0,
+            "samples_buffered": 0,
+            "samples_dropped": 0,
+            "retrains": 0,
+            "retrain_failures": 0,
+        }
+
+    async def start(self) -> None:
+        """Charge la version courante du modèle et planifie les réentraînements."""
+        try:
+            model = await asyncio.to_thread(self.registry.load)
+            if model is not None:
+                self.model, self.version = model, self.registry.current_version()
+                self.logger.info(f"Modèle d'anomalies v{self.version} chargé ({model.samples_seen} échantillons)")
+        except Exception as e:
+            self.logger.warning(f"Impossible de charger le modèle d'anomalies : {e}")
+
+        # spawn : le processus d'entraînement ne duplique pas les threads d'inférence.
+        # src.core est importé en premier, comme dans le processus principal.
+        self._executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=importlib.import_module,
+            initargs=("src.core",)
+        )
+        self._task = asyncio.create_task(self._retrain_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def observe(self, features: np.ndarray) -> None:
+        """Ajoute des échantillons à apprendre lors du prochain réentraînement."""
+        capacity = len(self._buffer)
+        if len(features) >= capacity:
+            dropped = self._buffer_count + len(features) - capacity
+            self._buffer[:] = features[-capacity:]
+            self._buffer_start, self._buffer_count = 0, capacity
+        else:
+            dropped = max(0, self._buffer_count + len(features) - capacity)
+            end = (self._buffer_start + self._buffer_count) % capacity
+            first = min(len(features), capacity - end)
+            self._buffer[end:end + first] = features[:first]
+            self._buffer[:len(features) - first] = features[first:]
+            self._buffer_count += len(features) - dropped
+            self._buffer_start = (self._buffer_start + dropped) % capacity
+
+        self.metrics["samples_dropped"] += dropped
+        self.metrics["samples_buffered"] = self._buffer_count
+
+    def score(self, features: np.ndarray) -> Optional[np.ndarray]:
+        """Scores d'anomalie du lot, ou None tant qu'aucun modèle n'est entraîné."""
+        model = self.model
+        if model is None or not len(features):
+            return None
+        scores = model.score(features)
+        self.metrics["anomalies_detected"] += int(np.count_nonzero(scores >= self.config.anomaly_threshold))
+        return scores
+
+    def _drain(self) -> np.ndarray:
+        indexes = (self._buffer_start + np.arange(self._buffer_count)) % len(self._buffer)
+        samples = self._buffer[indexes]
+        self._buffer_start = self._buffer_count = 0
+        self.metrics["samples_buffered"] = 0
+        return samples
+
+    async def _retrain_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.retrain_interval)
+            await self.retrain()
+
+    async def retrain(self) -> Optional[int]:
+        """Entraîne une nouvelle version hors de la boucle d'événements puis l'échange en mémoire."""
+        if self._training or self._executor is None:
+            return None
+        if self._buffer_count < self.config.min_training_samples:
+            self.logger.debug(
+                f"Réentraînement reporté : {self._buffer_count}/{self.config.min_training_samples} échantillons"
+            )
+            return None
+
+        self._training = True
+        samples = self._drain()
+        try:
+            loop = asyncio.get_running_loop()
+            version = await loop.run_in_executor(
+                self._executor, train_model_version,
+                str(self.registry.root), samples, self.config.anomaly_nu, self.config.anomaly_versions_kept
+            )
+            model = await asyncio.to_thread(self.registry.load, version)
+            # Échange atomique : les notations en cours gardent leur référence
+            self.model, self.version = model, version
+            self.metrics["retrains"] += 1
+            self.logger.info(f"Modèle d'anomalies v{version} en service ({model.samples_seen} échantillons)")
+            return version
+        except Exception as e:
+            self.metrics["retrain_failures"] += 1
+            self.logger.error(f"Erreur lors du réentraînement du modèle d'anomalies : {e}")
+            return None
+        finally:
+            self._training = False
@@ -0,0 +1,18 @@
+"""
+Résultat d'évaluation des risques produit par Cassandra
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from ...core.events import RiskLevel
+
+
+@dataclass
+class RiskAssessment:
+    """Évaluation des risques d'un événement."""
+    risk_score: float
+    risk_level: RiskLevel
+    confidence: float
+    factors: Dict[str, float]  # Poids de chaque facteur de risque
+    justification: Optional[str] = None  # Explication du facteur retenu
@@ -0,0 +1,245 @@
+"""
+Lignes de base comportementales de Cassandra
+
+Chaque utilisateur et chaque machine possède un état par fenêtre glissante
+(court, moyen et long terme de CassandraConfig). Une fenêtre est un anneau de
+N intervalles de temps : l'ajout d'un événement et la lecture des totaux sont
+en O(1) amorti, les intervalles expirés sont soustraits au fil de l'eau et la
+mémoire par entité est bornée.
+
+Les indicateurs fenêtrés (échecs d'authentification, machines et adresses
+distinctes, part d'activité hors heures) révèlent des schémas invisibles
+événement par événement : force brute, password spraying, mouvement latéral.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...core.events import SecurityEvent, EventType
+
+
+# Compteurs tenus dans chaque intervalle
+EVENTS, LOGONS, FAILURES, OFF_HOURS = range(4)
+COUNTER_NAMES = ('events', 'logons', 'failures', 'off_hours')
+
+
+class WindowState:
+    """Compteurs et valeurs distinctes d'une entité sur une fenêtre glissante."""
+
+    __slots__ = ('size', 'width', 'head', 'counts', 'totals', 'bucket_values', 'distinct')
+
+    def __init__(self, window: int, buckets: int):
+        self.size = buckets
+        self.width = window / buckets
+        self.head: Optional[int] = None
+        self.counts = [0] * (buckets * len(COUNTER_NAMES))
+        self.totals = [0] * len(COUNTER_NAMES)
+        # Par intervalle : {dimension: {valeur: occurrences}}, alloué à la demande
+        self.bucket_values: List[Optional[Dict[str, Dict[str, int]]]] = [None] * buckets
+        # Sur la fenêtre : {dimension: {valeur: occurrences}}
+        self.distinct: Dict[str, Dict[str, int]] = {}
+
+    def record(self, timestamp: float, increments: Tuple[int, ...], values: Dict[str, Optional[str]]) -> None:
+        """Ajoute un événement ; un événement antérieur à la fenêtre est ignoré."""
+        index = int(timestamp // self.width)
+        self._advance(index)
+        if index <= self.head - self.size:
+            return
+
+        slot = index % self.size
+        base = slot * len(COUNTER_NAMES)
+        for counter, increment in enumerate(increments):
+            if increment:
+                self.counts[base + counter] += increment
+                self.totals[counter] += increment
+
+        for dimension, value in values.items():
+            if not value:
+                continue
+            bucket = self.bucket_values[slot]
+            if bucket is None:
+                bucket = self.bucket_values[slot] = {}
+            seen = bucket.setdefault(dimension, {})
+            seen[value] = seen.get(value, 0) + 1
+            window_values = self.distinct.setdefault(dimension, {})
+            window_values[value] = window_values.get(value, 0) + 1
+
+    def _advance(self, index: int) -> None:
+        """Fait glisser la fenêtre jusqu'à l'intervalle `index` en vidant les intervalles expirés."""
+        if self.head is None:
+            self.head = index
+            return
+        if index <= self.head:
+            return
+
+        counter_count = len(COUNTER_NAMES)
+        for expired in range(self.head + 1, min(index, self.head + self.size) + 1):
+            slot = expired % self.size
+            base = slot * counter_count
+            for counter in range(counter_count):
+                self.totals[counter] -= self.counts[base + counter]
+                self.counts[base + counter] = 0
+
+            bucket = self.bucket_values[slot]
+            if bucket:
+                for dimension, seen in bucket.items():
+                    window_values = self.distinct[dimension]
+                    for value, occurrences in seen.items():
+                        remaining = window_values[value] - occurrences
+                        if remaining:
+                            window_values[value] = remaining
+                        else:
+                            del window_values[value]
+                self.bucket_values[slot] = None
+        self.head = index
+
+    def count(self, counter: int) -> int:
+        return self.totals[counter]
+
+    def distinct_count(self, dimension: str) -> int:
+        return len(self.distinct.get(dimension, ()))
+
+    def snapshot(self) -> Dict[str, Any]:
+        events = self.totals[EVENTS]
+        logons = self.totals[LOGONS]
+        return {
+            **dict(zip(COUNTER_NAMES, self.totals)),
+            **{f"distinct_{dimension}": len(values) for dimension, values in self.distinct.items()},
+            'failure_rate': self.totals[FAILURES] / logons if logons else 0.0,
+            'off_hours_ratio': self.totals[OFF_HOURS] / events if events else 0.0,
+        }
+
+
+class EntityProfile:
+    """État comportemental d'un utilisateur ou d'une machine."""
+
+    __slots__ = ('first_seen', 'windows')
+
+    def __init__(self, first_seen: float, windows: Dict[str, int], buckets: int):
+        self.first_seen = first_seen
+        self.windows = {name: WindowState(length, buckets) for name, length in windows.items()}
+
+    def record(self, timestamp: float, increments: Tuple[int, ...], values: Dict[str, Optional[str]]) -> None:
+        self.first_seen = min(self.first_seen, timestamp)
+        for window in self.windows.values():
+            window.record(timestamp, increments, values)
+
+
+@dataclass(frozen=True)
+class BehaviorSignal:
+    """Indicateur comportemental ajouté au score de risque."""
+    factor: str
+    weight: float
+    justification: str
+
+
+class BehaviorProfiles:
+    """Lignes de base par utilisateur et par machine, bornées en nombre d'entités (LRU)."""
+
+    def __init__(self, config: Any):
+        self.config = config
+        self.windows = {
+            'short': config.short_term_window,
+            'medium': config.medium_term_window,
+            'long': config.long_term_window,
+        }
+        self.buckets = max(1, config.baseline_buckets)
+        self.max_entities = max(1, config.baseline_max_entities)
+        self._profiles: "OrderedDict[str, EntityProfile]" = OrderedDict()
+        self.metrics: Dict[str, float] = {"profiles_evicted": 0, "behavior_signals": 0}
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def profile(self, key: str) -> Optional[EntityProfile]:
+        return self._profiles.get(key)
+
+    def observe(self, event: SecurityEvent) -> List[BehaviorSignal]:
+        """Met à jour les profils de l'utilisateur et de la machine et retourne les indicateurs levés."""
+        timestamp = event.timestamp_ns / 1e9
+        hour = event.timestamp.hour
+        is_logon = event.event_type == EventType.AD_LOGON
+        is_failure = is_authentication_failure(event)
+        off_hours = hour < 6 or hour > 22
+        increments = (1, int(is_logon), int(is_failure), int(off_hours))
+
+        user = event.user_context
+        device = event.device_context
+        username = user.username.lower() if user and user.username else None
+        hostname = device.hostname.lower() if device and device.hostname else None
+        ip_address = device.ip_address if device else None
+
+        user_profile = host_profile = None
+        if username:
+            user_profile = self._touch(f"user:{username}", timestamp)
+            user_profile.record(timestamp, increments, {'hosts': hostname, 'ips': ip_address})
+        if hostname:
+            host_profile = self._touch(f"host:{hostname}", timestamp)
+            host_profile.record(timestamp, increments, {'users': username, 'ips': ip_address})
+
+        signals = self._evaluate(timestamp, off_hours, user_profile, host_profile)
+        self.metrics["behavior_signals"] += len(signals)
+        return signals
+
+    def _touch(self, key: str, timestamp: float) -> EntityProfile:
+        profile = self._profiles.get(key)
+        if profile is None:
+            profile = self._profiles[key] = EntityProfile(timestamp, self.windows, self.buckets)
+            if len(self._profiles) > self.max_entities:
+                self._profiles.popitem(last=False)
+                self.metrics["profiles_evicted"] += 1
+        else:
+            self._profiles.move_to_end(key)
+        return profile
+
+    def _evaluate(self, timestamp: float, off_hours: bool, user_profile: Optional[EntityProfile],
+                  host_profile: Optional[EntityProfile]) -> List[BehaviorSignal]:
+        config = self.config
+        signals = []
+
+        if user_profile is not None:
+            short = user_profile.windows['short']
+            medium = user_profile.windows['medium']
+            long = user_profile.windows['long']
+
+            if config.analyze_logon_patterns:
+                failures = short.count(FAILURES)
+                logons = short.count(LOGONS)
+                if failures >= config.brute_force_failures and failures * 2 >= logons:
+                    signals.append(BehaviorSignal(
+                        'brute_force', 2.0, "Échecs d'authentification répétés (force brute)"
+                    ))
+
+                # Écart à la ligne de base : seulement une fois la période d'apprentissage écoulée
+                learned = timestamp - user_profile.first_seen >= config.baseline_learning_period
+                previous_events = long.count(EVENTS) - 1
+                if off_hours and learned and previous_events > 0:
+                    usual_ratio = (long.count(OFF_HOURS) - 1) / previous_events
+                    if usual_ratio <= config.off_hours_baseline_ratio:
+                        signals.append(BehaviorSignal(
+                            'unusual_off_hours', 1.0, "Activité hors heures inhabituelle pour ce compte"
+                        ))
+
+            if config.analyze_access_patterns and medium.distinct_count('hosts') >= config.lateral_movement_hosts:
+                signals.append(BehaviorSignal(
+                    'lateral_movement', 1.5, "Connexions vers de nombreuses machines (mouvement latéral)"
+                ))
+
+        if host_profile is not None and config.analyze_network_patterns:
+            short = host_profile.windows['short']
+            if (short.count(FAILURES) >= config.password_spraying_accounts
+                    and short.distinct_count('users') >= config.password_spraying_accounts):
+                signals.append(BehaviorSignal(
+                    'password_spraying', 2.0, "Échecs sur de nombreux comptes depuis une même machine"
+                ))
+
+        return signals
+
+
+def is_authentication_failure(event: SecurityEvent) -> bool:
+    if event.event_type == EventType.KERBEROS_AUTHENTICATION_FAILURE:
+        return True
+    if event.event_type != EventType.AD_LOGON:
+        return False
+    return event.has_tag('failed') or (event.raw_data or {}).get('EventID') == 4625
@@ -0,0 +1,140 @@
+"""
+Cache des évaluations IA de Cassandra
+
+Le trafic AD est très répétitif (un compte de service qui s'authentifie sur
+la même machine chaque minute) : chaque événement est ramené à une clé
+canonique — heure arrondie à un intervalle, champs volatils retirés — et le
+RiskAssessment produit par le modèle est réutilisé tant qu'il n'a pas expiré.
+Les demandes identiques simultanées partagent une seule génération.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ...core.events import SecurityEvent
+from .assessment import RiskAssessment
+
+
+# Champs bruts qui changent d'une occurrence à l'autre sans changer le risque
+VOLATILE_RAW_FIELDS = frozenset({
+    'TimeGenerated', 'TimeWritten', 'RecordNumber', 'EventRecordID',
+    'LogonId', 'TargetLogonId', 'ProcessId', 'ProcessID', 'ThreadID',
+    'timestamp',
+    # Inserts bruts : les champs utiles en sont déjà extraits par nom
+    'StringInserts', 'Inserts',
+})
+
+
+def canonical_event_key(event: SecurityEvent, time_bucket: int = 3600) -> str:
+    """Clé de cache d'un événement : ce que voit le modèle, sans le bruit."""
+    user = event.user_context
+    device = event.device_context
+    bucket = event.timestamp_ns // 1_000_000_000 // time_bucket if time_bucket > 0 else 0
+
+    raw_data = {
+        name: value for name, value in (event.raw_data or {}).items()
+        if name not in VOLATILE_RAW_FIELDS
+    }
+    canonical = [
+        event.event_type.value,
+        user.username.lower() if user else None,
+        user.domain.lower() if user else None,
+        device.hostname.lower() if device else None,
+        device.ip_address if device else None,
+        bucket,
+        raw_data,
+    ]
+    payload = json.dumps(canonical, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class AssessmentCache:
+    """Cache LRU à durée de vie des évaluations de risque."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        # Clé -> (échéance monotone, évaluation), de la moins à la plus récemment utilisée
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.metrics: Dict[str, float] = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Part des demandes servies sans génération (cache ou génération partagée)."""
+        served = self.metrics["hits"] + self.metrics["coalesced"]
+        total = served + self.metrics["misses"]
+        return served / total if total else 0.0
+
+    def get(self, key: str) -> Optional[RiskAssessment]:
+        """Retourne une copie de l'évaluation en cache, ou None si absente ou expirée."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, assessment = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.metrics["expirations"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return replace(assessment, factors=dict(assessment.factors))
+
+    def put(self, key: str, assessment: RiskAssessment) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, assessment)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    async def get_or_create(self, key: str,
+                            factory: Callable[[], Awaitable[Optional[RiskAssessment]]]) -> Optional[RiskAssessment]:
+        """
+        Retourne l'évaluation en cache ou la produit avec `factory`. Les appels
+        concurrents sur la même clé attendent la même production. Un résultat
+        None (pas de réponse du modèle) n'est pas mis en cache.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.metrics["hits"] += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.metrics["coalesced"] += 1
+            assessment = await asyncio.shield(inflight)
+            return replace(assessment, factors=dict(assessment.factors)) if assessment is not None else None
+
+        self.metrics["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        assessment = None
+        try:
+            assessment = await factory()
+            if assessment is None:
+                return None
+            self.put(key, assessment)
+            return replace(assessment, factors=dict(assessment.factors))
+        finally:
+            del self._inflight[key]
+            # Les appels en attente se rabattent sur les règles si rien n'a été produit
+            future.set_result(assessment)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.metrics, "size": len(self._entries), "hit_rate": self.hit_rate}
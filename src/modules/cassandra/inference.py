@@ -0,0 +1,240 @@
+"""
+Moteur d'inférence Phi-3 de Cassandra
+
+Le modèle est chargé en arrière-plan depuis `model_path` (sans accès réseau)
+pendant que le moteur de règles répond seul. Une fois prêt, les prompts des
+événements sont regroupés en lots, complétés par padding et générés en une
+seule passe dans un thread dédié : la boucle asyncio n'est jamais bloquée.
+
+Sortie structurée : le premier token généré peut être restreint à une liste
+de choix (le chiffre du risque) et la génération s'arrête dès qu'une séquence
+d'arrêt est produite par toutes les réponses du lot.
+
+Budget de latence : si la file d'attente est trop profonde ou si la réponse
+n'arrive pas à temps, `generate` retourne None et l'appelant se rabat sur
+l'analyse par règles.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer, LogitsProcessor, LogitsProcessorList
+
+
+class FirstTokenConstraint(LogitsProcessor):
+    """Restreint le premier token généré à un ensemble de tokens autorisés."""
+
+    def __init__(self, prompt_length: int, allowed_token_ids: List[int]):
+        self.prompt_length = prompt_length
+        self.allowed_token_ids = allowed_token_ids
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if input_ids.shape[-1] != self.prompt_length:
+            return scores
+        mask = torch.full_like(scores, float("-inf"))
+        mask[:, self.allowed_token_ids] = 0
+        return scores + mask
+
+
+class InferenceEngine:
+    """Génération par lots du modèle local, exécutée hors de la boucle d'événements."""
+
+    def __init__(self, model_path: str, batch_size: int = 8, batch_timeout: float = 0.05,
+                 max_queue_depth: int = 64, latency_budget: float = 2.0, max_new_tokens: int = 40,
+                 temperature: float = 0.0, first_token_choices: Sequence[str] = (),
+                 stop_tokens: Sequence[str] = ()):
+        self.model_path = Path(model_path)
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = batch_timeout
+        self.max_queue_depth = max_queue_depth
+        self.latency_budget = latency_budget
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature  # 0 : décodage glouton
+        self.first_token_choices = tuple(first_token_choices)
+        self.stop_tokens = tuple(stop_tokens)
+        self.logger = logging.getLogger(__name__)
+
+        self.model = None
+        self.tokenizer = None
+        self.ready = False
+        self._first_token_ids: List[int] = []
+        self._stop_token_ids: List[int] = []
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.metrics: Dict[str, float] = {
+            "prompts_generated": 0,
+            "batches_generated": 0,
+            "avg_batch_size": 0.0,
+            "avg_batch_latency": 0.0,
+            "fallback_not_ready": 0,
+            "fallback_queue_full": 0,
+            "fallback_timeout": 0,
+        }
+
+    async def start(self) -> None:
+        """Lance le chargement du modèle et le regroupement des prompts en arrière-plan."""
+        # Un seul thread : le modèle n'est pas partagé entre générations concurrentes.
+        # Recréé à chaque démarrage, `stop` arrêtant le précédent.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cassandra-llm")
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._load()),
+            asyncio.create_task(self._batch_loop()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.ready = False
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def generate(self, prompt: str) -> Optional[str]:
+        """
+        Retourne la réponse du modèle pour un prompt, ou None si le modèle n'est
+        pas prêt, si la file est saturée ou si le budget de latence est dépassé.
+        """
+        if not self.ready:
+            self.metrics["fallback_not_ready"] += 1
+            return None
+        if self._queue.qsize() >= self.max_queue_depth:
+            self.metrics["fallback_queue_full"] += 1
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((prompt, future))
+        try:
+            # À l'expiration, le future est annulé : le prompt sera ignoré par le lot suivant
+            return await asyncio.wait_for(future, timeout=self.latency_budget)
+        except asyncio.TimeoutError:
+            self.metrics["fallback_timeout"] += 1
+            return None
+
+    async def _load(self) -> None:
+        """Charge le tokenizer et le modèle depuis le répertoire local."""
+        self.logger.info(f"Chargement du modèle Phi-3 depuis {self.model_path}...")
+        started = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            self.tokenizer, self.model = await loop.run_in_executor(self._executor, self._load_sync)
+            self.ready = True
+            self.logger.info(f"Modèle Phi-3 chargé en {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            self.logger.warning(f"Impossible de charger le modèle Phi-3 : {e}")
+            self.logger.info("Poursuite en mode analyse basique (sans IA)")
+
+    def _load_sync(self) -> Tuple[Any, Any]:
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"Répertoire de modèle introuvable : {self.model_path}")
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_path, local_files_only=True)
+        # Modèle décodeur : padding à gauche pour que la génération suive le prompt
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        self._first_token_ids = self._token_ids_for(tokenizer, self.first_token_choices)
+        self._stop_token_ids = [tokenizer.eos_token_id] + [
+            token_id for token_id in tokenizer.convert_tokens_to_ids(list(self.stop_tokens))
+            if token_id is not None and token_id != tokenizer.unk_token_id
+        ]
+
+        model = AutoModelForCausalLM.from_pretrained(
+            self.model_path,
+            local_files_only=True,
+            torch_dtype="auto",
+            device_map="auto"
+        )
+        model.eval()
+        return tokenizer, model
+
+    @staticmethod
+    def _token_ids_for(tokenizer: Any, choices: Sequence[str]) -> List[int]:
+        """Tokens d'un choix, avec ou sans espace initial selon le tokenizer."""
+        token_ids = set()
+        for choice in choices:
+            for text in (choice, f" {choice}"):
+                encoded = tokenizer.encode(text, add_special_tokens=False)
+                if encoded:
+                    token_ids.add(encoded[-1])
+        return sorted(token_ids)
+
+    async def _batch_loop(self) -> None:
+        """Regroupe les prompts en attente et les génère lot par lot."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Les appelants dont le budget est déjà épuisé ne sont pas générés
+            batch = [(prompt, future) for prompt, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            try:
+                responses = await loop.run_in_executor(
+                    self._executor, self._generate_batch, [prompt for prompt, _ in batch]
+                )
+            except Exception as e:
+                self.logger.error(f"Erreur lors de la génération IA : {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+            self._record_batch(len(batch), time.monotonic() - started)
+
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        """Génère les réponses d'un lot de prompts en une seule passe (thread dédié)."""
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
+        prompt_length = inputs["input_ids"].shape[1]
+
+        options: Dict[str, Any] = {"do_sample": False}
+        if self.temperature > 0:
+            options = {"do_sample": True, "temperature": self.temperature}
+        if self._first_token_ids:
+            options["logits_processor"] = LogitsProcessorList([
+                FirstTokenConstraint(prompt_length, self._first_token_ids)
+            ])
+
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                # Arrêt anticipé dès la balise de fin de réponse
+                eos_token_id=self._stop_token_ids,
+                **options
+            )
+        # Seuls les tokens générés après le prompt (commun à tout le lot après padding)
+        generated = outputs[:, prompt_length:]
+        return [text.strip() for text in self.tokenizer.batch_decode(generated, skip_special_tokens=True)]
+
+    def _record_batch(self, size: int, latency: float) -> None:
+        batches = self.metrics["batches_generated"] + 1
+        self.metrics["avg_batch_size"] += (size - self.metrics["avg_batch_size"]) / batches
+        self.metrics["avg_batch_latency"] += (latency - self.metrics["avg_batch_latency"]) / batches
+        self.metrics["batches_generated"] = batches
+        self.metrics["prompts_generated"] += size
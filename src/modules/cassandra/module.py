@@ -0,0 +1,379 @@
+"""
+Module Cassandra - Analyse Comportementale par IA Locale (Version avec Phi-3)
+"""
+
+import asyncio
+import logging
+import numpy as np
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from dataclasses import dataclass, replace
+
+from ...core.batch import EventBatch
+from ...core.events import SecurityEvent, RiskLevel, EventType
+from ...core.patterns import PatternMatcher
+from .anomaly import AnomalyDetector, extract_features
+from .assessment import RiskAssessment
+from .baselines import BehaviorProfiles, BehaviorSignal
+from .cache import AssessmentCache, canonical_event_key
+from .inference import InferenceEngine
+from .parsing import RESPONSE_PREFIX, RISK_CHOICES, END_TAG, parse_risk_response
+from .rules import VectorizedRuleScorer, risk_level_for, PRIVATE_IP_PREFIXES
+
+
+@dataclass
+class HealthStatus:
+    """Statut de santé du module."""
+    name: str
+    status: str
+    last_heartbeat: datetime
+    metrics: Dict[str, float]
+
+
+class CassandraModule:
+    """Module d'analyse comportementale par IA locale (version avec Phi-3)."""
+    
+    def __init__(self, config: Any):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.is_running = False
+        
+        self.metrics: Dict[str, float] = {"unparsed_responses": 0}
+        
+        # Automates des comptes sensibles et des groupes critiques, construits une fois
+        self.sensitive_accounts = PatternMatcher.from_sources(
+            config.sensitive_account_patterns, config.sensitive_accounts_file
+        )
+        self.critical_groups = PatternMatcher.from_sources(
+            config.critical_group_patterns, config.critical_groups_file
+        )
+        
+        # Moteur de règles vectorisé pour l'analyse des lots en mode basique
+        self.rule_scorer = VectorizedRuleScorer(self.sensitive_accounts, self.critical_groups, self.logger)
+        
+        # Lignes de base par utilisateur et par machine sur les fenêtres glissantes
+        self.behavior = BehaviorProfiles(config)
+        
+        # Modèle d'anomalies appris en ligne sur les événements observés
+        self.anomaly = AnomalyDetector(config)
+        
+        # Moteur d'inférence Phi-3, chargé en arrière-plan au démarrage
+        self.inference = InferenceEngine(
+            model_path=config.model_path,
+            batch_size=config.llm_batch_size,
+            batch_timeout=config.llm_batch_timeout_ms / 1000.0,
+            max_queue_depth=config.llm_max_queue_depth,
+            latency_budget=config.llm_latency_budget_ms / 1000.0,
+            max_new_tokens=config.llm_max_new_tokens,
+            first_token_choices=RISK_CHOICES,
+            stop_tokens=(END_TAG,)
+        )
+        
+        # Évaluations IA réutilisées pour les événements répétitifs
+        self.assessment_cache = AssessmentCache(
+            max_entries=config.llm_cache_size,
+            ttl=config.llm_cache_ttl
+        )
+    
+    async def load_model(self) -> None:
+        """Lance le chargement du modèle Phi-3 ; l'analyse basique répond en attendant."""
+        if not self.config.llm_enabled:
+            self.logger.info("Inférence IA désactivée : utilisation de l'analyse basique")
+            return
+        
+        await self.inference.start()
+    
+    def create_prompt(self, event: SecurityEvent) -> str:
+        """Crée un prompt détaillé pour que l'IA puisse l'analyser."""
+        prompt = f"""<|system|>
+Vous êtes un analyste expert en cybersécurité pour le système "Orion AD Guardian". Votre rôle est d'analyser les événements Active Directory pour détecter des menaces subtiles. Restez concis et factuel.
+
+Analysez l'événement suivant et répondez exactement sur deux lignes :
+Risque: <1-Très Faible, 2-Faible, 3-Moyen, 4-Élevé, 5-Critique>
+Justification: <une phrase expliquant votre raisonnement>
+<|end|>
+<|user|>
+Événement à analyser :
+- Type: {event.event_type.name}
+- Utilisateur: {event.user_context.username}@{event.user_context.domain}
+- Machine: {event.device_context.hostname} ({event.device_context.ip_address})
+- Heure: {event.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
+- Données brutes: {event.raw_data}
+<|end|>
+<|assistant|>
+{RESPONSE_PREFIX}"""
+        return prompt
+    
+    async def start(self) -> None:
+        """Démarre le module Cassandra."""
+        await self.load_model()
+        await self.anomaly.start()
+        self.logger.info("Module Cassandra démarré (mode IA locale)")
+        self.is_running = True
+    
+    async def stop(self) -> None:
+        """Arrête le module Cassandra."""
+        await self.inference.stop()
+        await self.anomaly.stop()
+        self.logger.info("Module Cassandra arrêté")
+        self.is_running = False
+    
+    async def analyze_event(self, event: SecurityEvent) -> RiskAssessment:
+        """
+        Analyse un événement en utilisant le modèle Phi-3 local ou une logique basique,
+        complétée par les indicateurs comportementaux de l'utilisateur et de la machine.
+        """
+        signals = self._observe([event], EventBatch.from_events([event]))[0]
+        return self._apply_behavior(await self._assess_event(event), signals)
+    
+    async def _assess_event(self, event: SecurityEvent) -> RiskAssessment:
+        """Évaluation de l'événement seul, par l'IA ou par les règles."""
+        if not self.inference.ready:
+            # Mode de fallback : analyse basique intelligente
+            return self._analyze_event_basic(event)
+        
+        key = canonical_event_key(event, self.config.llm_cache_time_bucket)
+        assessment = await self.assessment_cache.get_or_create(key, lambda: self._analyze_event_llm(event))
+        if assessment is None:
+            return self._analyze_event_basic(event)
+        return assessment
+    
+    async def _analyze_event_llm(self, event: SecurityEvent) -> Optional[RiskAssessment]:
+        """Analyse par le modèle, None si le budget de latence est dépassé."""
+        try:
+            ia_response = await self.inference.generate(self.create_prompt(event))
+        except Exception as e:
+            self.logger.error(f"Erreur lors de l'analyse IA : {e}")
+            return None
+        
+        if ia_response is None:
+            return None
+        return self._assessment_from_response(ia_response)
+    
+    def _assessment_from_response(self, ia_response: str) -> Optional[RiskAssessment]:
+        """Convertit la réponse du modèle en évaluation des risques, None si elle est non conforme."""
+        self.logger.debug(f"Réponse de l'IA : {ia_response}")
+        
+        # Le préfixe de réponse fait partie du prompt, pas de la génération
+        parsed = parse_risk_response(RESPONSE_PREFIX + ia_response)
+        if parsed is None:
+            self.metrics['unparsed_responses'] += 1
+            self.logger.warning(f"Réponse IA non conforme, analyse par règles : {ia_response!r}")
+            return None
+        risk_score, justification = parsed
+        
+        # Conversion du score en RiskLevel
+        risk_level = RiskLevel(risk_score)
+        
+        if risk_score >= 3:
+            self.logger.warning(
+                f"ALERTE CASSANDRA (IA): {justification} (Risque: {risk_score})"
+            )
+            
+        return RiskAssessment(
+            risk_score=risk_score / 5.0,  # Normalisation entre 0 et 1
+            risk_level=risk_level,
+            confidence=0.8,
+            factors={"ai_analysis": risk_score / 5.0},
+            justification=justification
+        )
+    
+    async def analyze_events(self, events: List[SecurityEvent]) -> List[RiskAssessment]:
+        """Analyse un lot d'événements (un résultat par événement, dans l'ordre)."""
+        # Lot en colonnes construit une fois, lu par le modèle d'anomalies et les règles
+        batch = EventBatch.from_events(events)
+        signals = self._observe(events, batch)
+        
+        if not self.inference.ready:
+            assessments = self.rule_scorer.score(batch)
+        else:
+            # Les prompts sont soumis ensemble : le moteur les génère par lots
+            assessments = await asyncio.gather(*(self._assess_event(event) for event in events))
+        
+        return [
+            self._apply_behavior(assessment, event_signals)
+            for assessment, event_signals in zip(assessments, signals)
+        ]
+    
+    def _observe(self, events: List[SecurityEvent], batch: EventBatch) -> List[List[BehaviorSignal]]:
+        """Met à jour lignes de base et modèle d'anomalies ; retourne les indicateurs par événement."""
+        # Les lignes de base sont mises à jour dans l'ordre du lot
+        signals = [self.behavior.observe(event) for event in events]
+        
+        features = extract_features(batch, self.behavior, self.sensitive_accounts)
+        scores = self.anomaly.score(features)
+        self.anomaly.observe(features)
+        if scores is not None:
+            for index in np.flatnonzero(scores >= self.config.anomaly_threshold):
+                signals[index].append(BehaviorSignal(
+                    'statistical_anomaly', 1.0, "Comportement statistiquement anormal"
+                ))
+        return signals
+    
+    def _apply_behavior(self, assessment: RiskAssessment, signals: List[BehaviorSignal]) -> RiskAssessment:
+        """Ajoute les indicateurs comportementaux au score d'un événement."""
+        if not signals:
+            return assessment
+        
+        risk_score = min(assessment.risk_score * 5.0 + sum(signal.weight for signal in signals), 5.0)
+        factors = dict(assessment.factors)
+        for signal in signals:
+            factors[signal.factor] = signal.weight
+        justification = signals[-1].justification
+        
+        if risk_score >= 3.0:
+            self.logger.warning(
+                f"ALERTE CASSANDRA (Comportement): {justification} (Risque: {risk_score:.1f})"
+            )
+        
+        return replace(
+            assessment,
+            risk_score=risk_score / 5.0,
+            risk_level=risk_level_for(risk_score),
+            factors=factors,
+            justification=justification
+        )
+    
+    def _analyze_event_basic(self, event: SecurityEvent) -> RiskAssessment:
+        """Analyse basique intelligente en mode de fallback."""
+        risk_score = 1.0  # Très faible par défaut
+        risk_level = RiskLevel.VERY_LOW
+        factors = {}
+        justification = "Événement normal"
+        
+        # Analyse de l'utilisateur
+        if event.user_context:
+            username = event.user_context.username.lower()
+            
+            # Comptes sensibles
+            if self.sensitive_accounts.search(username):
+                risk_score += 1.0
+                factors['sensitive_account'] = 1.0
+                justification = "Compte sensible utilisé"
+            
+            # Privilèges élevés
+            if event.user_context.privileges:
+                risk_score += 0.5
+                factors['high_privileges'] = 0.5
+                justification = "Privilèges élevés détectés"
+        
+        # Analyse de l'appareil
+        if event.device_context:
+            # Appareil non joint au domaine
+            if not event.device_context.domain_joined:
+                risk_score += 1.0
+                factors['non_domain_joined'] = 1.0
+                justification = "Appareil non joint au domaine"
+            
+            # IP externe
+            ip = event.device_context.ip_address
+            if ip.startswith(PRIVATE_IP_PREFIXES) == False:
+                risk_score += 2.0
+                factors['external_ip'] = 2.0
+                justification = "Connexion depuis IP externe"
+            
+            # Appareil inconnu
+            if 'unknown' in event.device_context.hostname.lower():
+                risk_score += 0.5
+                factors['unknown_device'] = 0.5
+                justification = "Appareil inconnu"
+        
+        # Analyse temporelle
+        hour = event.timestamp.hour
+        if hour < 6 or hour > 22:  # Heures non ouvrables
+            risk_score += 0.5
+            factors['off_hours'] = 0.5
+            justification = "Connexion en dehors des heures ouvrables"
+        
+        # Analyse spécifique des types d'événements
+        if event.event_type == EventType.AD_GROUP_MODIFIED:
+            # Modification de groupe - très sensible
+            risk_score += 2.0
+            factors['group_modification'] = 2.0
+            justification = "Modification de groupe détectée"
+            
+            # Vérifier si c'est un groupe critique
+            raw_data = event.raw_data or {}
+            group_name = raw_data.get('Group', '').lower()
+            if self.critical_groups.search(group_name):
+                risk_score += 3.0
+                factors['critical_group'] = 3.0
+                justification = "Modification du groupe Domain Admins - CRITIQUE"
+        
+        elif event.event_type == EventType.AD_ACCOUNT_MODIFIED:
+            # Modification de compte
+            risk_score += 1.0
+            factors['account_modification'] = 1.0
+            justification = "Modification de compte détectée"
+            
+            # Vérifier si c'est une réactivation de compte
+            raw_data = event.raw_data or {}
+            event_type = raw_data.get('EventType', '').lower()
+            if 'enabled' in event_type:
+                risk_score += 1.0
+                factors['account_enabled'] = 1.0
+                justification = "Réactivation de compte détectée"
+        
+        elif event.event_type == EventType.AD_ACCOUNT_CREATED:
+            # Création de compte
+            risk_score += 0.5
+            factors['account_creation'] = 0.5
+            justification = "Création de compte détectée"
+        
+        # Normalisation et conversion
+        risk_score = min(risk_score, 5.0)  # Max 5
+        normalized_score = risk_score / 5.0
+        
+        if risk_score <= 1.5:
+            risk_level = RiskLevel.VERY_LOW
+        elif risk_score <= 2.5:
+            risk_level = RiskLevel.LOW
+        elif risk_score <= 3.5:
+            risk_level = RiskLevel.MEDIUM
+        elif risk_score <= 4.5:
+            risk_level = RiskLevel.HIGH
+        else:
+            risk_level = RiskLevel.CRITICAL
+        
+        if risk_score >= 3.0:
+            self.logger.warning(
+                f"ALERTE CASSANDRA (Basique): {justification} (Risque: {risk_score:.1f})"
+            )
+        
+        return RiskAssessment(
+            risk_score=normalized_score,
+            risk_level=risk_level,
+            confidence=0.7,
+            factors=factors,
+            justification=justification
+        )
+    
+    async def get_health_status(self) -> HealthStatus:
+        """Retourne le statut de santé du module."""
+        return HealthStatus(
+            name="cassandra",
+            status="running" if self.is_running else "stopped",
+            last_heartbeat=datetime.now(),
+            metrics={
+                "events_analyzed": 0,
+                "anomalies_detected": self.anomaly.metrics["anomalies_detected"],
+                "model_loaded": 1.0 if self.inference.ready else 0.0
+            }
+        )
+    
+    async def get_metrics(self) -> Dict[str, float]:
+        """Retourne les métriques du module."""
+        return {
+            "events_analyzed": 0.0,
+            "anomalies_detected": float(self.anomaly.metrics["anomalies_detected"]),
+            "avg_processing_time": 0.0,
+            "model_loaded": 1.0 if self.inference.ready else 0.0,
+            "llm_unparsed_responses": float(self.metrics['unparsed_responses']),
+            "behavior_profiles": float(len(self.behavior)),
+            **{name: float(value) for name, value in self.behavior.metrics.items()},
+            "anomaly_model_version": float(self.anomaly.version or 0),
+            **{f"anomaly_{name}": float(value) for name, value in self.anomaly.metrics.items()
+               if name != "anomalies_detected"},
+            **{f"llm_{name}": float(value) for name, value in self.inference.metrics.items()},
+            **{f"llm_cache_{name}": float(value) for name, value in self.assessment_cache.snapshot().items()}
+        } 
\ No newline at end of file
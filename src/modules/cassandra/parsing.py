@@ -0,0 +1,41 @@
+"""
+Format de réponse structuré du modèle de Cassandra
+
+Le prompt se termine par le préfixe de réponse (`Risque:`) : le modèle n'a plus
+qu'à produire le chiffre du risque, contraint à 1-5 au premier token, puis une
+ligne de justification avant la balise de fin. Les expressions régulières
+sont compilées une seule fois ; une réponse non conforme n'est jamais
+interprétée comme un risque 1 mais signalée à l'appelant (None).
+"""
+
+import re
+from typing import Optional, Tuple
+
+
+RESPONSE_PREFIX = "Risque:"
+RISK_CHOICES = ("1", "2", "3", "4", "5")
+END_TAG = "<|end|>"
+
+RISK_PATTERN = re.compile(r"Risque\s*:\s*\(?\s*([1-5])(?![0-9])", re.IGNORECASE)
+JUSTIFICATION_PATTERN = re.compile(r"Justification\s*:\s*([^\n]*)", re.IGNORECASE)
+
+DEFAULT_JUSTIFICATION = "Analyse IA sans justification."
+
+
+def parse_risk_response(response: str) -> Optional[Tuple[int, str]]:
+    """
+    Extrait (risque 1-5, justification) d'une réponse complète du modèle, préfixe
+    compris. Retourne None si aucun risque valide n'y figure.
+    """
+    risk_match = RISK_PATTERN.search(response)
+    if risk_match is None:
+        return None
+
+    justification = DEFAULT_JUSTIFICATION
+    justification_match = JUSTIFICATION_PATTERN.search(response, risk_match.end())
+    if justification_match is not None:
+        text = justification_match.group(1).split(END_TAG, 1)[0].strip()
+        if text:
+            justification = text
+
+    return int(risk_match.group(1)), justification
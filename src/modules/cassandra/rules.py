@@ -0,0 +1,217 @@
+"""
+Moteur de règles vectorisé de Cassandra
+
+Les indicateurs (heure, classe d'IP, code du type d'événement...) sont lus
+dans les colonnes d'un EventBatch, puis toutes les règles du mode basique
+sont évaluées en une seule passe matricielle. Le résultat est
+identique à celui de `CassandraModule._analyze_event_basic`, événement par
+événement : mêmes scores, niveaux, facteurs et justifications.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ...core.batch import EVENT_TYPE_CODES, NO_IP, EventBatch
+from ...core.events import RiskLevel, EventType
+from ...core.patterns import PatternMatcher
+from .assessment import RiskAssessment
+
+
+PRIVATE_IP_PREFIXES = ('10.', '192.168.', '172.')
+# Mêmes plages sur les adresses IPv4 entières : (décalage, préfixe)
+_PRIVATE_IP_RANGES = ((24, 10), (16, 0xC0A8), (24, 172))
+
+# Classes d'adresse IP de la colonne `ip_class`
+IP_CLASS_NONE = 0  # Pas de contexte appareil
+IP_CLASS_PRIVATE = 1
+IP_CLASS_EXTERNAL = 2
+
+# Bornes supérieures (incluses) des niveaux de risque sur le score brut 1-5
+RISK_LEVEL_BOUNDS = np.array([1.5, 2.5, 3.5, 4.5])
+RISK_LEVELS = (RiskLevel.VERY_LOW, RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL)
+
+BASIC_CONFIDENCE = 0.7
+DEFAULT_JUSTIFICATION = "Événement normal"
+
+
+@dataclass(frozen=True)
+class ScoringRule:
+    """Règle du mode basique : facteur ajouté au score quand elle se déclenche."""
+    factor: str
+    weight: float
+    justification: str
+
+
+# Ordre d'évaluation du chemin scalaire : la justification retenue est celle
+# de la dernière règle déclenchée.
+SCORING_RULES: Tuple[ScoringRule, ...] = (
+    ScoringRule('sensitive_account', 1.0, "Compte sensible utilisé"),
+    ScoringRule('high_privileges', 0.5, "Privilèges élevés détectés"),
+    ScoringRule('non_domain_joined', 1.0, "Appareil non joint au domaine"),
+    ScoringRule('external_ip', 2.0, "Connexion depuis IP externe"),
+    ScoringRule('unknown_device', 0.5, "Appareil inconnu"),
+    ScoringRule('off_hours', 0.5, "Connexion en dehors des heures ouvrables"),
+    ScoringRule('group_modification', 2.0, "Modification de groupe détectée"),
+    ScoringRule('critical_group', 3.0, "Modification du groupe Domain Admins - CRITIQUE"),
+    ScoringRule('account_modification', 1.0, "Modification de compte détectée"),
+    ScoringRule('account_enabled', 1.0, "Réactivation de compte détectée"),
+    ScoringRule('account_creation', 0.5, "Création de compte détectée"),
+)
+
+
+def risk_level_for(raw_score: float) -> RiskLevel:
+    """Niveau de risque d'un score brut 1-5."""
+    return RISK_LEVELS[int(np.searchsorted(RISK_LEVEL_BOUNDS, raw_score, side='left'))]
+
+
+class VectorizedRuleScorer:
+    """Évalue les règles du mode basique sur un lot d'événements en une passe."""
+
+    def __init__(self, sensitive_accounts: PatternMatcher, critical_groups: PatternMatcher,
+                 logger: Optional[logging.Logger] = None):
+        self.sensitive_accounts = sensitive_accounts
+        self.critical_groups = critical_groups
+        self.logger = logger or logging.getLogger(__name__)
+        self.weights = np.array([rule.weight for rule in SCORING_RULES])
+        self.justifications = np.array(
+            [rule.justification for rule in SCORING_RULES] + [DEFAULT_JUSTIFICATION], dtype=object
+        )
+        self._bits = np.left_shift(1, np.arange(len(SCORING_RULES), dtype=np.int64))
+        # Facteurs par combinaison de règles déclenchées (au plus 2^11 entrées)
+        self._factors_cache: Dict[int, Dict[str, float]] = {}
+
+    def featurize(self, batch: EventBatch) -> Dict[str, np.ndarray]:
+        """Indicateurs des règles, lus dans les colonnes du lot."""
+        users = batch.objects['user_context']
+        event_type = batch.event_type
+
+        # Les données brutes ne sont lues que pour les types qui les exploitent
+        raw_data = batch.objects['raw_data']
+        group_rows = np.flatnonzero(event_type == EVENT_TYPE_CODES[EventType.AD_GROUP_MODIFIED])
+        critical_group = np.zeros(len(batch), dtype=bool)
+        critical_group[group_rows] = _match_distinct(
+            [(raw_data[row] or {}).get('Group', '') for row in group_rows.tolist()], self.critical_groups.search
+        )
+        account_enabled = np.zeros(len(batch), dtype=bool)
+        for row in np.flatnonzero(event_type == EVENT_TYPE_CODES[EventType.AD_ACCOUNT_MODIFIED]).tolist():
+            account_enabled[row] = 'enabled' in (raw_data[row] or {}).get('EventType', '').lower()
+
+        # Les recherches de motifs ne sont faites qu'une fois par valeur distincte du lot
+        return {
+            'sensitive_account': batch.username.map(self.sensitive_accounts.search, missing=False, dtype=bool),
+            'has_privileges': np.fromiter(
+                (bool(user.privileges) if user else False for user in users), dtype=bool, count=len(batch)
+            ),
+            'non_domain_joined': non_domain_joined(batch),
+            'ip_class': ip_classes(batch),
+            'unknown_device': batch.hostname.map(lambda hostname: 'unknown' in hostname.lower(),
+                                                 missing=False, dtype=bool),
+            'hour': batch.local_hours(),
+            'event_type': event_type,
+            'critical_group': critical_group,
+            'account_enabled': account_enabled,
+        }
+
+    def rule_flags(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Matrice (événements x règles) des règles déclenchées, dans l'ordre de SCORING_RULES."""
+        event_type = columns['event_type']
+        hour = columns['hour']
+        group_modification = event_type == EVENT_TYPE_CODES[EventType.AD_GROUP_MODIFIED]
+        account_modification = event_type == EVENT_TYPE_CODES[EventType.AD_ACCOUNT_MODIFIED]
+
+        return np.column_stack([
+            columns['sensitive_account'],
+            columns['has_privileges'],
+            columns['non_domain_joined'],
+            columns['ip_class'] == IP_CLASS_EXTERNAL,
+            columns['unknown_device'],
+            (hour < 6) | (hour > 22),
+            group_modification,
+            group_modification & columns['critical_group'],
+            account_modification,
+            account_modification & columns['account_enabled'],
+            event_type == EVENT_TYPE_CODES[EventType.AD_ACCOUNT_CREATED],
+        ])
+
+    def score(self, batch: EventBatch) -> List[RiskAssessment]:
+        """Évalue un lot d'événements (un résultat par événement, dans l'ordre)."""
+        if not len(batch):
+            return []
+
+        flags = self.rule_flags(self.featurize(batch))
+        rule_count = flags.shape[1]
+
+        # Les poids sont des multiples de 0.5 : la somme est exacte quel que soit l'ordre
+        raw_scores = np.minimum(1.0 + flags @ self.weights, 5.0)
+        normalized_scores = raw_scores / 5.0
+        level_indexes = np.searchsorted(RISK_LEVEL_BOUNDS, raw_scores, side='left')
+
+        # Dernière règle déclenchée, ou justification par défaut
+        last_rule = rule_count - 1 - np.argmax(flags[:, ::-1], axis=1)
+        last_rule[~flags.any(axis=1)] = rule_count
+        justifications = self.justifications[last_rule]
+
+        patterns = flags @ self._bits
+
+        for index in np.flatnonzero(raw_scores >= 3.0):
+            self.logger.warning(
+                f"ALERTE CASSANDRA (Basique): {justifications[index]} (Risque: {raw_scores[index]:.1f})"
+            )
+
+        return [
+            RiskAssessment(
+                risk_score=normalized_score,
+                risk_level=RISK_LEVELS[level_index],
+                confidence=BASIC_CONFIDENCE,
+                factors=dict(self._factors_for(pattern)),
+                justification=justification
+            )
+            for normalized_score, level_index, pattern, justification in zip(
+                normalized_scores.tolist(), level_indexes.tolist(), patterns.tolist(), justifications.tolist()
+            )
+        ]
+
+    def _factors_for(self, pattern: int) -> Dict[str, float]:
+        factors = self._factors_cache.get(pattern)
+        if factors is None:
+            factors = {
+                rule.factor: rule.weight
+                for position, rule in enumerate(SCORING_RULES) if pattern >> position & 1
+            }
+            self._factors_cache[pattern] = factors
+        return factors
+
+
+def ip_classes(batch: EventBatch) -> np.ndarray:
+    """Classe de l'adresse IP de l'appareil de chaque ligne (IP_CLASS_*)."""
+    devices = batch.objects['device_context']
+    has_device = np.fromiter((device is not None for device in devices), dtype=bool, count=len(batch))
+
+    # Adresses IPv4 : classées sur la colonne entière ; les autres (rares) sur leur texte
+    ip_address = batch.ip_address
+    private_ip = np.zeros(len(batch), dtype=bool)
+    for shift, prefix in _PRIVATE_IP_RANGES:
+        private_ip |= (ip_address >= 0) & (ip_address >> shift == prefix)
+    for row in np.flatnonzero(has_device & (ip_address == NO_IP)).tolist():
+        private_ip[row] = devices[row].ip_address.startswith(PRIVATE_IP_PREFIXES)
+    return np.where(has_device, np.where(private_ip, IP_CLASS_PRIVATE, IP_CLASS_EXTERNAL), IP_CLASS_NONE).astype(np.int8)
+
+
+def non_domain_joined(batch: EventBatch) -> np.ndarray:
+    """Lignes dont l'appareil n'est pas joint au domaine."""
+    return np.fromiter(
+        (not device.domain_joined if device else False for device in batch.objects['device_context']),
+        dtype=bool, count=len(batch)
+    )
+
+
+def _match_distinct(values: List[str], predicate: Callable[[str], bool]) -> np.ndarray:
+    """Évalue un prédicat une fois par valeur distincte et le diffuse à toute la colonne."""
+    matches: Dict[str, bool] = {}
+    for value in values:
+        if value not in matches:
+            matches[value] = predicate(value)
+    return np.fromiter(map(matches.__getitem__, values), dtype=bool, count=len(values))
@@ -1,13 +1,25 @@
 """
-Module Hydra - Déception Dynamique (Version factice pour les tests)
+Module Hydra - Déception Dynamique
+
+Les leurres du registre portent des noms réalistes : ils ne sont générés
+qu'une fois les identifiants existants de l'annuaire chargés
+(`reserved_identifiers` ou `reserved_identifiers_path`). Sans cette liste,
+un compte réel homonyme d'un leurre serait traité comme un attaquant et mis
+en quarantaine ; seule la convention de nommage (`decoy_name_patterns`),
+qui ne peut pas coïncider avec un compte réel, reste alors active.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from dataclasses import dataclass
 
 from ...core.events import SecurityEvent
+from ...core.patterns import PatternMatcher
+from .registry import Decoy, DecoyRegistry
 
 
 @dataclass
@@ -20,31 +32,137 @@ class HealthStatus:
 
 
 class HydraModule:
-    """Module de déception dynamique (version factice)."""
+    """Module de déception dynamique."""
     
     def __init__(self, config: Any):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.is_running = False
+        self.interactions_detected = 0
+        self._refresh_task = None
+        
+        # Registre des leurres et index de leurs identifiants
+        reserved = self._reserved_identifiers()
+        self.registry = DecoyRegistry(
+            domain=config.decoy_domain,
+            domain_sid=config.domain_sid,
+            use_bloom_filter=config.bloom_filter_enabled,
+            rid_range=config.decoy_rid_range,
+            reserved=reserved
+        )
+        # Leurres du registre vérifiés contre l'annuaire : seuls autorisés
+        self.registry_enabled = bool(reserved)
+        if config.domain_sid and self.registry.fictitious_sid:
+            self.logger.warning("Aucune plage de RID réservée aux leurres : SID de domaine fictif utilisé")
+        
+        # Noms de leurres créés hors du registre (convention de nommage)
+        self.decoy_names = PatternMatcher(config.decoy_name_patterns)
+    
+    def _reserved_identifiers(self) -> List[str]:
+        """Identifiants existants de la configuration et de l'export de l'annuaire."""
+        reserved = list(self.config.reserved_identifiers)
+        path = self.config.reserved_identifiers_path
+        if path:
+            try:
+                reserved += Path(path).read_text(encoding='utf-8').splitlines()
+            except OSError as e:
+                self.logger.error(f"Impossible de lire les identifiants réservés {path} : {e}")
+        if not reserved:
+            self.logger.error(
+                "Aucun identifiant réservé (reserved_identifiers, reserved_identifiers_path) : leurres du "
+                "registre désactivés, seule la convention de nommage decoy_name_patterns est surveillée"
+            )
+        return reserved
     
     async def start(self) -> None:
         """Démarre le module Hydra."""
-        self.logger.info("Module Hydra démarré (mode factice)")
+        if self.config.enabled and self.registry_enabled:
+            restored = self._load_decoys()
+            if not restored:
+                self._rotate_decoys()
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        self.logger.info(f"Module Hydra démarré ({len(self.registry)} leurres actifs)")
         self.is_running = True
     
     async def stop(self) -> None:
         """Arrête le module Hydra."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+        if self.config.enabled and self.registry_enabled:
+            self._save_decoys()
         self.logger.info("Module Hydra arrêté")
         self.is_running = False
     
-    async def is_decoy_interaction(self, event: SecurityEvent) -> bool:
-        """Vérifie si l'événement implique un leurre (MVP)."""
-        # Détection simple : username contenant '_decoy_' ou se terminant par '_decoy_admin'
+    def _rotate_decoys(self) -> None:
+        created = self.registry.rotate(self.config)
+        self.logger.info(
+            f"Génération {self.registry.generation} de leurres : {len(created)} créés, "
+            f"{len(self.registry)} surveillés"
+        )
+        self._save_decoys()
+    
+    def _load_decoys(self) -> int:
+        path = self.config.registry_path
+        if not path:
+            return 0
+        try:
+            restored = self.registry.load(path)
+        except Exception as e:
+            self.logger.error(f"Impossible de restaurer les leurres : {e}")
+            return 0
+        if restored:
+            self.logger.info(f"{restored} leurres restaurés depuis {path} (génération {self.registry.generation})")
+        return restored
+    
+    def _save_decoys(self) -> None:
+        if not self.config.registry_path:
+            return
+        try:
+            self.registry.save(self.config.registry_path)
+        except Exception as e:
+            self.logger.error(f"Impossible de sauvegarder les leurres : {e}")
+    
+    async def _refresh_loop(self) -> None:
+        """Renouvelle périodiquement les leurres."""
+        # Après une restauration, le renouvellement reprend à l'échéance prévue
+        elapsed = time.time() - (self.registry.rotated_at or time.time())
+        delay = max(0.0, self.config.decoy_refresh_interval - elapsed)
+        while True:
+            await asyncio.sleep(delay)
+            delay = self.config.decoy_refresh_interval
+            try:
+                self._rotate_decoys()
+            except Exception as e:
+                self.logger.error(f"Erreur lors du renouvellement des leurres : {e}")
+    
+    async def is_decoy_interaction(self, event: SecurityEvent) -> Optional[Decoy]:
+        """Leurre impliqué dans l'événement, None si aucun."""
+        return self._matches_decoy(event)
+    
+    async def is_decoy_interaction_batch(self, events: List[SecurityEvent]) -> List[Optional[Decoy]]:
+        """Vérifie un lot d'événements en un seul appel : leurre impliqué (ou None) par événement."""
+        return [self._matches_decoy(event) for event in events]
+    
+    def _matches_decoy(self, event: SecurityEvent) -> Optional[Decoy]:
+        decoy = self.registry.match(event)
+        if decoy is not None:
+            self.registry.record_interaction(decoy)
+            self.interactions_detected += 1
+            return decoy
+        
+        # Convention historique : username contenant un motif de decoy_name_patterns ('_decoy_')
         if event.event_type.value == 'ad_logon' and event.user_context:
-            username = event.user_context.username.lower()
-            if '_decoy_' in username or username.endswith('_decoy_admin'):
-                return True
-        return False
+            username = event.user_context.username
+            if self.decoy_names.search(username):
+                self.interactions_detected += 1
+                # Leurre créé hors du registre : décrit à partir du nom observé
+                return Decoy(
+                    decoy_id=f"pattern:{username.lower()}", decoy_type='user', name=username,
+                    identifiers=(username.lower(),), generation=0
+                )
+        return None
     
     async def get_health_status(self) -> HealthStatus:
         """Retourne le statut de santé du module."""
@@ -52,13 +170,14 @@ class HydraModule:
             name="hydra",
             status="running" if self.is_running else "stopped",
             last_heartbeat=datetime.now(),
-            metrics={"decoys_active": 0, "interactions_detected": 0}
+            metrics={"decoys_active": len(self.registry), "interactions_detected": self.interactions_detected}
         )
     
     async def get_metrics(self) -> Dict[str, float]:
         """Retourne les métriques du module."""
         return {
-            "decoys_active": 0.0,
-            "interactions_detected": 0.0,
+            "decoys_active": float(len(self.registry)),
+            "decoy_generation": float(self.registry.generation),
+            "interactions_detected": float(self.interactions_detected),
             "poison_injections": 0.0
         } 
\ No newline at end of file
@@ -0,0 +1,448 @@
+"""
+Registre des leurres Hydra
+
+Génère et suit les leurres (utilisateurs, comptes de service avec SPN,
+ordinateurs, groupes, GPO) et indexe chacun sous toutes les formes sous
+lesquelles il peut apparaître dans un événement : sAMAccountName, UPN,
+DOMAINE\\nom, SID, SPN, nom d'hôte court ou FQDN, compte machine (HOST$),
+GUID de GPO. Tous les identifiants sont normalisés en minuscules à
+l'indexation : la recherche est une seule sonde de dictionnaire par champ,
+quel que soit le nombre de leurres.
+
+Le filtre de Bloom optionnel offre une représentation compacte de
+l'ensemble des identifiants, exportable vers les agents pour filtrer à la
+source ; côté serveur, la sonde du dictionnaire reste le chemin principal.
+
+Un leurre qui porterait le nom ou le SID d'un objet réel ferait traiter
+l'activité légitime comme une attaque (alerte critique, désactivation du
+compte par Aegis). Les noms tirés sont donc écartés s'ils figurent parmi les
+identifiants réservés (export de l'annuaire), les RID ne sont combinés au SID
+réel du domaine que dans une plage réservée aux leurres, et le registre est
+sauvegardé sur disque pour conserver les mêmes leurres après un redémarrage.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ...core.events import SecurityEvent
+
+
+# RID des leurres sous un SID de domaine fictif
+DEFAULT_RID_RANGE = (1100, 2 ** 30 - 1)
+
+# Champs bruts pouvant désigner un compte, une machine, un groupe ou un service
+RAW_IDENTIFIER_FIELDS = frozenset({
+    'AccountName', 'TargetAccount', 'TargetUserName', 'SubjectUserName', 'MemberName',
+    'Sid', 'TargetSid', 'SubjectUserSid', 'MemberSid', 'TargetUserSid',
+    'Group', 'GroupName', 'TargetGroup',
+    'ServiceName', 'ServicePrincipalName', 'SPN',
+    'ComputerName', 'WorkstationName', 'TargetServerName', 'DnsHostName',
+    'ObjectName', 'ObjectDN', 'ObjectGUID', 'GPO',
+})
+
+DECOY_TYPES = ('user', 'service', 'computer', 'group', 'gpo')
+
+_FIRST_NAMES = ('alain', 'claire', 'david', 'emma', 'franck', 'helene', 'julien', 'laura',
+                'marc', 'nadia', 'olivier', 'pauline', 'remi', 'sophie', 'thomas', 'yann')
+_LAST_NAMES = ('bernard', 'dubois', 'durand', 'fontaine', 'garnier', 'lambert', 'lefebvre',
+               'martin', 'mercier', 'moreau', 'petit', 'robert', 'roux', 'simon', 'vincent')
+_SERVICES = (('sql', 'MSSQLSvc', 1433), ('backup', 'HTTP', 443), ('sharepoint', 'HTTP', 80),
+             ('exchange', 'exchangeMDB', None), ('iis', 'HTTP', 8080), ('sccm', 'MSSQLSvc', 1434))
+_SERVER_ROLES = ('FS', 'SQL', 'APP', 'BKP', 'WEB', 'PRT')
+_GROUPS = ('Tier0 Admins', 'Backup Admins', 'SQL Admins', 'Server Operators Legacy',
+           'Helpdesk Tier1', 'VPN Admins', 'Citrix Admins', 'PKI Admins')
+_GPOS = ('Default Admin Passwords', 'Legacy Local Admins', 'Workstation Hardening',
+         'Server Baseline', 'Backup Credentials')
+
+
+@dataclass
+class Decoy:
+    """Leurre suivi par Hydra."""
+    decoy_id: str
+    decoy_type: str
+    name: str
+    identifiers: Tuple[str, ...]
+    generation: int
+    created_at: datetime = field(default_factory=datetime.now)
+    sid: Optional[str] = None
+    spn: Optional[str] = None
+    interactions: int = 0
+    last_interaction: Optional[datetime] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            **asdict(self),
+            'identifiers': list(self.identifiers),
+            'created_at': self.created_at.isoformat(),
+            'last_interaction': self.last_interaction.isoformat() if self.last_interaction else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Decoy":
+        return cls(**{
+            **data,
+            'identifiers': tuple(data['identifiers']),
+            'created_at': datetime.fromisoformat(data['created_at']),
+            'last_interaction': (
+                datetime.fromisoformat(data['last_interaction']) if data.get('last_interaction') else None
+            ),
+        })
+
+
+class BloomFilter:
+    """Filtre de Bloom sur des chaînes (faux positifs possibles, jamais de faux négatifs)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> Iterable[int]:
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        # Double hachage : k positions à partir de deux empreintes
+        return ((first + index * second) % self.size for index in range(self.hash_count))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
+
+
+def normalize_reserved(identifiers: Iterable[str]) -> Set[str]:
+    """
+    Identifiants réservés en minuscules, complétés de leur forme courte :
+    DOMAINE\\nom, nom@domaine, HOTE$ et FQDN réservent aussi le nom seul.
+    """
+    reserved = set()
+    for identifier in identifiers:
+        key = identifier.strip().lower()
+        if not key or key.startswith('#'):
+            continue
+        reserved.add(key)
+        short = key.rpartition('\\')[2].partition('@')[0]
+        if not short.startswith('s-1-'):
+            short = short.rstrip('$').partition('.')[0]
+        reserved.add(short)
+    return reserved
+
+
+class DecoyRegistry:
+    """Leurres actifs et index de leurs identifiants normalisés."""
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, domain: str = "corp.local", domain_sid: Optional[str] = None,
+                 use_bloom_filter: bool = False, rng: Optional[random.Random] = None,
+                 rid_range: Optional[Tuple[int, int]] = None, reserved: Iterable[str] = ()):
+        self.domain = domain.lower()
+        self.netbios = self.domain.split('.')[0]
+        self.rng = rng or random.Random()
+        # Des RID inventés sous le SID réel pourraient désigner des comptes
+        # existants : sans plage réservée, les leurres restent sous un SID fictif
+        self.fictitious_sid = not (domain_sid and rid_range)
+        if self.fictitious_sid:
+            domain_sid = "S-1-5-21-" + "-".join(str(self.rng.randint(10 ** 8, 2 ** 32 - 1)) for _ in range(3))
+            rid_range = DEFAULT_RID_RANGE
+        self.domain_sid = domain_sid
+        self.rid_range = (int(rid_range[0]), int(rid_range[1]))
+        if not 0 < self.rid_range[0] <= self.rid_range[1]:
+            raise ValueError(f"Plage de RID des leurres invalide : {rid_range}")
+        self.reserved = normalize_reserved(reserved)
+        self.use_bloom_filter = use_bloom_filter
+        self.bloom: Optional[BloomFilter] = None
+
+        self.generation = 0
+        self.rotated_at: Optional[float] = None
+        self._decoys: Dict[str, Decoy] = {}
+        self._index: Dict[str, Decoy] = {}
+        low, high = self.rid_range
+        self._next_rid = low + self.rng.randrange(min(5000, high - low + 1)) - 1
+
+    def __len__(self) -> int:
+        return len(self._decoys)
+
+    def __iter__(self):
+        return iter(list(self._decoys.values()))
+
+    def decoys(self, generation: Optional[int] = None) -> List[Decoy]:
+        return [decoy for decoy in self._decoys.values() if generation is None or decoy.generation == generation]
+
+    # --- Indexation -----------------------------------------------------------------
+
+    def add(self, decoy: Decoy) -> None:
+        self._decoys[decoy.decoy_id] = decoy
+        for identifier in decoy.identifiers:
+            self._index[identifier] = decoy
+        if self.bloom is not None:
+            for identifier in decoy.identifiers:
+                self.bloom.add(identifier)
+
+    def remove(self, decoy_id: str) -> Optional[Decoy]:
+        decoy = self._decoys.pop(decoy_id, None)
+        if decoy is not None:
+            for identifier in decoy.identifiers:
+                if self._index.get(identifier) is decoy:
+                    del self._index[identifier]
+        return decoy
+
+    def _rebuild_bloom(self) -> None:
+        if not self.use_bloom_filter:
+            return
+        # Dimensionné avec de la marge pour les leurres de la génération suivante
+        self.bloom = BloomFilter(capacity=2 * len(self._index) + 64)
+        for identifier in self._index:
+            self.bloom.add(identifier)
+
+    def lookup(self, value: Any) -> Optional[Decoy]:
+        """Leurre désigné par un identifiant quelconque (insensible à la casse)."""
+        if not value or not isinstance(value, str):
+            return None
+        key = value.strip().lower()
+        if self.bloom is not None and key not in self.bloom:
+            return None
+        return self._index.get(key)
+
+    def match(self, event: SecurityEvent) -> Optional[Decoy]:
+        """Premier leurre impliqué dans un événement, quel que soit son type."""
+        if not self._index:
+            return None
+        if self.bloom is not None:
+            return self._match_candidates(event, self.lookup)
+
+        # Chemin principal : une sonde de dictionnaire par identifiant présent
+        get = self._index.get
+        return self._match_candidates(
+            event, lambda value: get(value.strip().lower()) if value.__class__ is str else None
+        )
+
+    @staticmethod
+    def _match_candidates(event: SecurityEvent, lookup) -> Optional[Decoy]:
+        user = event.user_context
+        if user is not None:
+            decoy = lookup(user.username) or lookup(user.user_id) or lookup(user.email)
+            if decoy is not None:
+                return decoy
+            for group in user.groups:
+                decoy = lookup(group)
+                if decoy is not None:
+                    return decoy
+
+        device = event.device_context
+        if device is not None:
+            decoy = lookup(device.hostname)
+            if decoy is not None:
+                return decoy
+
+        raw_data = event.raw_data
+        if raw_data:
+            for name, value in raw_data.items():
+                if name in RAW_IDENTIFIER_FIELDS:
+                    decoy = lookup(value)
+                    if decoy is not None:
+                        return decoy
+        return None
+
+    def record_interaction(self, decoy: Decoy) -> None:
+        decoy.interactions += 1
+        decoy.last_interaction = datetime.now()
+
+    # --- Génération et renouvellement -------------------------------------------------
+
+    def rotate(self, config: Any) -> List[Decoy]:
+        """
+        Crée une nouvelle génération de leurres selon la configuration Hydra.
+        La génération précédente reste surveillée jusqu'à la rotation suivante :
+        un attaquant qui l'a énumérée est encore détecté.
+        """
+        self.generation += 1
+        for decoy in self.decoys():
+            if decoy.generation < self.generation - 1:
+                self.remove(decoy.decoy_id)
+
+        created = [self.add_generated(decoy_type) for decoy_type in self._planned_types(config)]
+        self._rebuild_bloom()
+        self.rotated_at = time.time()
+        return created
+
+    def _planned_types(self, config: Any) -> List[str]:
+        enabled = []
+        if config.create_user_decoys:
+            enabled += ['user', 'service']  # Comptes de service avec SPN : détection du kerberoasting
+        if config.create_computer_decoys:
+            enabled.append('computer')
+        if config.create_group_decoys:
+            enabled.append('group')
+        if config.create_gpo_decoys:
+            enabled.append('gpo')
+        if not enabled:
+            return []
+        return [enabled[index % len(enabled)] for index in range(config.decoy_count)]
+
+    def add_generated(self, decoy_type: str) -> Decoy:
+        builder = {
+            'user': self._build_user,
+            'service': self._build_service,
+            'computer': self._build_computer,
+            'group': self._build_group,
+            'gpo': self._build_gpo,
+        }[decoy_type]
+        decoy = builder()
+        self.add(decoy)
+        return decoy
+
+    def _is_taken(self, identifier: str) -> bool:
+        key = identifier.lower()
+        return key in self._index or key in self.reserved
+
+    def _new_sid(self) -> str:
+        """SID suivant dans la plage de RID des leurres, ni indexé ni réservé."""
+        low, high = self.rid_range
+        for _ in range(high - low + 1):
+            self._next_rid += 1 + self.rng.randrange(7)
+            if self._next_rid > high:
+                self._next_rid = low + (self._next_rid - high - 1) % (high - low + 1)
+            sid = f"{self.domain_sid}-{self._next_rid}"
+            if not self._is_taken(sid):
+                return sid
+        raise ValueError(f"Plage de RID des leurres épuisée : {self.rid_range}")
+
+    def _unique(self, candidate) -> str:
+        """
+        Tire un nom jusqu'à en obtenir un ni indexé ni réservé (suffixe
+        aléatoire si l'espace est saturé).
+        """
+        attempts = 0
+        while True:
+            name = candidate()
+            if attempts >= 20:
+                name = f"{name}{self.rng.randrange(10, 10 ** 4)}"
+            if not self._is_taken(name):
+                return name
+            attempts += 1
+
+    def _account_identifiers(self, sam: str, sid: str) -> List[str]:
+        return [sam, f"{sam}@{self.domain}", f"{self.netbios}\\{sam}", sid]
+
+    def _decoy(self, decoy_type: str, name: str, identifiers: Iterable[str], **extra) -> Decoy:
+        return Decoy(
+            decoy_id=str(uuid.uuid4()),
+            decoy_type=decoy_type,
+            name=name,
+            identifiers=tuple(dict.fromkeys(identifier.lower() for identifier in identifiers)),
+            generation=self.generation,
+            **extra
+        )
+
+    def _build_user(self) -> Decoy:
+        rng = self.rng
+        sam = self._unique(lambda: rng.choice((
+            lambda: f"adm.{rng.choice(_LAST_NAMES)}",
+            lambda: f"{rng.choice(_FIRST_NAMES)[0]}{rng.choice(_LAST_NAMES)}{rng.randint(1, 9)}",
+            lambda: f"{rng.choice(_FIRST_NAMES)}.{rng.choice(_LAST_NAMES)}.adm",
+        ))())
+        sid = self._new_sid()
+        return self._decoy('user', sam, self._account_identifiers(sam, sid), sid=sid)
+
+    def _build_service(self) -> Decoy:
+        rng = self.rng
+        service, service_class, port = rng.choice(_SERVICES)
+        sam = self._unique(lambda: f"svc_{service}{rng.randint(1, 99):02d}")
+        host = f"srv-{service}-{rng.randint(1, 40):02d}.{self.domain}"
+        spn = f"{service_class}/{host}" + (f":{port}" if port else "")
+        sid = self._new_sid()
+        identifiers = self._account_identifiers(sam, sid) + [spn, f"{service_class}/{host}"]
+        return self._decoy('service', sam, identifiers, sid=sid, spn=spn)
+
+    def _build_computer(self) -> Decoy:
+        rng = self.rng
+        hostname = self._unique(lambda: f"SRV-{rng.choice(_SERVER_ROLES)}-{rng.randint(1, 60):02d}")
+        sid = self._new_sid()
+        identifiers = [hostname, f"{hostname}$", f"{hostname}.{self.domain}", f"{self.netbios}\\{hostname}$",
+                       f"host/{hostname}", f"host/{hostname}.{self.domain}", sid]
+        return self._decoy('computer', hostname, identifiers, sid=sid)
+
+    def _build_group(self) -> Decoy:
+        rng = self.rng
+        name = self._unique(lambda: f"{rng.choice(_GROUPS)} {rng.randint(1, 9)}")
+        sid = self._new_sid()
+        identifiers = [name, f"{self.netbios}\\{name}", f"cn={name},ou=groups,dc=" + ",dc=".join(self.domain.split('.')),
+                       sid]
+        return self._decoy('group', name, identifiers, sid=sid)
+
+    def _build_gpo(self) -> Decoy:
+        rng = self.rng
+        name = self._unique(lambda: f"{rng.choice(_GPOS)} {rng.randint(2015, 2024)}")
+        guid = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        return self._decoy('gpo', name, [name, guid, f"{{{guid}}}"])
+
+    # --- Sauvegarde -------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Écrit le registre dans `path` par remplacement atomique."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(target.name + '.tmp')
+        payload = {
+            'version': self.SNAPSHOT_VERSION,
+            'domain': self.domain,
+            'domain_sid': self.domain_sid,
+            'rid_range': list(self.rid_range),
+            'generation': self.generation,
+            'rotated_at': self.rotated_at,
+            'next_rid': self._next_rid,
+            'decoys': [decoy.to_dict() for decoy in self._decoys.values()],
+        }
+        with temporary.open('w', encoding='utf-8') as handle:
+            json.dump(payload, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, target)
+
+    def load(self, path: str) -> int:
+        """
+        Recharge une sauvegarde ; retourne le nombre de leurres restaurés.
+        Les leurres dont un identifiant est devenu réservé sont abandonnés.
+        """
+        target = Path(path)
+        if not target.exists():
+            return 0
+        with target.open(encoding='utf-8') as handle:
+            payload = json.load(handle)
+        if payload.get('version') != self.SNAPSHOT_VERSION:
+            raise ValueError(f"Version de sauvegarde de leurres non supportée : {payload.get('version')}")
+        if payload.get('domain') != self.domain:
+            raise ValueError(f"Sauvegarde de leurres d'un autre domaine : {payload.get('domain')}")
+        # Sous un SID fictif, celui de la sauvegarde est repris ; sinon il doit correspondre
+        if not self.fictitious_sid and (payload.get('domain_sid') != self.domain_sid
+                                        or tuple(payload.get('rid_range', ())) != self.rid_range):
+            raise ValueError("Sauvegarde de leurres d'un autre SID de domaine ou d'une autre plage de RID")
+
+        if self.fictitious_sid:
+            self.domain_sid = payload['domain_sid']
+            self.rid_range = tuple(payload['rid_range'])
+        self.generation = payload['generation']
+        self.rotated_at = payload.get('rotated_at')
+        self._next_rid = payload['next_rid']
+        for data in payload.get('decoys', []):
+            decoy = Decoy.from_dict(data)
+            if not any(identifier in self.reserved for identifier in decoy.identifiers):
+                self.add(decoy)
+        self._rebuild_bloom()
+        return len(self._decoys)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Script de test des lots d'événements en colonnes
+
+Vérifie l'aller-retour événements ⇄ EventBatch, la sélection de lignes
+(indices, masque, tranche), les colonnes encodées par dictionnaire, la
+conversion des adresses IPv4 et l'heure locale calculée sur les colonnes.
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Ajout du répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from src.core.batch import EVENT_TYPE_CODES, NO_IP, DictionaryColumn, EventBatch, int_to_ipv4, ipv4_to_int
+from src.core.events import (
+    SecurityEvent, EventType, UserContext, DeviceContext, NetworkContext, Severity, RiskLevel
+)
+
+
+def sample_events():
+    """Événements couvrant contextes absents, adresses invalides, fuseaux fixes, régionaux et naïfs."""
+    full = SecurityEvent(
+        timestamp=datetime(2024, 3, 1, 8, 30, 15, 123456, tzinfo=timezone(timedelta(hours=1))),
+        event_type=EventType.AD_GROUP_MODIFIED,
+        severity=Severity.CRITICAL,
+        risk_level=RiskLevel.HIGH,
+        confidence=0.85,
+        user_context=UserContext(username="admin_compromis", domain="DEV.ORION.LOCAL", groups=["Domain Admins"]),
+        device_context=DeviceContext(hostname="DC-01", ip_address="10.0.0.1", domain_joined=True),
+        network_context=NetworkContext(source_ip="192.168.1.4", destination_ip="fe80::1", destination_port=389),
+        raw_data={"EventCode": "4728"},
+        source="test_agent",
+        tags=["escalation"],
+        labels={"env": "dev"},
+    )
+    bare = SecurityEvent(event_type=EventType.PROCESS_CREATION)
+    # Heure naïve sautée au passage à l'heure d'été en Europe : conservée telle quelle
+    gap = SecurityEvent(timestamp=datetime(2024, 3, 31, 2, 30), event_type=EventType.AD_LOGON)
+    events = [full, bare, gap]
+    zones = [None, timezone.utc, timezone(timedelta(hours=5, minutes=30)),
+             ZoneInfo("Europe/Paris"), ZoneInfo("Australia/Lord_Howe")]
+    addresses = ["10.0.0.2", "8.8.8.8", "", "10.x", "192.168.1"]
+    # Heures encadrant le passage à l'heure d'été en Europe (31 mars 2024, 01:00 UTC)
+    start = datetime(2024, 3, 31, tzinfo=timezone.utc).timestamp()
+    for index in range(40):
+        zone = zones[index % len(zones)]
+        events.append(SecurityEvent(
+            timestamp=datetime.fromtimestamp(start + index * 337, zone),
+            event_type=EventType.AD_LOGON if index % 2 else EventType.AD_ACCOUNT_MODIFIED,
+            user_context=UserContext(username=f"user{index % 3}", domain="ORION") if index % 4 else None,
+            device_context=DeviceContext(hostname=f"WS-{index % 2}", ip_address=addresses[index % len(addresses)]),
+        ))
+    return events
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+
+
+def check_round_trip() -> None:
+    print("🎭 Test 1 : aller-retour événements ⇄ lot")
+    events = sample_events()
+    batch = EventBatch.from_events(events)
+    check(len(batch) == len(events), "Nombre de lignes incorrect")
+
+    restored = batch.to_events()
+    check(restored == events, "to_events(from_events(x)) != x")
+    for event, decoded in zip(events, restored):
+        check(decoded.timestamp == event.timestamp, "Horodatage ou fuseau perdu")
+        check(decoded.to_dict() == event.to_dict(), "to_dict différent après aller-retour")
+        check(decoded.user_context is event.user_context, "Contexte copié au lieu d'être partagé")
+
+    check(EventBatch.from_events([]).to_events() == [], "Lot vide")
+    print(f"   ✓ {len(events)} événements, fuseaux et contextes préservés")
+
+
+def check_take() -> None:
+    print("🎭 Test 2 : sélection de lignes")
+    events = sample_events()
+    batch = EventBatch.from_events(events)
+
+    check(batch.take([3, 0, 3]).to_events() == [events[3], events[0], events[3]], "Sélection par indices")
+    logons = batch.is_type(EventType.AD_LOGON)
+    expected = [event for event in events if event.event_type == EventType.AD_LOGON]
+    check(batch.take(logons).to_events() == expected, "Sélection par masque")
+    check(batch.take(slice(2, 10, 3)).to_events() == events[2:10:3], "Sélection par tranche")
+    check((batch.event_type == EVENT_TYPE_CODES[EventType.AD_LOGON]).sum() == len(expected), "Codes de type")
+
+    start_ns, end_ns = events[5].timestamp_ns, events[9].timestamp_ns
+    window = [event for event in events if start_ns <= event.timestamp_ns < end_ns]
+    check(batch.take(batch.between(start_ns, end_ns)).to_events() == window, "Sélection temporelle")
+    print("   ✓ indices, masque, tranche et plage temporelle")
+
+
+def check_dictionary_columns() -> None:
+    print("🎭 Test 3 : colonnes encodées par dictionnaire")
+    column = DictionaryColumn.encode(["b", None, "a", "b", "b", None])
+    check(column.values == ["b", "a"] and column.codes.tolist() == [0, -1, 1, 0, 0, -1], "Encodage incorrect")
+    check(column.decode() == ["b", None, "a", "b", "b", None], "Décodage incorrect")
+    check(column.counts() == {"b": 3, "a": 1}, "Comptage incorrect")
+
+    calls = []
+    mapped = column.map(lambda value: calls.append(value) or value.upper(), missing="?")
+    check(mapped.tolist() == ["B", "?", "A", "B", "B", "?"], "map incorrect")
+    check(calls == ["b", "a"], "map doit appeler la fonction une fois par valeur distincte")
+    check(column.take(np.array([True, False, False, True, False, True])).decode() == ["b", "b", None],
+          "Sélection dans une colonne")
+
+    batch = EventBatch.from_events(sample_events())
+    usernames = [event.user_context.username if event.user_context else None for event in sample_events()]
+    check(batch.username.decode() == usernames, "Colonne des utilisateurs incorrecte")
+    print("   ✓ encodage, map par valeur distincte, comptages")
+
+
+def check_addresses() -> None:
+    print("🎭 Test 4 : adresses IPv4")
+    check(ipv4_to_int("10.0.0.1") == 167772161 and int_to_ipv4(167772161) == "10.0.0.1", "Conversion IPv4")
+    for invalid in (None, "", "10.x", "192.168.1", "fe80::1", "256.1.1.1"):
+        check(ipv4_to_int(invalid) == NO_IP, f"Adresse invalide acceptée : {invalid!r}")
+    check(int_to_ipv4(NO_IP) is None, "NO_IP doit se décoder en None")
+
+    events = sample_events()
+    batch = EventBatch.from_events(events)
+    expected = [ipv4_to_int(event.device_context.ip_address) if event.device_context else NO_IP for event in events]
+    check(batch.ip_address.tolist() == expected, "Colonne ip_address incorrecte")
+    check(batch.source_ip.tolist()[0] == ipv4_to_int("192.168.1.4"), "Colonne source_ip incorrecte")
+    check(batch.destination_ip.tolist()[0] == NO_IP, "Une adresse IPv6 n'a pas de code IPv4")
+    print("   ✓ conversion, adresses invalides et IPv6")
+
+
+def check_local_time() -> None:
+    print("🎭 Test 5 : heure locale")
+    events = sample_events()
+    batch = EventBatch.from_events(events)
+    check(batch.local_hours().tolist() == [event.timestamp.hour for event in events], "Heures locales incorrectes")
+
+    local = batch.local_seconds()
+    check((local // 60 % 60).tolist() == [event.timestamp.minute for event in events], "Minutes locales incorrectes")
+    weekdays = ((local // 86400 + 3) % 7).tolist()
+    check(weekdays == [event.timestamp.weekday() for event in events], "Jours de la semaine incorrects")
+    print("   ✓ heures, minutes et jours identiques à SecurityEvent.timestamp (changement d'heure compris)")
+
+
+def main() -> int:
+    try:
+        check_round_trip()
+        check_take()
+        check_dictionary_columns()
+        check_addresses()
+        check_local_time()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print("\n🎉 Lots d'événements validés")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
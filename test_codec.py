@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Script de test des codecs d'événements
+
+Vérifie l'aller-retour des codecs json et msgpack, leur équivalence avec le
+format de référence to_dict/from_dict, la lecture des enregistrements d'une
+version de schéma ultérieure ou antérieure et la conservation exacte des
+horodatages naïfs, y compris dans l'heure sautée du passage à l'heure d'été. Le codec msgpack n'est testé que si le paquet
+msgpack est installé.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Ajout du répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from src.core.codec import CodecError, JSONCodec, SCHEMA_VERSION, get_codec, msgpack
+from src.core.events import (
+    SecurityEvent, EventType, UserContext, DeviceContext, NetworkContext, Severity, RiskLevel
+)
+
+
+def sample_events():
+    """Événements couvrant contextes, conteneurs vides, fuseaux et identifiants non UUID."""
+    full = SecurityEvent(
+        timestamp=datetime(2024, 3, 1, 8, 30, 15, 123456, tzinfo=timezone(timedelta(hours=1))),
+        event_type=EventType.AD_GROUP_MODIFIED,
+        severity=Severity.CRITICAL,
+        risk_level=RiskLevel.HIGH,
+        confidence=0.85,
+        user_context=UserContext(
+            username="admin_compromis",
+            domain="DEV.ORION.LOCAL",
+            groups=["Administrators", "Domain Admins"],
+            privileges=["SeDebugPrivilege"],
+            risk_score=0.7
+        ),
+        device_context=DeviceContext(hostname="DC-01", ip_address="10.0.0.1", domain_joined=True),
+        network_context=NetworkContext(
+            source_ip="10.0.0.5", destination_ip="10.0.0.1", destination_port=389, protocol="ldap"
+        ),
+        raw_data={"EventCode": "4728", "Nested": {"Members": ["a", "b"], "Count": 2}},
+        enriched_data={"geo": "FR"},
+        source="test_agent",
+        correlation_id="corr-42",
+        parent_event_id="parent-1",
+        tags=["test", "escalation"],
+        labels={"env": "dev"},
+        processed_by=["hydra"],
+        processing_time=0.0125
+    )
+    bare = SecurityEvent(event_type=EventType.PROCESS_CREATION)
+    utc = SecurityEvent(
+        event_id="agent-event-0001",
+        timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        event_type=EventType.KERBEROS_TGS_REQUEST
+    )
+    return [full, bare, utc]
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+
+
+def check_json_matches_dict_format(codec: JSONCodec) -> None:
+    """L'enregistrement json est celui de to_dict, complété des champs du schéma."""
+    print("🎭 Test 1 : json ⇄ format to_dict")
+    for event in sample_events():
+        reference = json.loads(json.dumps(event.to_dict(), default=str))
+        record = json.loads(codec.encode(event))
+        check(record.pop('schema_version') == SCHEMA_VERSION, "schema_version absent")
+        check(record.pop('timestamp_ns') == event.timestamp_ns, "timestamp_ns incorrect")
+        record.pop('utc_offset')
+        check(record == reference, f"Enregistrement différent de to_dict pour {event.event_id}")
+
+        # Un dictionnaire to_dict (sans version) est décodé comme par from_dict
+        legacy = json.dumps(event.to_dict(), default=str).encode()
+        check(codec.decode(legacy) == SecurityEvent.from_dict(json.loads(legacy)), "Lecture to_dict incorrecte")
+
+    # Dictionnaires partiels d'un client externe : tags automatiques complétés comme par from_dict
+    for partial in ({"event_id": "ext-1", "event_type": "decoy_interaction", "timestamp": "2024-01-01T00:00:00"},
+                    {"event_id": "ext-2", "event_type": "decoy_interaction", "timestamp": "2024-01-01T00:00:00",
+                     "tags": ["deception", "manual"]}):
+        check(codec.from_record(partial) == SecurityEvent.from_dict(partial), f"Lecture de {partial['event_id']}")
+    print("   ✓ enregistrements identiques à to_dict, lecture des dictionnaires non versionnés")
+
+
+def check_round_trip(codec) -> None:
+    print(f"🎭 Test : aller-retour {codec.name}")
+    events = sample_events()
+    for event in events:
+        decoded = codec.decode(codec.encode(event))
+        check(decoded == event, f"Aller-retour {codec.name} incorrect : {decoded!r} != {event!r}")
+        check(decoded.timestamp == event.timestamp, "Horodatage ou fuseau perdu")
+        check(decoded.to_dict() == event.to_dict(), "to_dict différent après aller-retour")
+
+    check(codec.decode_batch(codec.encode_batch(events)) == events, "Aller-retour par lot incorrect")
+    check(codec.decode(memoryview(codec.encode(events[0]))) == events[0], "Décodage depuis un memoryview")
+
+    # Les contextes datetime et les conteneurs non alloués sont préservés
+    event = SecurityEvent(user_context=UserContext("bob", "ORION", last_logon=datetime(2024, 2, 2, 9, 0)))
+    decoded = codec.decode(codec.encode(event))
+    check(decoded.user_context.last_logon == datetime(2024, 2, 2, 9, 0), "last_logon perdu")
+    check(decoded._raw_data is None and decoded._labels is None, "Conteneurs vides alloués au décodage")
+    print(f"   ✓ {len(events)} événements, lot, memoryview, contextes datetime")
+
+
+def check_forward_compatibility(codec: JSONCodec) -> None:
+    """Les champs ajoutés par une version ultérieure sont ignorés."""
+    print("🎭 Test : compatibilité ascendante")
+    event = sample_events()[0]
+
+    record = json.loads(codec.encode(event))
+    record['schema_version'] = SCHEMA_VERSION + 1
+    record['future_field'] = {"x": 1}
+    record['user_context']['future_context_field'] = True
+    check(codec.decode(json.dumps(record).encode()) == event, "Enregistrement json v+1 mal lu")
+
+    if msgpack is not None:
+        binary = get_codec("msgpack")
+        packed = binary.to_record(event)
+        packed[0] = SCHEMA_VERSION + 1
+        packed[8].append("future_context_field")
+        packed.append("future_field")
+        check(binary.decode(msgpack.packb(packed, use_bin_type=True)) == event, "Enregistrement msgpack v+1 mal lu")
+
+    invalid_records = [
+        b"[1, 2]", b"{\"schema_version\": -1}", b"not json",
+        # Horodatage absent ou mal typé, énumération inconnue, contexte ou date mal formés
+        b"{\"schema_version\": 1}", b"{\"schema_version\": 2, \"timestamp_ns\": \"1\"}",
+        b"{\"event_type\": \"unknown\"}", b"{\"severity\": 7}", b"{\"user_context\": \"bob\"}",
+        b"{\"user_context\": {\"name\": \"bob\"}}", b"{\"timestamp\": \"yesterday\"}", b"{\"confidence\": 2}",
+    ]
+    for invalid in invalid_records:
+        try:
+            codec.decode(invalid)
+        except CodecError:
+            continue
+        except Exception as e:
+            raise AssertionError(f"{type(e).__name__} au lieu de CodecError pour {invalid!r}")
+        raise AssertionError(f"Enregistrement invalide accepté : {invalid!r}")
+
+    if msgpack is not None:
+        binary = get_codec("msgpack")
+        for index, value in ((2, "1"), (4, "unknown"), (6, 9), (8, "bob")):
+            packed = binary.to_record(event)
+            packed[index] = value
+            try:
+                binary.decode(msgpack.packb(packed, use_bin_type=True))
+            except CodecError:
+                continue
+            except Exception as e:
+                raise AssertionError(f"{type(e).__name__} au lieu de CodecError (champ msgpack {index})")
+            raise AssertionError(f"Enregistrement msgpack invalide accepté (champ {index})")
+    print("   ✓ champs inconnus ignorés, enregistrements invalides rejetés")
+
+
+def check_naive_timestamps(codecs) -> None:
+    """Un horodatage naïf est relu à l'identique, quel que soit le fuseau du système."""
+    print("🎭 Test : horodatages naïfs (TZ=Europe/Paris)")
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = 'Europe/Paris'
+    time.tzset()
+    try:
+        # 02:30 n'existe pas le 31 mars 2024 à Paris (passage de 02:00 à 03:00)
+        gap = datetime(2024, 3, 31, 2, 30, 0, 250)
+        event = SecurityEvent(timestamp=gap)
+        check(event.timestamp == gap and event.timestamp.tzinfo is None, f"Heure sautée modifiée : {event.timestamp}")
+        event.timestamp = datetime(2024, 10, 27, 2, 30, fold=1)
+        check(event.timestamp == datetime(2024, 10, 27, 2, 30), "Heure répétée modifiée")
+
+        before = datetime.now()
+        now = SecurityEvent().timestamp
+        check(before <= now <= datetime.now(), f"Horodatage par défaut hors de datetime.now() : {now}")
+
+        for codec in codecs:
+            decoded = codec.decode(codec.encode(SecurityEvent(timestamp=gap)))
+            check(decoded.timestamp == gap, f"Heure sautée modifiée par {codec.name}")
+
+        # Un enregistrement v1 porte l'horodatage naïf depuis l'epoch : 10:00 à Paris en janvier
+        record = json.loads(codecs[0].encode(SecurityEvent(timestamp=gap)))
+        record['schema_version'] = 1
+        record['timestamp_ns'] = int(datetime(2024, 1, 15, 9, tzinfo=timezone.utc).timestamp()) * 10**9 + 7000
+        check(codecs[0].decode(json.dumps(record).encode()).timestamp == datetime(2024, 1, 15, 10, 0, 0, 7),
+              "Enregistrement v1 naïf mal converti")
+    finally:
+        if previous is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = previous
+        time.tzset()
+    print("   ✓ heure sautée, heure répétée, horodatage par défaut et enregistrements v1")
+
+
+def main() -> int:
+    codecs = [get_codec("json")]
+    if msgpack is not None:
+        codecs.append(get_codec("msgpack"))
+    else:
+        print("⚠️  msgpack non installé : codec binaire non testé")
+
+    try:
+        check_json_matches_dict_format(codecs[0])
+        for codec in codecs:
+            check_round_trip(codec)
+        check_forward_compatibility(codecs[0])
+        check_naive_timestamps(codecs)
+    except AssertionError as e:
+        print(f"❌ {e}")
+        return 1
+
+    event = sample_events()[0]
+    sizes = ", ".join(f"{codec.name} {len(codec.encode(event))} octets" for codec in codecs)
+    print(f"\n🎉 Codecs validés (événement complet : to_dict {len(json.dumps(event.to_dict()))} octets, {sizes})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Script de test du journal d'événements segmenté
+
+Vérifie la bascule de segment et la numérotation des enregistrements, les
+lectures de plage par l'index creux (comparées à un parcours complet), la
+réouverture, la troncature d'une fin de segment incomplète ou corrompue, la
+rétention par segments entiers et le verrou d'écriture exclusif.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Ajout du répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from src.core.event_log import HEADER, EventLog, EventLogLockedError, fcntl
+
+
+BASE = 1_700_000_000.0
+OPTIONS = {"segment_bytes": 4096, "index_interval": 256, "fsync_batch": 50}
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+
+
+def fill(log: EventLog, count: int, seed: int = 42):
+    """Enregistrements aux horodatages non croissants, comme ceux des agents."""
+    rnd = random.Random(seed)
+    records = []
+    for index in range(count):
+        timestamp = BASE + index + rnd.uniform(-5, 5)
+        payload = json.dumps({"index": index, "timestamp": timestamp}).encode()
+        check(log.append(payload, timestamp) == index, f"Numéro de séquence incorrect pour {index}")
+        records.append((timestamp, payload))
+    return records
+
+
+def expected(records, start=None, end=None):
+    """Parcours complet de référence, au même arrondi à la nanoseconde que le journal."""
+    start_ns = round(start * 1e9) if start is not None else None
+    end_ns = round(end * 1e9) if end is not None else None
+    selected = []
+    for timestamp, payload in records:
+        timestamp_ns = round(timestamp * 1e9)
+        if (start_ns is None or timestamp_ns >= start_ns) and (end_ns is None or timestamp_ns < end_ns):
+            selected.append((timestamp_ns / 1e9, payload))
+    return selected
+
+
+def segment_files(directory: str, suffix: str):
+    return sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+
+
+def check_segments_and_ranges(directory: str):
+    print("🎭 Test 1 : segments et lectures de plage")
+    log = EventLog(directory, **OPTIONS)
+    records = fill(log, 2000)
+    check(len(log.segments) > 10, "Les segments doivent basculer à segment_bytes")
+    check(len(log) == len(records), "Nombre d'enregistrements incorrect")
+    check(all(segment.size <= OPTIONS["segment_bytes"] for segment in log.segments), "Segment trop grand")
+
+    rnd = random.Random(7)
+    for _ in range(200):
+        start = BASE + rnd.uniform(-10, 2010)
+        end = start + rnd.uniform(0, 300)
+        check(list(log.scan(start, end)) == expected(records, start, end), f"Plage [{start}, {end}[ incorrecte")
+    check(list(log.scan()) == expected(records), "Parcours complet incorrect")
+    check(list(log.scan(BASE + 5000)) == [], "Plage postérieure au journal non vide")
+
+    check(log.begin_sync() is not None, "Des enregistrements attendent un fsync")
+    check(log.begin_sync() is None, "Rien ne doit rester à synchroniser")
+    log.close()
+    print(f"   ✓ {len(records)} enregistrements, {len(log.segments)} segments, 200 plages")
+    return records
+
+
+def check_reopen(directory: str, records) -> None:
+    print("🎭 Test 2 : réouverture et index reconstruit")
+    log = EventLog(directory, **OPTIONS)
+    check(list(log.scan()) == expected(records), "Contenu différent après réouverture")
+    check(log.append(b"next", BASE + 3000) == len(records), "La numérotation doit continuer")
+    records.append((BASE + 3000, b"next"))
+    log.close()
+
+    os.remove(os.path.join(directory, segment_files(directory, ".idx")[0]))
+    log = EventLog(directory, **OPTIONS)
+    check(list(log.scan(BASE + 100, BASE + 400)) == expected(records, BASE + 100, BASE + 400),
+          "Plage incorrecte avec un index reconstruit")
+    log.close()
+    print("   ✓ contenu et numérotation conservés, index manquant reconstruit")
+
+
+def check_torn_tail(directory: str, records) -> None:
+    print("🎭 Test 3 : fin de segment incomplète ou corrompue")
+    active = os.path.join(directory, segment_files(directory, ".log")[-1])
+    valid_size = os.path.getsize(active)
+
+    # Écriture interrompue : en-tête annonçant 100 octets, 3 écrits
+    with open(active, "ab") as handle:
+        handle.write(HEADER.pack(100, 0, 0) + b"abc")
+    log = EventLog(directory, **OPTIONS)
+    check(os.path.getsize(active) == valid_size, "Fin incomplète non tronquée")
+    check(list(log.scan()) == expected(records), "Contenu incorrect après troncature")
+    log.close()
+
+    # Enregistrement complet mais CRC invalide
+    with open(active, "ab") as handle:
+        handle.write(HEADER.pack(4, 0, 0) + b"abcd")
+    log = EventLog(directory, **OPTIONS)
+    check(os.path.getsize(active) == valid_size, "Enregistrement corrompu non tronqué")
+    check(log.append(b"after", BASE + 3001) == len(records), "Numérotation incorrecte après troncature")
+    records.append((BASE + 3001, b"after"))
+    check(list(log.scan()) == expected(records), "Ajout incorrect après troncature")
+    log.close()
+    print("   ✓ fin tronquée au dernier enregistrement valide, ajouts repris")
+
+
+def check_retention(directory: str, records) -> None:
+    print("🎭 Test 4 : rétention par segments entiers")
+    log = EventLog(directory, **OPTIONS)
+    total, segments = len(log), len(log.segments)
+    cutoff = BASE + 1000
+
+    dropped, remove = log.begin_drop(cutoff)
+    check(dropped > 0 and remove is not None, "Des segments doivent être échus")
+    check(len(log) == total - dropped, "Enregistrements retirés mal comptés")
+    check(len(segment_files(directory, ".log")) == segments, "Les fichiers ne sont supprimés que par remove()")
+    check(min(segment.base_sequence for segment in log.segments) > 0, "Premier segment non retiré")
+    remove()
+    check(len(segment_files(directory, ".log")) == len(log.segments), "Fichiers de segments non supprimés")
+    check(len(segment_files(directory, ".idx")) == len(log.segments) - 1, "Index de segments non supprimés")
+
+    kept = {payload for _, payload in log.scan()}
+    check(all(payload in kept for timestamp, payload in records if timestamp > cutoff), "Enregistrement récent perdu")
+    check(all(segment.max_ts > round(cutoff * 1e9) for segment in log.segments[:-1]), "Segment échu conservé")
+
+    sealed = len(log) - log.segments[-1].count
+    check(log.drop_before(BASE + 10 ** 6) == sealed, "Rétention complète incorrecte")
+    check(len(log.segments) == 1, "Le segment actif n'est jamais supprimé")
+    check(log.begin_drop(BASE + 10 ** 6) == (0, None), "Plus rien à retirer")
+    log.close()
+    print(f"   ✓ {dropped} enregistrements retirés, segment actif conservé")
+
+
+def check_lock(directory: str) -> None:
+    print("🎭 Test 5 : verrou d'écriture exclusif")
+    if fcntl is None:
+        print("   ⚠️  fcntl indisponible : verrou non testé")
+        return
+    log = EventLog(directory, **OPTIONS)
+    try:
+        EventLog(directory, **OPTIONS)
+    except EventLogLockedError:
+        pass
+    else:
+        raise AssertionError("Deuxième ouverture du même répertoire acceptée")
+
+    # La synchronisation bloquante s'exécute dans un thread pendant les ajouts
+    log.append(b"locked", BASE + 4000)
+    complete = log.begin_sync()
+    worker = threading.Thread(target=complete)
+    worker.start()
+    log.append(b"during-sync", BASE + 4001)
+    worker.join()
+    log.close()
+
+    reopened = EventLog(directory, **OPTIONS)
+    check([payload for _, payload in reopened.scan(BASE + 4000)] == [b"locked", b"during-sync"],
+          "Ajouts perdus pendant la synchronisation")
+    reopened.close()
+    print("   ✓ deuxième ouverture refusée, verrou libéré par close()")
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            records = check_segments_and_ranges(directory)
+            check_reopen(directory, records)
+            check_torn_tail(directory, records)
+            check_retention(directory, records)
+            check_lock(directory)
+        except AssertionError as e:
+            print(f"❌ {e}")
+            return 1
+
+    print("\n🎉 Journal d'événements validé")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
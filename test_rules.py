@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Script de test du moteur de règles vectorisé de Cassandra
+
+Vérifie, sur des événements tirés aléatoirement (graine fixe), que
+`VectorizedRuleScorer.score` produit exactement les évaluations de
+`CassandraModule._analyze_event_basic` : mêmes scores, niveaux, facteurs
+(dans le même ordre) et justifications.
+"""
+
+import logging
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# Ajout du répertoire src au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from src.core.batch import EventBatch
+from src.core.config import CassandraConfig
+from src.core.events import SecurityEvent, EventType, UserContext, DeviceContext
+from src.modules.cassandra import CassandraModule
+
+
+USERNAMES = ["john.doe", "Administrator", "svc_backup", "krbtgt", "ALICE", "admin_compromis", ""]
+HOSTNAMES = ["WS-01", "unknown-host", "UNKNOWN", "DC-01", ""]
+# Adresses IPv4 privées et publiques, et adresses que la colonne entière ne représente pas
+IP_ADDRESSES = [
+    "10.1.2.3", "192.168.1.20", "172.16.0.1", "172.300.1.1", "8.8.8.8", "193.168.0.1",
+    "fe80::1", "10.x", "192.168.1", "", "Unknown",
+]
+ZONES = [
+    None, timezone.utc, timezone(timedelta(hours=5, minutes=30)),
+    ZoneInfo("Europe/Paris"), ZoneInfo("America/St_Johns"), ZoneInfo("Australia/Lord_Howe"),
+]
+RAW_DATA = [
+    {}, {"Group": "Domain Admins"}, {"Group": "domain admins"}, {"Group": "Users"},
+    {"EventType": "A user account was enabled"}, {"EventType": "account enabled"}, {"EventID": 4738},
+]
+# Passages à l'heure d'été et à l'heure d'hiver (Europe, Amérique du Nord, Lord Howe)
+TRANSITIONS = [
+    datetime(2024, 3, 31, 1, tzinfo=timezone.utc), datetime(2024, 10, 27, 1, tzinfo=timezone.utc),
+    datetime(2024, 3, 10, 5, 30, tzinfo=timezone.utc), datetime(2024, 4, 6, 15, tzinfo=timezone.utc),
+]
+
+
+def random_events(count: int, seed: int = 42):
+    """Événements aléatoires : contextes absents, adresses invalides, horodatages naïfs ou non."""
+    rnd = random.Random(seed)
+    events = []
+    for _ in range(count):
+        user_context = None
+        if rnd.random() < 0.85:
+            user_context = UserContext(
+                username=rnd.choice(USERNAMES),
+                domain="DEV.ORION.LOCAL",
+                privileges=rnd.choice([[], ["SeDebugPrivilege"]])
+            )
+        device_context = None
+        if rnd.random() < 0.85:
+            device_context = DeviceContext(
+                hostname=rnd.choice(HOSTNAMES),
+                ip_address=rnd.choice(IP_ADDRESSES),
+                domain_joined=rnd.random() < 0.5
+            )
+        instant = rnd.choice(TRANSITIONS) + timedelta(seconds=rnd.randrange(-3 * 3600, 3 * 3600))
+        if rnd.random() < 0.3:
+            instant += timedelta(days=rnd.randrange(0, 365))
+        events.append(SecurityEvent(
+            timestamp=datetime.fromtimestamp(instant.timestamp(), rnd.choice(ZONES)),
+            event_type=rnd.choice([
+                EventType.AD_GROUP_MODIFIED, EventType.AD_ACCOUNT_MODIFIED, EventType.AD_LOGON,
+                rnd.choice(list(EventType)),
+            ]),
+            user_context=user_context,
+            device_context=device_context,
+            raw_data=dict(rnd.choice(RAW_DATA)),
+        ))
+    return events
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+
+
+def check_identical_assessments(cassandra: CassandraModule) -> int:
+    print("🎭 Test 1 : règles vectorisées ⇄ analyse basique événement par événement")
+    events = random_events(3000)
+    expected = [cassandra._analyze_event_basic(event) for event in events]
+    actual = cassandra.rule_scorer.score(EventBatch.from_events(events))
+
+    check(len(actual) == len(expected), "Nombre d'évaluations différent")
+    for event, scalar, vectorized in zip(events, expected, actual):
+        context = f"{event.event_type.value} à {event.timestamp.isoformat()}"
+        check(vectorized == scalar, f"Évaluation différente pour {context} : {vectorized} != {scalar}")
+        check(list(vectorized.factors) == list(scalar.factors), f"Ordre des facteurs différent pour {context}")
+        check(vectorized.justification == scalar.justification, f"Justification différente pour {context}")
+        check(type(vectorized.risk_score) is float, "Le score doit être un float Python")
+
+    flagged = sum(assessment.risk_score >= 0.6 for assessment in expected)
+    print(f"   ✓ {len(events)} événements identiques ({flagged} à risque élevé)")
+    return len(events)
+
+
+def check_edge_batches(cassandra: CassandraModule) -> None:
+    print("🎭 Test 2 : lots vides et événements sans contexte")
+    check(cassandra.rule_scorer.score(EventBatch.from_events([])) == [], "Lot vide")
+
+    bare = [SecurityEvent(event_type=event_type) for event_type in EventType]
+    expected = [cassandra._analyze_event_basic(event) for event in bare]
+    check(cassandra.rule_scorer.score(EventBatch.from_events(bare)) == expected, "Événements sans contexte")
+    print(f"   ✓ lot vide et {len(bare)} types d'événements sans contexte")
+
+
+def main() -> int:
+    logging.disable(logging.CRITICAL)
+    cassandra = CassandraModule(CassandraConfig())
+
+    try:
+        check_identical_assessments(cassandra)
+        check_edge_batches(cassandra)
+    except AssertionError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print("\n🎉 Règles vectorisées identiques à l'analyse basique")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())